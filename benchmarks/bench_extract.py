@@ -0,0 +1,84 @@
+"""
+Micro-benchmark de l'extraction de `teamsData` sur des pages Understat enregistrées.
+
+Compare l'ancienne méthode (regex sur toute la page, décodage `unicode_escape`
+puis `json.loads`) à `homeadv.extract`, en débit et en pic de mémoire.
+
+Usage : PYTHONPATH=. python benchmarks/bench_extract.py --html-dir <dossier de pages>
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import time
+import tracemalloc
+
+from homeadv.extract import extract_json_blobs, extract_teams_data
+
+
+TEAMS_DATA_PATTERN = re.compile(r"var teamsData\s*=\s*JSON\.parse\(\'(.*?)\'\);")
+
+
+def legacy_teams_data(html):
+    """Méthode historique de `scrap.py`."""
+    match = TEAMS_DATA_PATTERN.search(html)
+    if not match:
+        return None
+    json_data = bytes(match.group(1), "utf-8").decode("unicode_escape")
+    return json.loads(json_data)
+
+
+def all_blobs(html):
+    return extract_json_blobs(html)
+
+
+def measure(func, pages, repeat):
+    """Retourne (meilleur temps d'un passage sur toutes les pages, pic mémoire)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages:
+            func(html)
+        best = min(best, time.perf_counter() - start)
+
+    peak = 0
+    for html in pages:
+        tracemalloc.start()
+        func(html)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'extraction de teamsData.")
+    parser.add_argument("--html-dir", required=True, help="Dossier de pages enregistrées par scrap.py --html-dir.")
+    parser.add_argument("--repeat", type=int, default=5, help="Nombre de passages (le meilleur est retenu).")
+    args = parser.parse_args()
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(args.html_dir, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    if not pages:
+        raise SystemExit(f"Aucune page .html dans {args.html_dir}")
+
+    for html in pages:
+        if legacy_teams_data(html) != extract_teams_data(html):
+            raise SystemExit("Les deux méthodes ne donnent pas le même teamsData")
+
+    size_mb = sum(len(html) for html in pages) / 1e6
+    print(f"{len(pages)} pages, {size_mb:.1f} Mo")
+    print(f"{'méthode':<32}{'temps (s)':>12}{'Mo/s':>10}{'pic (Mo)':>12}")
+    for label, func in [
+        ("regex + unicode_escape", legacy_teams_data),
+        ("homeadv.extract (teamsData)", extract_teams_data),
+        ("homeadv.extract (tous les blocs)", all_blobs),
+    ]:
+        elapsed, peak = measure(func, pages, args.repeat)
+        print(f"{label:<32}{elapsed:>12.3f}{size_mb / elapsed:>10.1f}{peak / 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Entrées fixes des benchmarks, sans réseau.
+
+- Matchs synthétiques au format de `understat.get_league_results`
+  (`homeadv.synthetic`, graine fixe) : 20 équipes par ligue, matchs
+  aller-retour, buts de Poisson autour des xG, avantage du terrain modéré.
+- Pages de ligue synthétiques : le `teamsData` de ces matchs, échappé en
+  `\\xNN` dans un bloc `var teamsData = JSON.parse('...')` comme sur Understat,
+  entouré des autres blocs et de HTML de remplissage.
+- Données enregistrées : le CSV scrapé versionné de `wilcoxon_replic.py`.
+"""
+from homeadv import synthetic
+from homeadv.synthetic import LEAGUES, SEED, SyntheticUnderstat
+
+
+SEASONS = list(range(2014, 2024))
+MATCH_STATS_CSV = "./replicabilite/web_scraping/understat_match_stats.csv"
+
+
+def fixtures(leagues=LEAGUES, seasons=SEASONS, seed=SEED):
+    """Matchs synthétiques {(league, season): fixtures}, identiques d'un appel à l'autre."""
+    return synthetic.fixtures(leagues, seasons, seed=seed)
+
+
+def league_pages(leagues=LEAGUES, seasons=SEASONS, seed=SEED):
+    """Pages de ligue synthétiques, une par ligue et saison."""
+    generator = SyntheticUnderstat(seed=seed)
+    return [generator.league_page(league, season) for league in leagues for season in seasons]
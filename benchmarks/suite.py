@@ -0,0 +1,379 @@
+"""
+Benchmarks des étapes de l'étude : récupération, analyse, statistiques et rendu.
+
+Chaque cas chronomètre un chemin critique sur des entrées fixes et hors
+réseau (`benchmarks/inputs.py`) : matchs et pages Understat synthétiques, CSV
+scrapé versionné, serveur Understat local (`homeadv.stub`). Le temps retenu est le meilleur de `--repeat` passages,
+après un appel de chauffe ; la médiane est affichée pour juger du bruit.
+
+Les résultats sont comparés à la référence enregistrée dans
+`benchmarks/baseline.json` (`--save-baseline` la remplace) : un cas plus
+lent que la référence de plus de `--tolerance` est signalé comme régression
+et le code de sortie vaut 1. Chaque exécution est ajoutée à l'historique
+`.cache/benchmarks/history.jsonl` (commit, date, machine, temps).
+
+Usage : PYTHONPATH=. python benchmarks/suite.py [--only 'stats:*'] [--save-baseline]
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import fnmatch
+import io
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from homeadv.cache import ROOT_DIR, CachedUnderstat, FixtureCache
+from homeadv.incremental import library_versions
+
+
+BASELINE_FILE = os.path.join(ROOT_DIR, "benchmarks", "baseline.json")
+HISTORY_FILE = os.path.join(ROOT_DIR, ".cache", "benchmarks", "history.jsonl")
+REPEAT = 5
+MIN_SAMPLE = 0.05
+TOLERANCE = 0.25
+# Écart absolu en deçà duquel une différence de temps n'est pas signalée
+NOISE_FLOOR = 0.002
+
+CASES = {}
+
+
+def case(name, repeat=None):
+    """
+    Déclare un cas : la fonction décorée prépare les entrées (hors mesure) et
+    retourne la fonction à chronométrer. `repeat` borne le nombre de passages.
+    """
+    def register(setup):
+        CASES[name] = (setup, repeat)
+        return setup
+    return register
+
+
+class Inputs:
+    """Entrées partagées par les cas, construites à la première demande."""
+
+    def __init__(self):
+        self._values = {}
+
+    def get(self, name, build):
+        if name not in self._values:
+            self._values[name] = build()
+        return self._values[name]
+
+    def fixtures(self):
+        from benchmarks.inputs import fixtures
+        return self.get("fixtures", fixtures)
+
+    def table(self):
+        from homeadv.fixtures import FixtureTable
+        return self.get("table", lambda: FixtureTable.from_fixtures(self.fixtures()))
+
+    def samples(self):
+        return self.get("samples", lambda: self.table().home_away_arrays())
+
+    def pairs(self):
+        metrics = [("points_home", "points_away"), ("xpts_home", "xpts_away"), ("xg_home", "xg_away")]
+        return self.get("pairs", lambda: [(group[home], group[away])
+                                          for group in self.samples().values() for home, away in metrics])
+
+    def pages(self):
+        from benchmarks.inputs import league_pages
+        return self.get("pages", league_pages)
+
+    def workdir(self):
+        """Dossier temporaire où les cas écrivent leurs fichiers (cache, images)."""
+        return self.get("workdir", lambda: tempfile.mkdtemp(prefix="homeadv-bench-"))
+
+    def stub(self):
+        """Serveur Understat local, sans latence ni erreur."""
+        from homeadv.stub import StubServer
+        return self.get("stub", lambda: StubServer().start())
+
+    def close(self):
+        if "workdir" in self._values:
+            shutil.rmtree(self._values["workdir"], ignore_errors=True)
+        if "stub" in self._values:
+            self._values["stub"].stop()
+
+
+@contextlib.contextmanager
+def _chdir(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+@case("fetch:cache")
+def _fetch_cache(inputs):
+    """`fetch_league_results` servi par le cache disque (lecture, contrôle SHA-256, JSON)."""
+    from homeadv.fetch import fetch_league_results
+
+    root = os.path.join(inputs.workdir(), "understat")
+    cache = FixtureCache(root=root, offline=True)
+    for (league, season), fixtures in inputs.fixtures().items():
+        cache.put("league_results", league, season, fixtures)
+    leagues = list(dict.fromkeys(league for league, _ in inputs.fixtures()))
+    seasons = list(dict.fromkeys(season for _, season in inputs.fixtures()))
+    client = CachedUnderstat(None, cache=cache)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return asyncio.run(fetch_league_results(client, leagues, seasons))
+    return run
+
+
+@case("fetch:stub", repeat=3)
+def _fetch_stub(inputs):
+    """`fetch_league_results` en HTTP depuis le serveur local : requêtes concurrentes, réponses JSON, sans cache."""
+    import aiohttp
+    from understat import Understat
+    from homeadv.fetch import UnderstatSession, ThrottledUnderstat, fetch_league_results
+
+    stub = inputs.stub()
+    leagues = list(dict.fromkeys(league for league, _ in inputs.fixtures()))
+    seasons = list(dict.fromkeys(season for _, season in inputs.fixtures()))
+
+    async def fetch():
+        async with aiohttp.ClientSession() as session:
+            client = ThrottledUnderstat(Understat(UnderstatSession(session, stub.url)), rate=None,
+                                        host=stub.url)
+            return await fetch_league_results(client, leagues, seasons)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return asyncio.run(fetch())
+    return run
+
+
+@case("parse:fixtures")
+def _parse_fixtures(inputs):
+    """Analyse des matchs Understat en `FixtureTable` (ex-`getHomeAwayResultPerMatch`)."""
+    from homeadv.fixtures import FixtureTable
+
+    fixtures = inputs.fixtures()
+    return lambda: FixtureTable.from_fixtures(fixtures).home_away_arrays()
+
+
+@case("parse:teams_data")
+def _parse_teams_data(inputs):
+    """Extraction de `teamsData` et tableaux par équipe et par match de `scrap.py`."""
+    from homeadv.scrape import parse_teams_data, team_stats_by_location, team_stats_by_match
+
+    pages = inputs.pages()
+
+    def run():
+        for html in pages:
+            data_teams = parse_teams_data(html)
+            team_stats_by_location(data_teams, "League", 2020)
+            team_stats_by_match(data_teams, "League", 2020)
+    return run
+
+
+@case("stats:home_away_replic")
+def _home_away_replic(inputs):
+    """Lecture du CSV scrapé et découpage domicile / extérieur de `wilcoxon_replic.py` (ex-boucle `iterrows`)."""
+    from benchmarks.inputs import MATCH_STATS_CSV
+    from homeadv.matches import MatchIndex, home_away_arrays
+    from homeadv.store import load_table
+
+    load_table(MATCH_STATS_CSV)  # construit la copie en colonnes si besoin, hors mesure
+    return lambda: home_away_arrays(MatchIndex(load_table(MATCH_STATS_CSV)))
+
+
+@case("stats:wilcoxon")
+def _wilcoxon(inputs):
+    """Tests de Wilcoxon de toutes les ligues, saisons et mesures."""
+    from homeadv.wilcoxon import paired_wilcoxon
+
+    pairs = inputs.pairs()
+    return lambda: paired_wilcoxon(pairs)
+
+
+@case("stats:mannwhitney")
+def _mannwhitney(inputs):
+    """Matrices de Mann-Whitney saison x saison des xPTS à domicile, une par ligue."""
+    from homeadv.mannwhitney import mann_whitney_matrix
+
+    table = inputs.table()
+    xpoints = [[table.values("xpts_home", league, season) for season in table.seasons()]
+               for league in table.leagues()]
+    return lambda: [mann_whitney_matrix(samples) for samples in xpoints]
+
+
+@case("stats:rm_anova")
+def _rm_anova(inputs):
+    """ANOVA à mesures répétées de toutes les ligues, saisons et mesures."""
+    from homeadv.anova import rm_anova_batch
+
+    pairs = inputs.pairs()
+    return lambda: rm_anova_batch(pairs)
+
+
+@case("render:create_graph", repeat=3)
+def _create_graph(inputs):
+    """Figure diff_points_xpoints de `reproduction/reproduce_diff_points.py`."""
+    from homeadv.render import load_script
+
+    script = load_script("reproduction/reproduce_diff_points.py")
+    totals = inputs.table().season_totals()[["League", "Season", "points_home", "points_away",
+                                             "xpoints_home", "xpoints_away"]]
+    workdir = inputs.workdir()
+    os.makedirs(os.path.join(workdir, "reproduction", "results"), exist_ok=True)
+
+    def run():
+        with _chdir(workdir), contextlib.redirect_stdout(io.StringIO()):
+            script.create_graph(totals.copy())
+    return run
+
+
+@case("render:create_stylized_table", repeat=3)
+def _create_stylized_table(inputs):
+    """Tableau Mann-Whitney d'une ligue de `reproduction/mannwhitneyu.py`."""
+    import numpy as np
+    import pandas as pd
+    from homeadv.mannwhitney import mann_whitney_matrix
+    from homeadv.render import load_script
+
+    script = load_script("reproduction/mannwhitneyu.py")
+    table = inputs.table()
+    league, seasons = table.leagues()[0], table.seasons()
+    _, p_values = mann_whitney_matrix([table.values("xpts_home", league, season) for season in seasons])
+    later = np.tril(np.ones((len(seasons), len(seasons)), dtype=bool), k=-1)
+    results = {league: pd.DataFrame(np.where(later, p_values / 2, np.nan), index=seasons, columns=seasons)}
+    workdir = inputs.workdir()
+
+    def run():
+        with _chdir(workdir), contextlib.redirect_stdout(io.StringIO()):
+            script.create_stylized_table(results, league)
+    return run
+
+
+def measure(func, repeat):
+    """
+    Temps d'un appel de `func` sur `repeat` passages, après un appel de
+    chauffe. Un passage enchaîne assez d'appels pour durer au moins
+    `MIN_SAMPLE` secondes (comme `timeit`), le temps d'un appel en est la moyenne.
+    """
+    start = time.perf_counter()
+    func()
+    number = max(1, math.ceil(MIN_SAMPLE / max(time.perf_counter() - start, 1e-9)))
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return {"best": min(times), "median": statistics.median(times), "number": number}
+
+
+def machine():
+    """Description de la machine et des versions, pour juger si deux mesures sont comparables."""
+    return {"platform": platform.platform(), "processor": platform.machine(), "cpus": os.cpu_count(),
+            **library_versions()}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Statut de chaque cas face à la référence : "régression", "plus rapide", "=" ou "nouveau"."""
+    status = {}
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            status[name] = "nouveau"
+        elif result["best"] - reference["best"] <= NOISE_FLOOR:
+            status[name] = "plus rapide" if result["best"] < reference["best"] * (1 - tolerance) else "="
+        elif result["best"] > reference["best"] * (1 + tolerance):
+            status[name] = "régression"
+        else:
+            status[name] = "="
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks des étapes de l'étude, comparés à une référence.")
+    parser.add_argument("--only", nargs="+", metavar="CAS", help="Cas à exécuter (motifs fnmatch, ex. 'stats:*').")
+    parser.add_argument("--list", action="store_true", help="Affiche les cas disponibles.")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="Nombre de passages mesurés (le meilleur est retenu).")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="Ralentissement relatif au-delà duquel un cas est une régression.")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Fichier de référence.")
+    parser.add_argument("--save-baseline", action="store_true", help="Remplace la référence par cette exécution.")
+    parser.add_argument("--history", default=HISTORY_FILE, help="Historique JSON Lines des exécutions.")
+    parser.add_argument("--no-history", action="store_true", help="N'ajoute pas cette exécution à l'historique.")
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT_DIR)
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    names = [name for name in CASES if not args.only or any(fnmatch.fnmatch(name, pattern) for pattern in args.only)]
+    if args.list:
+        for name in names:
+            print(f"{name:<32}{CASES[name][0].__doc__}")
+        return 0
+
+    try:
+        with open(args.baseline) as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        stored = {"machine": None, "results": {}}
+    current_machine = machine()
+    if stored["machine"] and stored["machine"] != current_machine and not args.save_baseline:
+        print("Attention : la référence a été mesurée sur une autre machine ou avec d'autres versions.")
+
+    inputs = Inputs()
+    results = {}
+    try:
+        for name in names:
+            setup, repeat = CASES[name]
+            results[name] = measure(setup(inputs), min(args.repeat, repeat or args.repeat))
+    finally:
+        inputs.close()
+
+    status = compare(results, stored["results"], args.tolerance)
+    print(f"{'cas':<32}{'meilleur (s)':>14}{'médiane (s)':>14}{'référence (s)':>15}{'rapport':>9}  statut")
+    for name, result in results.items():
+        reference = stored["results"].get(name)
+        ratio = f"{result['best'] / reference['best']:.2f}" if reference else "-"
+        print(f"{name:<32}{result['best']:>14.4f}{result['median']:>14.4f}"
+              f"{reference['best'] if reference else float('nan'):>15.4f}{ratio:>9}  {status[name]}")
+
+    if not args.no_history:
+        os.makedirs(os.path.dirname(args.history), exist_ok=True)
+        with open(args.history, "a") as f:
+            f.write(json.dumps({"date": datetime.datetime.now().isoformat(timespec="seconds"),
+                                "commit": git_commit(), "machine": current_machine, "results": results}) + "\n")
+    if args.save_baseline:
+        # Les cas non exécutés gardent leur référence
+        stored = {"machine": current_machine, "results": {**stored["results"], **results}}
+        with open(args.baseline, "w") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Référence enregistrée dans {os.path.relpath(args.baseline, ROOT_DIR)}")
+        return 0
+
+    regressions = [name for name, value in status.items() if value == "régression"]
+    if regressions:
+        print(f"{len(regressions)} régression(s) : {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""
+Code partagé par les scripts de reproduction et de réplication de l'étude
+"COVID and Home Advantage in Football".
+"""
@@ -0,0 +1,81 @@
+"""
+ANOVA à mesures répétées (un facteur intra-sujet à deux modalités, domicile /
+extérieur, chaque match étant un sujet) pour plusieurs groupes à la fois.
+
+Avec deux modalités, les sommes de carrés de `pingouin.rm_anova` ont une
+forme fermée en fonction des moyennes et des sommes de carrés de chaque
+groupe, où d = x - y est la différence appariée :
+
+    SS_condition = n * mean(d)² / 2
+    SS_erreur    = Σ(d - mean(d))² / 2
+    F            = SS_condition / (SS_erreur / (n - 1))
+    ng2          = SS_condition / (SS_condition + Σ(x - mean(x))² + Σ(y - mean(y))²)
+
+Ces sommes sont calculées pour tous les groupes à la fois (`np.bincount`).
+pingouin reste disponible pour contrôler les résultats (`rm_anova_pingouin`),
+mais n'est importé que dans ce cas.
+"""
+import numpy as np
+from scipy.special import fdtrc
+
+
+def rm_anova_batch(pairs):
+    """
+    ANOVA à mesures répétées pour chaque couple (x, y) de `pairs`.
+
+    Retourne (F, pvalues, ng2) : statistique F (ddl 1 et n - 1), p-value non
+    corrigée et eta² généralisé de chaque groupe.
+    """
+    n_groups = len(pairs)
+    if n_groups == 0:
+        return np.array([]), np.array([]), np.array([])
+
+    x = [np.asarray(home, dtype=np.float64) for home, _ in pairs]
+    y = [np.asarray(away, dtype=np.float64) for _, away in pairs]
+    sizes = np.array([len(values) for values in x], dtype=np.int64)
+    group = np.repeat(np.arange(n_groups), sizes)
+    x, y = np.concatenate(x), np.concatenate(y)
+
+    def sums(values):
+        return np.bincount(group, weights=values, minlength=n_groups)
+
+    n = sizes.astype(np.float64)
+    d = x - y
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_x, mean_y, mean_d = sums(x) / n, sums(y) / n, sums(d) / n
+
+        # Sommes de carrés centrées (deuxième passe, plus stable que Σx² - (Σx)² / n)
+        ss_x = sums((x - mean_x[group]) ** 2)
+        ss_y = sums((y - mean_y[group]) ** 2)
+        ss_d = sums((d - mean_d[group]) ** 2)
+
+        ss_condition = n * mean_d ** 2 / 2
+        ss_error = ss_d / 2
+        F = ss_condition / (ss_error / (n - 1))
+        pvalues = fdtrc(1, n - 1, F)
+        ng2 = ss_condition / (ss_condition + ss_x + ss_y)
+    return F, pvalues, ng2
+
+
+def rm_anova_pingouin(pairs):
+    """
+    Même calcul que `rm_anova_batch`, groupe par groupe avec `pingouin.rm_anova`.
+    Sert de contrôle : pingouin n'est importé qu'à l'appel.
+    """
+    import pandas as pd
+    import pingouin as pg
+
+    F, pvalues, ng2 = [], [], []
+    for home, away in pairs:
+        data = pd.DataFrame({
+            'score': list(home) + list(away),
+            'condition': ['home'] * len(home) + ['away'] * len(away),
+            'team': list(range(len(home))) + list(range(len(away)))
+        })
+        aov = pg.rm_anova(dv='score', within='condition', subject='team', data=data, detailed=True)
+        # La colonne de p-value s'appelle 'p-unc' jusqu'à pingouin 0.5, 'p_unc' ensuite
+        p_column = 'p-unc' if 'p-unc' in aov.columns else 'p_unc'
+        F.append(aov.loc[0, 'F'])
+        pvalues.append(aov.loc[0, p_column])
+        ng2.append(aov.loc[0, 'ng2'])
+    return np.array(F), np.array(pvalues), np.array(ng2)
@@ -0,0 +1,139 @@
+"""
+Intervalles de confiance bootstrap des écarts domicile / extérieur.
+
+Pour chaque groupe (une ligue, une saison et une mesure : points, xPTS ou
+xG), les matchs sont rééchantillonnés avec remise `n_resamples` fois. Un
+rééchantillonnage est une ligne d'une matrice d'effectifs (combien de fois
+chaque match est tiré) : tirée en bloc, elle donne les sommes et sommes de
+carrés de tous les réplicats par un seul produit matriciel, d'où la
+différence des moyennes domicile - extérieur et le Cohen's d de chaque
+réplicat (`homeadv.effect_size.from_moments`). Les valeurs sont d'abord
+centrées sur la moyenne de l'échantillon : les sommes de carrés d'un
+réplicat ne perdent pas de précision (Σx² - (Σx)² / n sur des valeurs
+proches de zéro). L'intervalle est celui des
+percentiles des réplicats.
+
+L'appariement dépend de la source des données, pas des tailles : avec
+`paired=True` (matchs Understat, où la i-ème valeur à domicile et la i-ème
+à l'extérieur viennent du même match), les deux valeurs d'un match sont
+tirées ensemble ; sinon (CSV par équipe, où les lignes domicile et
+extérieur sont des matchs différents) chaque groupe est rééchantillonné
+séparément.
+
+Chaque groupe a sa propre graine, dérivée de `seed` et de sa clé : les
+intervalles ne dépendent ni de l'ordre des groupes ni de leur répartition
+entre les processus (`HOMEADV_BOOTSTRAP_WORKERS`, un par cœur par défaut ;
+un seul, dans le processus appelant, quand `homeadv.pipeline` exécute
+plusieurs étapes à la fois).
+"""
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import get_context
+
+import numpy as np
+
+from homeadv.effect_size import from_moments
+
+
+N_RESAMPLES = 2000
+CONFIDENCE = 0.95
+SEED = 2024
+STATISTICS = ["mean_diff", "cohen_d"]
+
+# Réplicats traités à la fois : borne la taille des matrices d'effectifs
+_BATCH = 500
+
+
+def bootstrap_workers():
+    """Nombre de processus de calcul : `HOMEADV_BOOTSTRAP_WORKERS`, sinon un par cœur."""
+    return int(os.environ.get("HOMEADV_BOOTSTRAP_WORKERS") or os.cpu_count() or 1)
+
+
+def group_seed(seed, key):
+    """Graine d'un groupe : dérivée de `seed` et de la clé, stable d'une exécution à l'autre."""
+    words = np.frombuffer(hashlib.sha256(repr(key).encode()).digest()[:16], dtype=np.uint32)
+    return np.random.SeedSequence(entropy=seed, spawn_key=tuple(int(word) for word in words))
+
+
+def _counts(rng, size, n_resamples):
+    """Matrice (n_resamples, size) du nombre de tirages de chaque valeur dans chaque réplicat."""
+    draws = rng.integers(0, size, size=(n_resamples, size))
+    draws += size * np.arange(n_resamples)[:, None]
+    return np.bincount(draws.ravel(), minlength=n_resamples * size).reshape(n_resamples, size).astype(np.float64)
+
+
+def bootstrap_replicates(home, away, n_resamples=N_RESAMPLES, seed=None, paired=False):
+    """
+    Réplicats bootstrap de la différence des moyennes domicile - extérieur
+    ("mean_diff") et du Cohen's d ("cohen_d") d'un groupe. Avec `paired`,
+    `home[i]` et `away[i]` viennent du même match et sont tirés ensemble.
+    `seed` est une graine ou une `SeedSequence` (cf. `group_seed`).
+    """
+    home, away = np.asarray(home, dtype=np.float64), np.asarray(away, dtype=np.float64)
+    if paired and len(home) != len(away):
+        raise ValueError(f"Échantillons appariés de tailles différentes : {len(home)} et {len(away)}")
+    rng = np.random.default_rng(seed)
+    replicates = {name: np.empty(n_resamples) for name in STATISTICS}
+    if len(home) == 0 or len(away) == 0:
+        for values in replicates.values():
+            values.fill(np.nan)
+        return replicates
+
+    # Colonnes : écarts à la moyenne de l'échantillon et leurs carrés, pour les sommes de chaque réplicat
+    home_mean, away_mean = home.mean(), away.mean()
+    home_moments = np.column_stack([home - home_mean, (home - home_mean) ** 2])
+    away_moments = np.column_stack([away - away_mean, (away - away_mean) ** 2])
+    for start in range(0, n_resamples, _BATCH):
+        size = min(_BATCH, n_resamples - start)
+        counts_home = _counts(rng, len(home), size)
+        counts_away = counts_home if paired else _counts(rng, len(away), size)
+        sum_a, sumsq_a = (counts_home @ home_moments).T
+        sum_b, sumsq_b = (counts_away @ away_moments).T
+        shift_a, shift_b = sum_a / len(home), sum_b / len(away)
+        ss_a, ss_b = sumsq_a - sum_a * shift_a, sumsq_b - sum_b * shift_b
+        mean_a, mean_b = home_mean + shift_a, away_mean + shift_b
+
+        batch = slice(start, start + size)
+        replicates["mean_diff"][batch] = mean_a - mean_b
+        replicates["cohen_d"][batch] = from_moments(len(home), mean_a, ss_a, len(away), mean_b, ss_b)["cohen_d"]
+    return replicates
+
+
+def _intervals(shard, n_resamples, confidence, seed, paired):
+    alpha = (1 - confidence) / 2
+    results = []
+    for key, home, away in shard:
+        replicates = bootstrap_replicates(home, away, n_resamples, group_seed(seed, key), paired)
+        results.append({name: tuple(float(bound) for bound in np.nanquantile(values, [alpha, 1 - alpha]))
+                        if np.isfinite(values).any() else (np.nan, np.nan)
+                        for name, values in replicates.items()})
+    return results
+
+
+def bootstrap_intervals(groups, paired=False, n_resamples=N_RESAMPLES, confidence=CONFIDENCE, seed=SEED,
+                        workers=None):
+    """
+    Intervalles de confiance percentiles de chaque groupe de `groups`
+    ({clé: (domicile, extérieur)}). Retourne {clé: {statistique: (borne basse,
+    borne haute)}} pour les statistiques de `STATISTICS`. `paired` indique
+    si les valeurs domicile et extérieur de même rang viennent du même match.
+
+    Les groupes sont répartis en lots sur `workers` processus.
+    """
+    items = [(key, np.asarray(home), np.asarray(away)) for key, (home, away) in groups.items()]
+    workers = min(workers or bootstrap_workers(), len(items))
+    if workers <= 1:
+        results = _intervals(items, n_resamples, confidence, seed, paired)
+    else:
+        # Lots entrelacés : les groupes voisins (même ligue) ont des tailles proches
+        shards = [items[k::workers] for k in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as executor:
+            done = list(executor.map(partial(_intervals, n_resamples=n_resamples, confidence=confidence, seed=seed,
+                                             paired=paired),
+                                     shards))
+        results = [None] * len(items)
+        for k, shard_results in enumerate(done):
+            results[k::workers] = shard_results
+    return {key: result for (key, _, _), result in zip(items, results)}
@@ -0,0 +1,141 @@
+"""
+Cache disque des données Understat, partagé par tous les scripts.
+
+Chaque réponse est stockée une seule fois sous le nom de son empreinte SHA-256
+(stockage adressé par contenu) et un index relie la clé (endpoint, ligue,
+saison) à cette empreinte. Une saison terminée ne change plus : son entrée
+n'expire jamais. La saison en cours expire après `CURRENT_SEASON_TTL` secondes.
+
+`HOMEADV_UNDERSTAT_URL` remplace l'adresse d'Understat (ex. le serveur local
+`homeadv.stub`) ; les réponses d'un autre serveur sont alors mises en cache
+dans un dossier à part.
+"""
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_UNDERSTAT_URL = "https://understat.com"
+UNDERSTAT_URL = (os.environ.get("HOMEADV_UNDERSTAT_URL") or DEFAULT_UNDERSTAT_URL).rstrip("/")
+_CACHE_NAME = ("understat" if UNDERSTAT_URL == DEFAULT_UNDERSTAT_URL
+               else f"understat-{urlsplit(UNDERSTAT_URL).netloc.replace(':', '_')}")
+CACHE_DIR = os.environ.get("HOMEADV_CACHE_DIR", os.path.join(ROOT_DIR, ".cache", _CACHE_NAME))
+CURRENT_SEASON_TTL = 6 * 3600
+
+
+class CacheMiss(LookupError):
+    """Donnée absente du cache alors que le mode hors-ligne est actif."""
+
+
+def is_season_finished(season, today=None):
+    """
+    Une saison Understat `season` (ex. 2020 pour 2020/2021) est considérée
+    terminée à partir du 1er juillet de l'année suivante.
+    """
+    today = today or datetime.date.today()
+    return today >= datetime.date(int(season) + 1, 7, 1)
+
+
+class FixtureCache:
+    """
+    Stockage local des réponses Understat, indexé par (endpoint, ligue, saison).
+    """
+
+    def __init__(self, root=CACHE_DIR, ttl=CURRENT_SEASON_TTL, offline=None):
+        self.root = root
+        self.ttl = ttl
+        if offline is None:
+            offline = os.environ.get("HOMEADV_OFFLINE", "") not in ("", "0")
+        self.offline = offline
+
+    def _index_path(self, endpoint, league, season):
+        return os.path.join(self.root, "index", endpoint, league, f"{season}.json")
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.json")
+
+    def get(self, endpoint, league, season):
+        """
+        Retourne la donnée en cache, ou None si elle est absente ou expirée.
+        """
+        try:
+            with open(self._index_path(endpoint, league, season)) as f:
+                entry = json.load(f)
+            with open(self._object_path(entry["sha256"]), "rb") as f:
+                raw = f.read()
+        except (OSError, ValueError, KeyError):
+            return None
+
+        if not entry.get("finished") and time.time() - entry["fetched_at"] > self.ttl:
+            return None
+        if hashlib.sha256(raw).hexdigest() != entry["sha256"]:
+            return None
+        return json.loads(raw)
+
+    def put(self, endpoint, league, season, payload):
+        """
+        Enregistre `payload` et met à jour l'index pour la clé donnée.
+        """
+        raw = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            _atomic_write(object_path, raw)
+
+        entry = {
+            "sha256": digest,
+            "fetched_at": time.time(),
+            "finished": is_season_finished(season),
+        }
+        _atomic_write(self._index_path(endpoint, league, season), json.dumps(entry).encode("utf-8"))
+
+
+def _atomic_write(path, raw):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Fichier temporaire propre à cet appel : plusieurs threads peuvent écrire le même chemin
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(raw)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class CachedUnderstat:
+    """
+    Enveloppe un client `understat.Understat` : les appels à
+    `get_league_results` passent d'abord par le cache disque.
+    Les autres méthodes sont déléguées telles quelles au client.
+    """
+
+    def __init__(self, understat, cache=None):
+        self.understat = understat
+        self.cache = cache or FixtureCache()
+
+    async def get_league_results(self, league, season):
+        fixtures = self.cache.get("league_results", league, season)
+        if fixtures is not None:
+            return fixtures
+
+        if self.cache.offline:
+            raise CacheMiss(f"Pas de données en cache pour {league} {season} (mode hors-ligne)")
+
+        fixtures = await self.understat.get_league_results(league, season)
+        self.cache.put("league_results", league, season, fixtures)
+        return fixtures
+
+    def __getattr__(self, name):
+        return getattr(self.understat, name)
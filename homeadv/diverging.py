@@ -0,0 +1,99 @@
+"""
+Tableau de barres divergentes des écarts domicile - extérieur (diff_points_xpoints).
+
+Le tableau était dessiné avec `plt.subplots(len(data) + 1, 4)` : une paire
+d'axes par ligue et saison et par colonne (172 à 244 axes), chacun avec son
+`barh`, son texte et son fond. La création et la mise en page des axes
+dominaient le rendu.
+
+`draw_diverging_table` dessine le même tableau sur un seul axe, dont les
+unités sont les colonnes (largeurs `WIDTH_RATIOS`) et les lignes (hauteur 1) :
+les fonds alternés et les barres sont deux `PolyCollection`, les textes des
+`Text` posés directement aux centres des cases. Le coût croît linéairement
+avec le nombre de lignes.
+"""
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib import rcParams
+from matplotlib.collections import PolyCollection
+
+
+COLUMNS = ["League", "Season", "Diff Points (Home-Away)", "Diff XPoints (Home-Away)"]
+WIDTH_RATIOS = [1, 1, 3, 3]
+SHADE_COLOR = "#f0f0f0"
+POSITIVE_COLOR = "lightgreen"
+NEGATIVE_COLOR = "red"
+
+
+def _rectangles(x0, x1, y0, y1):
+    """Sommets de rectangles (un par élément des tableaux de bornes)."""
+    return np.stack([np.column_stack(np.broadcast_arrays(x, y))
+                     for x, y in ((x0, y0), (x1, y0), (x1, y1), (x0, y1))], axis=1)
+
+
+def draw_diverging_table(ax, labels, values, headers=COLUMNS, width_ratios=WIDTH_RATIOS, bar_height=1,
+                         margin=0.0, positive_color=POSITIVE_COLOR, negative_color=NEGATIVE_COLOR,
+                         shade_color=SHADE_COLOR):
+    """
+    Dessine sur `ax` un tableau d'une ligne d'en-tête `headers` puis d'une
+    ligne par élément : les colonnes de texte `labels`, puis les colonnes de
+    barres `values`, partant du milieu de leur colonne (vers la droite si la
+    valeur est positive, sinon vers la gauche) et étiquetées par leur valeur
+    entière. Les barres sont à l'échelle de la plus grande valeur absolue :
+    celle-ci occupe une demi-colonne. `bar_height` et `margin` (écart entre le
+    bout de la barre et son étiquette) sont en unités de `barh` dans un axe
+    par case ; une ligne sur deux est grisée.
+    """
+    labels = [np.asarray(column, dtype=str) for column in labels]
+    values = [np.asarray(column, dtype=float) for column in values]
+    n_rows = len(labels[0]) if labels else len(values[0])
+    widths = np.asarray(width_ratios, dtype=float)
+    lefts = np.concatenate([[0], np.cumsum(widths)[:-1]])
+    centers = lefts + widths / 2
+    rows = np.arange(n_rows) + 1.5  # centre de chaque ligne, l'en-tête occupe [0, 1]
+
+    ax.set_xlim(0, widths.sum())
+    ax.set_ylim(n_rows + 1, 0)
+    ax.axis('off')
+
+    # Fond alterné : une ligne de données sur deux, sur toute la largeur
+    shaded = rows[::2]
+    ax.add_collection(PolyCollection(_rectangles(0, widths.sum(), shaded - 0.5, shaded + 0.5),
+                                     facecolors=shade_color, edgecolors="none", zorder=-1), autolim=False)
+
+    # Titres des colonnes
+    for center, header in zip(centers, headers):
+        ax.text(center, 0.5, header, ha='center', va='center', fontsize=14, fontweight='bold')
+
+    # Colonnes de texte
+    for center, column in zip(centers, labels):
+        for row, text in zip(rows, column):
+            ax.text(center, row, text, ha='center', va='center', fontsize=12)
+
+    # Barres : comme `barh` dans un axe par case, limité à [-0.5, 0.5] en x
+    # et à la barre plus ses marges automatiques en y
+    max_value = max(np.abs(column).max() for column in values)
+    height = bar_height / (1 + 2 * rcParams["axes.ymargin"])
+    bars, colors = [], []
+    for center, width, column in zip(centers[len(labels):], widths[len(labels):], values):
+        lengths = column / max_value * 0.5 * width
+        bars.append(_rectangles(center, center + lengths, rows - height / 2, rows + height / 2))
+        colors.extend(np.where(column > 0, positive_color, negative_color))
+        for row, length, value in zip(rows, lengths, column):
+            ax.text(center + length - margin * width, row, f"{int(value)}", ha='right', va='center', fontsize=14,
+                    color='black')
+    ax.add_collection(PolyCollection(np.concatenate(bars), facecolors=colors, edgecolors="face", linewidths=0),
+                      autolim=False)
+
+
+def create_diff_figure(data, output_file, bar_height=1, margin=0.0):
+    """
+    Enregistre le tableau des écarts domicile - extérieur de `data` (une ligne
+    par ligue et saison, colonnes diff_points_homeaway et diff_xpoints_homeaway).
+    """
+    fig, ax = plt.subplots(figsize=(14, 22))
+    draw_diverging_table(ax, [data["League"], data["Season"].astype(str)],
+                         [data["diff_points_homeaway"], data["diff_xpoints_homeaway"]],
+                         bar_height=bar_height, margin=margin)
+    fig.savefig(output_file, bbox_inches='tight', dpi=300)
+    plt.close(fig)
@@ -0,0 +1,152 @@
+"""
+Tailles d'effet domicile / extérieur pour plusieurs groupes à la fois.
+
+Toutes les mesures sont calculées à partir de l'effectif, de la moyenne et de
+la somme des carrés centrée de chaque groupe (et des différences appariées
+pour les mesures appariées). Comme dans `homeadv.anova`, elles viennent de
+deux réductions sur les valeurs concaténées : les moyennes, puis les carrés
+des écarts à la moyenne, plus stable que Σx² - (Σx)² / n.
+
+- `cohen_d` : différence des moyennes sur l'écart-type combiné (pooled) ;
+- `hedges_g` : Cohen's d corrigé du biais des petits échantillons ;
+- `paired_d_z` : moyenne des différences appariées sur leur écart-type ;
+- `paired_d_av` : différence des moyennes sur la moyenne des deux écarts-types.
+
+Les mesures appariées supposent que la i-ème valeur à domicile et la i-ème
+valeur à l'extérieur viennent du même match ; elles valent NaN si les deux
+groupes n'ont pas la même taille. Les tableaux par équipe d'un `MatchIndex`
+ne sont pas appariés : `home_away_effect_sizes` ne les calcule qu'avec
+`paired=True`.
+"""
+import numpy as np
+
+
+EFFECT_SIZES = ["cohen_d", "hedges_g", "paired_d_z", "paired_d_av"]
+
+
+def _range_rows(starts, stops):
+    """
+    Plage et ligne de chaque élément des plages [start, stop), plage après
+    plage. Chaque somme par plage ne dépend que des valeurs de sa plage (pas
+    de sommes cumulées sur tout le tableau) : un groupe a la même taille
+    d'effet, au bit près, quels que soient les autres groupes calculés avec lui.
+    """
+    sizes = stops - starts
+    group = np.repeat(np.arange(len(starts)), sizes)
+    rows = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes - starts, sizes)
+    return group, rows
+
+
+def moments(values, starts, stops):
+    """
+    Effectif, moyenne et somme des carrés des écarts à la moyenne de chaque
+    plage [start, stop) de `values`.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    starts, stops = np.asarray(starts, dtype=np.int64), np.asarray(stops, dtype=np.int64)
+    group, rows = _range_rows(starts, stops)
+    values, n = values[rows], stops - starts
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.bincount(group, weights=values, minlength=len(starts)) / n
+    # Sommes de carrés centrées (deuxième passe, plus stable que Σx² - (Σx)² / n)
+    ss = np.bincount(group, weights=(values - mean[group]) ** 2, minlength=len(starts))
+    return n, mean, ss
+
+
+def from_moments(n_a, mean_a, ss_a, n_b, mean_b, ss_b, ss_d=None):
+    """
+    Tailles d'effet de a par rapport à b à partir de l'effectif, de la moyenne
+    et de la somme des carrés centrée de chaque groupe. `ss_d` (somme des
+    carrés centrée des différences a_i - b_i) est nécessaire aux mesures
+    appariées. Retourne un dictionnaire de tableaux indexé par `EFFECT_SIZES`.
+    """
+    n_a, n_b = np.asarray(n_a, dtype=np.float64), np.asarray(n_b, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var_a, var_b = ss_a / (n_a - 1), ss_b / (n_b - 1)
+
+        pooled_sd = np.sqrt((ss_a + ss_b) / (n_a + n_b - 2))
+        cohen_d = (mean_a - mean_b) / pooled_sd
+        hedges_g = cohen_d * (1 - 3 / (4 * (n_a + n_b) - 9))
+
+        paired_d_z = np.full(cohen_d.shape, np.nan)
+        paired_d_av = np.full(cohen_d.shape, np.nan)
+        if ss_d is not None:
+            paired = n_a == n_b
+            # Moyenne des différences appariées : différence des moyennes
+            d_z = (mean_a - mean_b) / np.sqrt(ss_d / (n_a - 1))
+            d_av = (mean_a - mean_b) / ((np.sqrt(var_a) + np.sqrt(var_b)) / 2)
+            paired_d_z = np.where(paired, d_z, np.nan)
+            paired_d_av = np.where(paired, d_av, np.nan)
+
+    return {"cohen_d": cohen_d, "hedges_g": hedges_g, "paired_d_z": paired_d_z, "paired_d_av": paired_d_av}
+
+
+def _paired_ss(differences, sizes, paired):
+    """
+    Somme des carrés centrée des différences appariées de chaque groupe :
+    `differences` concatène celles des groupes `paired` (de tailles `sizes`),
+    NaN pour les autres groupes.
+    """
+    ss_d = np.full(len(paired), np.nan)
+    stops = np.cumsum(sizes[paired])
+    ss_d[paired] = moments(differences, stops - sizes[paired], stops)[2]
+    return ss_d
+
+
+def effect_sizes(pairs):
+    """
+    Tailles d'effet de chaque couple (domicile, extérieur) de `pairs`.
+    Retourne un dictionnaire de tableaux indexé par `EFFECT_SIZES`.
+    """
+    home = [np.asarray(a, dtype=np.float64) for a, _ in pairs]
+    away = [np.asarray(b, dtype=np.float64) for _, b in pairs]
+    n_home = np.array([len(a) for a in home], dtype=np.int64)
+    n_away = np.array([len(b) for b in away], dtype=np.int64)
+    stops_home, stops_away = np.cumsum(n_home), np.cumsum(n_away)
+    home_values = np.concatenate(home) if home else np.array([])
+    away_values = np.concatenate(away) if away else np.array([])
+
+    n_a, mean_a, ss_a = moments(home_values, stops_home - n_home, stops_home)
+    n_b, mean_b, ss_b = moments(away_values, stops_away - n_away, stops_away)
+
+    # Différences appariées, seulement pour les couples de même taille
+    paired = n_home == n_away
+    differences = [a - b for a, b in zip(home, away) if len(a) == len(b)]
+    ss_d = _paired_ss(np.concatenate(differences) if differences else np.array([]), n_home, paired)
+    return from_moments(n_a, mean_a, ss_a, n_b, mean_b, ss_b, ss_d)
+
+
+def home_away_effect_sizes(index, values, paired=False):
+    """
+    Tailles d'effet domicile / extérieur de chaque ligue et saison d'un
+    `MatchIndex`, pour `values` aligné sur les lignes triées de l'index
+    (par exemple `index.column("xG")`).
+
+    Comme pour `homeadv.bootstrap.bootstrap_intervals`, l'appariement dépend
+    de la source des données : dans un CSV par équipe, la i-ème ligne à
+    domicile et la i-ème à l'extérieur sont des matchs différents, et seules
+    `cohen_d` et `hedges_g` ont un sens (les mesures appariées valent NaN).
+    `paired=True` n'est valable que si les lignes domicile et extérieur de
+    même rang viennent du même match.
+
+    Retourne {(league, season): {nom: valeur}} pour les noms de `EFFECT_SIZES`.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    keys = [(league, season) for league in index.leagues() for season in index.seasons()
+            if (league, season, "h") in index.offsets or (league, season, "a") in index.offsets]
+    home = np.array([index.bounds(league, season, "h") for league, season in keys], dtype=np.int64).reshape(-1, 2)
+    away = np.array([index.bounds(league, season, "a") for league, season in keys], dtype=np.int64).reshape(-1, 2)
+
+    n_a, mean_a, ss_a = moments(values, home[:, 0], home[:, 1])
+    n_b, mean_b, ss_b = moments(values, away[:, 0], away[:, 1])
+
+    ss_d = None
+    if paired:
+        # Différences domicile - extérieur, match par match, pour les groupes de même taille
+        same_size = n_a == n_b
+        _, home_rows = _range_rows(home[same_size, 0], home[same_size, 1])
+        _, away_rows = _range_rows(away[same_size, 0], away[same_size, 1])
+        ss_d = _paired_ss(values[home_rows] - values[away_rows], n_a, same_size)
+
+    sizes = from_moments(n_a, mean_a, ss_a, n_b, mean_b, ss_b, ss_d)
+    return {key: {name: sizes[name][k] for name in EFFECT_SIZES} for k, key in enumerate(keys)}
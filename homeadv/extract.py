@@ -0,0 +1,53 @@
+"""
+Extraction des objets JSON embarqués dans les pages Understat.
+
+Les pages contiennent des blocs `var teamsData = JSON.parse('...');` dont le
+contenu est du JSON où chaque caractère spécial est échappé en `\\xNN`. Les
+blocs sont repérés en un seul parcours linéaire de la page (recherche de
+sous-chaînes, sans expression régulière sur tout le HTML), puis chaque
+contenu est décodé directement en octets par `codecs.escape_decode` et
+transmis tel quel à `json.loads`.
+"""
+import codecs
+import json
+
+
+JSON_PARSE_MARKER = "JSON.parse('"
+JSON_PARSE_END = "')"
+VAR_KEYWORD = "var "
+
+
+def extract_json_blobs(html, names=None):
+    """
+    Retourne un dictionnaire {nom de variable: objet} pour chaque bloc
+    `var <nom> = JSON.parse('...')` de la page, en un seul parcours.
+    Avec `names`, seuls les blocs demandés sont décodés.
+    """
+    blobs = {}
+    position = 0
+
+    while True:
+        start = html.find(JSON_PARSE_MARKER, position)
+        if start < 0:
+            break
+        payload_start = start + len(JSON_PARSE_MARKER)
+        # Les apostrophes du contenu sont échappées (\x27) : la première `')` ferme le bloc
+        end = html.find(JSON_PARSE_END, payload_start)
+        if end < 0:
+            break
+
+        var_start = html.rfind(VAR_KEYWORD, position, start)
+        if var_start >= 0:
+            name = html[var_start + len(VAR_KEYWORD):start].split("=", 1)[0].strip()
+            if names is None or name in names:
+                raw, _ = codecs.escape_decode(html[payload_start:end])
+                blobs[name] = json.loads(raw)
+
+        position = end + len(JSON_PARSE_END)
+
+    return blobs
+
+
+def extract_teams_data(html):
+    """Retourne l'objet `teamsData` d'une page, ou None s'il est absent."""
+    return extract_json_blobs(html, names=("teamsData",)).get("teamsData")
@@ -0,0 +1,151 @@
+"""
+Récupération concurrente des résultats Understat pour toutes les ligues et saisons.
+
+Les requêtes sont lancées ensemble avec `asyncio.gather`, mais un sémaphore
+borne le nombre de requêtes simultanées et un limiteur de débit par hôte
+espace leur envoi. Les erreurs réseau sont réessayées avec un délai
+exponentiel aléatoire (jitter). Le client `understat` ne vérifie pas le
+statut HTTP : `UnderstatSession` transforme toute réponse non 2xx en
+`aiohttp.ClientResponseError`, réessayée comme une erreur réseau. Avec
+`HOMEADV_UNDERSTAT_URL`, les requêtes du client `understat` sont redirigées
+vers ce serveur (cf. `homeadv.stub`).
+"""
+import asyncio
+import random
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+from understat import Understat
+
+from homeadv.cache import DEFAULT_UNDERSTAT_URL, UNDERSTAT_URL, CachedUnderstat
+
+
+UNDERSTAT_HOST = urlsplit(UNDERSTAT_URL).netloc
+DEFAULT_CONCURRENCY = 6
+DEFAULT_RATE = 4.0  # requêtes par seconde et par hôte
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5  # secondes
+
+RETRY_EXCEPTIONS = (aiohttp.ClientError, asyncio.TimeoutError)
+
+_host_limiters = {}
+
+
+class RateLimiter:
+    """
+    Espace les départs de requêtes d'au moins `1 / rate` secondes.
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = 0.0
+
+    async def wait(self):
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def host_limiter(host, rate=DEFAULT_RATE):
+    """
+    Retourne le limiteur partagé par toutes les requêtes vers `host`. Un hôte
+    n'a qu'un débit : demander un autre débit que celui du limiteur existant
+    est une erreur.
+    """
+    if host not in _host_limiters:
+        _host_limiters[host] = RateLimiter(rate)
+    limiter = _host_limiters[host]
+    if limiter.rate != rate:
+        raise ValueError(f"Débit de {host} déjà fixé à {limiter.rate} requêtes/s, {rate} demandé")
+    return limiter
+
+
+class ThrottledUnderstat:
+    """
+    Enveloppe un client Understat : concurrence bornée, débit limité par hôte
+    et nouvelles tentatives en cas d'erreur réseau.
+    """
+
+    def __init__(self, understat, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, host=UNDERSTAT_HOST):
+        self.understat = understat
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.limiter = host_limiter(host, rate)
+        self.retries = retries
+        self.backoff = backoff
+
+    async def get_league_results(self, league, season):
+        async with self.semaphore:
+            for attempt in range(self.retries + 1):
+                await self.limiter.wait()
+                try:
+                    return await self.understat.get_league_results(league, season)
+                except RETRY_EXCEPTIONS as e:
+                    if attempt == self.retries:
+                        raise
+                    delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+                    print(f"Nouvel essai pour {league} {season} dans {delay:.1f}s : {e!r}")
+                    await asyncio.sleep(delay)
+
+    def __getattr__(self, name):
+        return getattr(self.understat, name)
+
+
+class UnderstatSession:
+    """
+    Enveloppe une session aiohttp pour le client `understat` : une réponse
+    non 2xx lève `aiohttp.ClientResponseError` au lieu d'être lue comme une
+    page, et les URL d'Understat, écrites en dur dans le client, sont
+    réécrites vers `base_url`.
+    """
+
+    def __init__(self, session, base_url=DEFAULT_UNDERSTAT_URL):
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+
+    def get(self, url, **kwargs):
+        if url.startswith(DEFAULT_UNDERSTAT_URL):
+            url = self.base_url + url[len(DEFAULT_UNDERSTAT_URL):]
+        return self.session.get(url, raise_for_status=True, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+
+def open_understat(session, **kwargs):
+    """
+    Construit le client utilisé par les scripts : cache disque, puis requêtes
+    limitées vers Understat (ou `HOMEADV_UNDERSTAT_URL`) pour les données
+    absentes du cache.
+    """
+    session = UnderstatSession(session, UNDERSTAT_URL)
+    return CachedUnderstat(ThrottledUnderstat(Understat(session), **kwargs))
+
+
+async def fetch_league_results(understat, leagues, seasons, skip_errors=False):
+    """
+    Récupère les matchs joués pour chaque couple (ligue, saison) en parallèle.
+
+    Retourne un dictionnaire {(league, season): fixtures} dans l'ordre
+    ligue × saison, quel que soit l'ordre d'arrivée des réponses. Avec
+    `skip_errors`, les couples en erreur sont signalés puis ignorés.
+    """
+    keys = [(league, season) for league in leagues for season in seasons]
+
+    async def fetch_one(league, season):
+        print(f"Fetching data for {league} {season}...")
+        return await understat.get_league_results(league, season)
+
+    results = await asyncio.gather(*(fetch_one(*key) for key in keys), return_exceptions=skip_errors)
+
+    fixtures = {}
+    for (league, season), result in zip(keys, results):
+        if isinstance(result, BaseException):
+            print(f"Erreur lors de la récupération des données pour {league} {season}: {result}")
+            continue
+        fixtures[(league, season)] = result
+    return fixtures
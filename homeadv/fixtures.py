@@ -0,0 +1,248 @@
+"""
+Modèle canonique des matchs Understat (`get_league_results`).
+
+Les fixtures renvoyées par Understat sont des dictionnaires de chaînes
+(`fixture['goals']['h']`, `fixture['forecast']['w']`...). `FixtureTable`
+les analyse une seule fois en colonnes NumPy compactes, une ligne par match :
+buts en int8, xG et probabilités du forecast en float32, équipes en codes
+catégoriels int16. Les matchs d'une même ligue et saison forment une plage
+contiguë de lignes, comme dans `MatchIndex`.
+
+Les grandeurs dérivées (points, xPTS) sont calculées sur les colonnes
+entières puis découpées par plage, sans repasser par les dictionnaires. Pour
+les calculs, les colonnes float32 sont ré-élargies en float64 via leur plus
+courte écriture décimale (`FixtureTable.exact`). Pour une chaîne d'au plus 7
+chiffres significatifs (celles d'Understat), on retrouve exactement
+`float()` de la chaîne : les tests de rangs voient les mêmes valeurs, et donc
+les mêmes ex-aequo, qu'avec les chaînes d'origine. Au-delà, float32 ne
+garde pas la valeur : une colonne dont une chaîne ne se retrouve pas ainsi
+reste en float64.
+`load_fixture_table` récupère et analyse les matchs une fois par processus :
+les analyses lancées ensemble (cf. `homeadv.pipeline`) partagent la même table.
+"""
+import hashlib
+
+import aiohttp
+import numpy as np
+import pandas as pd
+
+from homeadv.fetch import open_understat, fetch_league_results
+
+
+STORED_COLUMNS = ["goals_home", "goals_away", "xg_home", "xg_away", "forecast_w", "forecast_d", "forecast_l",
+                  "team_home", "team_away"]
+
+_tables = {}
+_shared = []
+
+
+class FixtureTable:
+    """
+    Matchs de plusieurs ligues et saisons, rangés par (ligue, saison).
+
+    `offsets` associe à chaque (league, season) sa plage de lignes ;
+    `teams` donne le nom de chaque code d'équipe.
+    """
+
+    def __init__(self, columns, teams, offsets):
+        self.teams = list(teams)
+        self.offsets = dict(offsets)
+        self._columns = dict(columns)
+
+    @classmethod
+    def from_fixtures(cls, fixtures_by_season):
+        """Analyse les fixtures de `fetch_league_results` ({(league, season): fixtures})."""
+        offsets = {}
+        records = []
+        for key, fixtures in fixtures_by_season.items():
+            offsets[key] = (len(records), len(records) + len(fixtures))
+            records.extend(fixtures)
+
+        def parse(field, side, convert, dtype):
+            return np.fromiter((convert(f[field][side]) for f in records), dtype=dtype, count=len(records))
+
+        def parse_float(field, side):
+            values = parse(field, side, float, np.float64)
+            compact = values.astype(np.float32)
+            # float32 seulement si chaque valeur se retrouve par sa plus courte écriture (cf. `exact`)
+            if np.array_equal(compact.astype(str).astype(np.float64), values):
+                return compact
+            return values
+
+        # Codes d'équipe : ordre d'apparition, domicile puis extérieur
+        codes, teams = pd.factorize(pd.Series([f['h']['title'] for f in records] + [f['a']['title'] for f in records],
+                                              dtype=object))
+        columns = {
+            "goals_home": parse('goals', 'h', int, np.int8),
+            "goals_away": parse('goals', 'a', int, np.int8),
+            "xg_home": parse_float('xG', 'h'),
+            "xg_away": parse_float('xG', 'a'),
+            "forecast_w": parse_float('forecast', 'w'),
+            "forecast_d": parse_float('forecast', 'd'),
+            "forecast_l": parse_float('forecast', 'l'),
+            "team_home": codes[:len(records)].astype(np.int16),
+            "team_away": codes[len(records):].astype(np.int16),
+        }
+        return cls(columns, teams, offsets)
+
+    def __len__(self):
+        return len(self._columns["goals_home"])
+
+    def keys(self):
+        """Couples (league, season) dans l'ordre de récupération."""
+        return list(self.offsets)
+
+    def leagues(self):
+        """Ligues dans leur ordre d'apparition."""
+        return list(dict.fromkeys(league for league, _ in self.offsets))
+
+    def seasons(self):
+        """Saisons dans leur ordre d'apparition."""
+        return list(dict.fromkeys(season for _, season in self.offsets))
+
+    def column(self, name):
+        """
+        Colonne `name` sur toutes les lignes : une colonne stockée, ou
+        "points_home", "points_away", "xpts_home", "xpts_away".
+        """
+        if name not in self._columns:
+            self._columns[name] = self._derive(name)
+        return self._columns[name]
+
+    def exact(self, name):
+        """
+        Colonne flottante `name` en float64, une colonne float32 étant ré-élargie
+        par sa plus courte écriture décimale : on retrouve exactement `float()`
+        de la chaîne Understat, donc les mêmes ex-aequo qu'en lisant les
+        chaînes. `from_fixtures` ne garde une colonne en float32 que si c'est
+        le cas pour chaque valeur (au plus 7 chiffres significatifs).
+        """
+        key = f"{name}:float64"
+        if key not in self._columns:
+            self._columns[key] = self._columns[name].astype(str).astype(np.float64)
+        return self._columns[key]
+
+    def _derive(self, name):
+        goals_home, goals_away = self._columns["goals_home"], self._columns["goals_away"]
+        draw = goals_home == goals_away
+        if name == "points_home":
+            return np.select([goals_home > goals_away, draw], [3, 1], 0).astype(np.int8)
+        if name == "points_away":
+            return np.select([goals_home < goals_away, draw], [3, 1], 0).astype(np.int8)
+        if name == "xpts_home":
+            return self.exact("forecast_w") * 3 + self.exact("forecast_d")
+        if name == "xpts_away":
+            return self.exact("forecast_l") * 3 + self.exact("forecast_d")
+        raise KeyError(name)
+
+    def bounds(self, league, season):
+        """Plage de lignes (début, fin) d'une ligue et saison, vide si absente."""
+        return self.offsets.get((league, season), (0, 0))
+
+    def values(self, name, league, season):
+        """Valeurs de la colonne `name` pour une ligue et saison (vue, sans copie)."""
+        start, stop = self.bounds(league, season)
+        return self.column(name)[start:stop]
+
+    def home_away_arrays(self):
+        """
+        Points, xPTS et xG à domicile et à l'extérieur de chaque ligue et saison,
+        au même format que `homeadv.matches.home_away_arrays`.
+        """
+        columns = {
+            "points_home": self.column("points_home"),
+            "points_away": self.column("points_away"),
+            "xpts_home": self.column("xpts_home"),
+            "xpts_away": self.column("xpts_away"),
+            "xg_home": self.exact("xg_home"),
+            "xg_away": self.exact("xg_away"),
+        }
+        return {
+            key: {name: values[start:stop] for name, values in columns.items()}
+            for key, (start, stop) in self.offsets.items()
+        }
+
+    def subset(self, keys):
+        """Table restreinte aux couples (league, season) de `keys`, dans cet ordre."""
+        ranges = [self.offsets[key] for key in keys]
+        rows = np.concatenate([np.arange(start, stop) for start, stop in ranges] or [np.array([], dtype=np.int64)])
+        offsets = {}
+        start = 0
+        for key, (first, last) in zip(keys, ranges):
+            offsets[key] = (start, start + last - first)
+            start += last - first
+        return FixtureTable({name: values[rows] for name, values in self._columns.items()}, self.teams, offsets)
+
+    def fingerprint(self, keys):
+        """
+        Empreinte SHA-256 des matchs des couples (league, season) de `keys`,
+        indépendante des autres ligues et saisons de la table (les équipes
+        comptent par leur nom, pas par leur code).
+        """
+        digest = hashlib.sha256()
+        for league, season in keys:
+            digest.update(f"{league}/{season}".encode())
+            start, stop = self.bounds(league, season)
+            for name in STORED_COLUMNS:
+                values = self._columns[name][start:stop]
+                if values.dtype.kind == "f":
+                    # Valeurs en float64 : le type d'une colonne dépend aussi des autres saisons
+                    values = self.exact(name)[start:stop]
+                if name.startswith("team_"):
+                    digest.update("\0".join(self.teams[code] for code in values).encode())
+                else:
+                    digest.update(np.ascontiguousarray(values).tobytes())
+        return digest.hexdigest()
+
+    def season_totals(self):
+        """
+        Totaux par ligue et saison : points et xPTS à domicile et à l'extérieur,
+        nombre de matchs (une ligne par ligue et saison).
+        """
+        keys = self.keys()
+        sizes = np.array([stop - start for start, stop in self.offsets.values()], dtype=np.int64)
+        group = np.repeat(np.arange(len(keys)), sizes)
+
+        def totals(name):
+            return np.bincount(group, weights=self.column(name), minlength=len(keys))
+
+        return pd.DataFrame({
+            "League": [league for league, _ in keys],
+            "Season": [season for _, season in keys],
+            "points_home": totals("points_home").astype(np.int64),
+            "points_away": totals("points_away").astype(np.int64),
+            "xpoints_home": totals("xpts_home"),
+            "xpoints_away": totals("xpts_away"),
+            "matchs_home": sizes,
+            "matchs_away": sizes,
+        })
+
+
+def share_fixture_table(table):
+    """
+    Rend `table` disponible pour les appels suivants de `load_fixture_table`
+    dans ce processus : les ligues et saisons qu'elle contient ne sont plus
+    récupérées ni analysées à nouveau.
+    """
+    _shared.append(table)
+
+
+async def load_fixture_table(leagues, seasons, skip_errors=False):
+    """
+    Récupère les matchs des ligues et saisons demandées et les analyse en
+    `FixtureTable`, une seule fois par processus pour les mêmes arguments.
+    Une table partagée qui contient déjà toutes ces ligues et saisons est
+    réutilisée.
+    """
+    key = (tuple(leagues), tuple(seasons), skip_errors)
+    if key not in _tables:
+        wanted = [(league, season) for league in leagues for season in seasons]
+        shared = next((table for table in _shared if all(k in table.offsets for k in wanted)), None)
+        if shared is not None:
+            _tables[key] = shared.subset(wanted)
+        else:
+            async with aiohttp.ClientSession() as session:
+                understat = open_understat(session)
+                fixtures_by_season = await fetch_league_results(understat, leagues, seasons, skip_errors=skip_errors)
+            _tables[key] = FixtureTable.from_fixtures(fixtures_by_season)
+    return _tables[key]
@@ -0,0 +1,170 @@
+"""
+Reconstruction incrémentale des résultats du pipeline (`homeadv.pipeline --incremental`).
+
+Chaque étape, ou chaque élément d'une étape (le tableau d'une ligue, le
+graphique d'une ligue), reçoit une empreinte SHA-256 de tout ce dont dépend
+sa sortie : code du script et des modules `homeadv` qu'il importe,
+paramètres (ligues, saisons, versions des bibliothèques de calcul) et données
+lues (partitions de matchs, CSV, résultats des étapes précédentes). Si
+l'empreinte est celle de la dernière exécution réussie et que les fichiers
+produits existent, l'étape ou l'élément est sauté ; le résultat d'une étape
+de statistiques est alors relu depuis `STATE_DIR`.
+"""
+import ast
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+from importlib import metadata
+
+import pandas as pd
+
+from homeadv.cache import ROOT_DIR, _atomic_write
+from homeadv.nulldist import rank_test_method
+
+
+STATE_DIR = os.environ.get("HOMEADV_BUILD_DIR", os.path.join(ROOT_DIR, ".cache", "pipeline"))
+STATE_FILE = "state.json"
+LIBRARIES = ["numpy", "scipy", "pandas", "matplotlib"]
+
+_code_digests = {}
+# `ast.parse` n'est pas sûr entre threads : les étapes calculent leurs empreintes en parallèle
+_code_lock = threading.Lock()
+
+
+def library_versions():
+    """
+    Versions de Python et des bibliothèques dont dépendent les calculs et les
+    figures, et méthode des tests de rangs (`HOMEADV_RANK_TEST_METHOD`).
+    """
+    versions = {"python": sys.version.split()[0], "rank_test_method": rank_test_method()}
+    for name in LIBRARIES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def file_digest(path):
+    """Empreinte du contenu d'un fichier ("absent" s'il n'existe pas)."""
+    if not os.path.exists(path):
+        return "absent"
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _update_digest(digest, value):
+    if isinstance(value, pd.DataFrame):
+        # Contenu seulement : la disposition interne d'un DataFrame (blocs) change
+        # son pickle sans changer ses valeurs, par exemple après un aller-retour disque
+        digest.update(repr([(str(name), str(dtype)) for name, dtype in value.dtypes.items()]).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, dict):
+        for key in value:
+            digest.update(repr(key).encode())
+            _update_digest(digest, value[key])
+    else:
+        digest.update(pickle.dumps(value, protocol=4))
+
+
+def value_digest(value):
+    """Empreinte d'un résultat Python (DataFrame, dictionnaire de DataFrames...)."""
+    digest = hashlib.sha256()
+    _update_digest(digest, value)
+    return digest.hexdigest()
+
+
+def _homeadv_imports(path):
+    """Fichiers des modules `homeadv` importés directement par `path`."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    modules = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module:
+            names = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+        elif isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        else:
+            continue
+        for name in names:
+            candidate = os.path.join(ROOT_DIR, *name.split(".")) + ".py"
+            if name.split(".")[0] == "homeadv" and os.path.exists(candidate):
+                modules.add(candidate)
+    return modules
+
+
+def code_digest(path):
+    """
+    Empreinte du code d'un script : son source et celui de tous les modules
+    `homeadv` qu'il importe, directement ou non.
+    """
+    path = os.path.join(ROOT_DIR, path)
+    with _code_lock:
+        if path not in _code_digests:
+            seen, pending = set(), [path]
+            while pending:
+                current = pending.pop()
+                if current not in seen:
+                    seen.add(current)
+                    pending.extend(_homeadv_imports(current))
+            digest = hashlib.sha256()
+            for current in sorted(seen):
+                digest.update(os.path.relpath(current, ROOT_DIR).encode())
+                digest.update(file_digest(current).encode())
+            _code_digests[path] = digest.hexdigest()
+    return _code_digests[path]
+
+
+def fingerprint(parts):
+    """Empreinte d'une liste de parties (chaînes, nombres, listes, dictionnaires)."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class BuildState:
+    """
+    Empreintes de la dernière exécution réussie de chaque étape ou élément,
+    et résultats des étapes de statistiques.
+    """
+
+    def __init__(self, root=STATE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        try:
+            with open(os.path.join(root, STATE_FILE), encoding="utf-8") as f:
+                self._digests = json.load(f)
+        except (OSError, ValueError):
+            self._digests = {}
+
+    def is_fresh(self, key, digest, outputs=()):
+        """Vrai si `key` a déjà été produit avec `digest` et que ses fichiers existent."""
+        with self._lock:
+            recorded = self._digests.get(key)
+        return recorded == digest and all(os.path.exists(path) for path in outputs)
+
+    def record(self, key, digest):
+        with self._lock:
+            self._digests[key] = digest
+
+    def _result_path(self, key):
+        return os.path.join(self.root, "results", hashlib.sha256(key.encode()).hexdigest() + ".pkl")
+
+    def save_result(self, key, value):
+        _atomic_write(self._result_path(key), pickle.dumps(value, protocol=4))
+
+    def load_result(self, key):
+        with open(self._result_path(key), "rb") as f:
+            return pickle.load(f)
+
+    def has_result(self, key):
+        return os.path.exists(self._result_path(key))
+
+    def save(self):
+        with self._lock:
+            raw = json.dumps(self._digests, indent=1, sort_keys=True).encode()
+        _atomic_write(os.path.join(self.root, STATE_FILE), raw)
@@ -0,0 +1,106 @@
+"""
+Tests de Mann-Whitney U entre toutes les saisons d'une ligue à la fois.
+
+Reproduit `scipy.stats.mannwhitneyu(x, y)` avec ses options par défaut dans
+la version fixée par `requirements.txt` (SciPy 1.14) : test bilatéral,
+correction de continuité, loi exacte si l'un des échantillons compte au plus
+8 valeurs et qu'il n'y a aucun ex-aequo, approximation normale corrigée des
+ex-aequo sinon.
+
+Les valeurs de toutes les saisons sont triées une seule fois. Pour deux
+saisons a et b, U_ab = somme sur les valeurs x de a de (#{y de b : y < x}
++ #{y de b : y = x} / 2) : avec le nombre de valeurs de chaque saison à
+chaque valeur distincte, toutes les statistiques U et tous les termes
+d'ex-aequo s'obtiennent par des produits de matrices S x V, sans reclasser
+chaque couple de saisons.
+
+Avec `method="exact"`, les p-values viennent de la loi exacte de U sachant
+les ex-aequo des deux saisons réunies (`homeadv.nulldist`), quand elle est
+calculable ; sinon l'approximation normale est conservée.
+"""
+import itertools
+
+import numpy as np
+from scipy.special import ndtr
+
+from homeadv.nulldist import rank_sum_null, rank_test_method, tie_structure, two_sided_pvalue
+
+
+EXACT_MAX_SIZE = 8
+
+
+def rank_sum_distribution(n1, n2):
+    """
+    Loi exacte de la statistique U pour deux échantillons de tailles n1 et n2
+    sans ex-aequo : retourne la loi de probabilité indexée par la valeur de U.
+    """
+    # U entier : 2 U est toujours pair
+    return rank_sum_null(n1, ((1, n1 + n2),))[::2]
+
+
+def _exact_pvalue(u, n1, n2):
+    pmf = rank_sum_distribution(int(n1), int(n2))
+    return min(2 * pmf[int(u):].sum(), 1.0)
+
+
+def mann_whitney_matrix(samples, method=None):
+    """
+    Test de Mann-Whitney U bilatéral entre chaque couple d'échantillons de
+    `samples` (liste de tableaux, un par saison).
+
+    Retourne (statistics, pvalues), deux matrices S x S : statistics[i, j]
+    est la statistique U de l'échantillon i face à l'échantillon j (celle
+    que renvoie `mannwhitneyu(samples[i], samples[j])`), pvalues est
+    symétrique, NaN sur la diagonale et pour un échantillon vide. `method`
+    vaut "auto" (comme SciPy 1.14) ou "exact" ; par défaut, `rank_test_method()`.
+    """
+    samples = [np.asarray(s, dtype=np.float64) for s in samples]
+    n_samples = len(samples)
+    sizes = np.array([len(s) for s in samples], dtype=np.float64)
+
+    # Tri unique de toutes les valeurs : effectif de chaque échantillon à chaque valeur distincte
+    values = np.concatenate(samples) if samples else np.array([])
+    distinct, inverse = np.unique(values, return_inverse=True)
+    sample = np.repeat(np.arange(n_samples), sizes.astype(np.int64))
+    counts = np.bincount(sample * len(distinct) + inverse,
+                         minlength=n_samples * len(distinct)).reshape(n_samples, len(distinct))
+    counts = counts.astype(np.float64)
+    below = np.cumsum(counts, axis=1) - counts
+
+    statistics = counts @ (below + counts / 2).T
+
+    # Somme des t^3 - t sur les ex-aequo de l'union de deux échantillons
+    squares = counts ** 2
+    own_ties = (counts ** 3 - counts).sum(axis=1)
+    tie_term = own_ties[:, None] + own_ties[None, :] + 3 * (squares @ counts.T + counts @ squares.T)
+    present = (counts > 0).astype(np.float64)
+    own_tied = (counts > 1).any(axis=1)
+    has_ties = own_tied[:, None] | own_tied[None, :] | (present @ present.T > 0)
+
+    n1, n2 = sizes[:, None], sizes[None, :]
+    n = n1 + n2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u = np.maximum(statistics, n1 * n2 - statistics)
+        s = np.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))))
+        z = (u - n1 * n2 / 2 - 0.5) / s
+        pvalues = np.clip(2 * ndtr(-z), 0, 1)
+
+    if (method or rank_test_method()) == "exact":
+        for i, j in itertools.combinations(np.flatnonzero(sizes > 0), 2):
+            # Suites d'ex-aequo des deux saisons réunies, dans l'ordre des valeurs
+            pooled = counts[i] + counts[j]
+            pmf = rank_sum_null(int(sizes[i]), tie_structure(pooled[pooled > 0]))
+            if pmf is not None:
+                pvalues[i, j] = pvalues[j, i] = two_sided_pvalue(pmf, 2 * statistics[i, j])
+    else:
+        exact = (np.minimum(n1, n2) <= EXACT_MAX_SIZE) & ~has_ties & (n1 > 0) & (n2 > 0)
+        for i, j in zip(*np.nonzero(exact)):
+            pvalues[i, j] = _exact_pvalue(u[i, j], n1[i, 0], n2[0, j])
+
+    empty = (sizes == 0)
+    statistics[empty, :] = np.nan
+    statistics[:, empty] = np.nan
+    pvalues[empty, :] = np.nan
+    pvalues[:, empty] = np.nan
+    np.fill_diagonal(pvalues, np.nan)
+    return statistics, pvalues
@@ -0,0 +1,102 @@
+"""
+Transformations vectorisées du tableau des matchs scrapés
+(une ligne par équipe et par match, cf. `understat_match_stats.csv`).
+
+`MatchIndex` trie le tableau une seule fois par (ligue, saison, lieu) : chaque
+groupe devient une plage contiguë de lignes, et ses valeurs sont des vues sur
+les colonnes, sans nouveau parcours du tableau.
+"""
+import numpy as np
+
+
+RESULT_POINTS = {"w": 3, "d": 1}  # toute autre valeur (défaite) vaut 0 point
+
+
+def result_points(results):
+    """Points obtenus pour chaque résultat 'w' / 'd' / 'l'."""
+    results = np.asarray(results, dtype=object)
+    points = np.zeros(len(results), dtype=np.int64)
+    for result, value in RESULT_POINTS.items():
+        points[results == result] = value
+    return points
+
+
+class MatchIndex:
+    """
+    Index du tableau des matchs par (League, Season, lieu).
+
+    Le tableau est trié une fois par ces clés, en gardant l'ordre des lignes
+    dans chaque groupe ; `offsets` donne la plage de lignes de chaque groupe.
+    """
+
+    def __init__(self, df, location="Home_Away"):
+        self.location = location
+        groups = df.groupby(["League", "Season", location], sort=False, observed=True).indices
+        order = np.concatenate(list(groups.values())) if groups else np.array([], dtype=np.int64)
+        self.frame = df.iloc[order].reset_index(drop=True)
+
+        self.offsets = {}
+        start = 0
+        for key, rows in groups.items():
+            self.offsets[key] = (start, start + len(rows))
+            start += len(rows)
+        self._columns = {}
+
+    def leagues(self):
+        """Ligues dans leur ordre d'apparition."""
+        return list(dict.fromkeys(league for league, _, _ in self.offsets))
+
+    def seasons(self):
+        """Saisons dans leur ordre d'apparition."""
+        return list(dict.fromkeys(season for _, season, _ in self.offsets))
+
+    def column(self, name):
+        """Colonne `name` du tableau trié, en tableau NumPy."""
+        if name not in self._columns:
+            self._columns[name] = np.asarray(self.frame[name])
+        return self._columns[name]
+
+    def bounds(self, league, season, location):
+        """Plage de lignes (début, fin) du groupe, vide s'il n'existe pas."""
+        return self.offsets.get((league, season, location), (0, 0))
+
+    def values(self, name, league, season, location):
+        """Valeurs de la colonne `name` pour un groupe (vue, sans copie)."""
+        start, stop = self.bounds(league, season, location)
+        return self.column(name)[start:stop]
+
+    def group(self, league, season, location):
+        """Lignes d'un groupe sous forme de DataFrame."""
+        start, stop = self.bounds(league, season, location)
+        return self.frame.iloc[start:stop]
+
+
+def home_away_arrays(df_or_index):
+    """
+    Sépare les matchs à domicile et à l'extérieur de chaque ligue et saison.
+
+    Retourne un dictionnaire {(league, season): arrays} où `arrays` contient
+    "points_home", "points_away", "xpts_home", "xpts_away", "xg_home" et
+    "xg_away", dans l'ordre des lignes du tableau.
+    """
+    index = df_or_index if isinstance(df_or_index, MatchIndex) else MatchIndex(df_or_index)
+    points = result_points(index.column("Result"))
+    xpts = index.column("xPTS").astype(np.float64, copy=False)
+    xg = index.column("xG").astype(np.float64, copy=False)
+
+    arrays = {}
+    for league in index.leagues():
+        for season in index.seasons():
+            if (league, season, "h") not in index.offsets and (league, season, "a") not in index.offsets:
+                continue
+            home = slice(*index.bounds(league, season, "h"))
+            away = slice(*index.bounds(league, season, "a"))
+            arrays[(league, season)] = {
+                "points_home": points[home],
+                "points_away": points[away],
+                "xpts_home": xpts[home],
+                "xpts_away": xpts[away],
+                "xg_home": xg[home],
+                "xg_away": xg[away],
+            }
+    return arrays
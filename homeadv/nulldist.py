@@ -0,0 +1,203 @@
+"""
+Lois exactes des tests de rangs, ex-aequo compris, partagées par tous les tests.
+
+Sous l'hypothèse nulle, la loi d'une statistique de rangs ne dépend que des
+tailles des échantillons et de la structure des ex-aequo (la taille de chaque
+suite de valeurs égales, dans l'ordre des valeurs) :
+
+- Wilcoxon (rangs signés) : chaque suite de t différences de rang moyen r
+  apporte k * r à R+, k suivant une loi binomiale (t, 1/2). La loi de R+ est
+  le produit de convolution de ces lois, calculé en demi-rangs (entiers) ;
+- Mann-Whitney : la somme des rangs du premier échantillon est celle de n1
+  valeurs tirées sans remise ; choisir k valeurs d'une suite de t apporte
+  k * r avec un poids C(t, k). Sans ex-aequo, la loi de U est donnée par les
+  coefficients du binôme de Gauss ; avec ex-aequo, les couples (valeurs
+  choisies, somme des rangs) sont propagés suite par suite. Ce calcul est
+  fait pour les petits échantillons (au plus `MAX_STATES` couples possibles)
+  et pour les valeurs à peu de modalités (au plus `MAX_RUNS` suites, comme
+  les points) ; entre les deux (valeurs presque toutes distinctes mais
+  quelques ex-aequo), la loi exacte n'est pas calculée (None) et les tests
+  gardent l'approximation normale.
+
+Une structure d'ex-aequo est un tuple de couples (taille d'une suite, nombre
+de suites consécutives de cette taille) : ((1, n),) sans ex-aequo. Chaque loi
+est mémorisée (LRU de `CACHE_SIZE` lois par type de test) et enregistrée dans
+`.cache/nulldist` (`HOMEADV_NULLDIST_DIR`) : elle n'est calculée qu'une fois,
+toutes exécutions confondues.
+
+`HOMEADV_RANK_TEST_METHOD=exact` fait utiliser ces lois par tous les tests de
+rangs des scripts ; par défaut ("auto"), ils reproduisent SciPy 1.14.
+"""
+import hashlib
+import io
+import os
+from functools import lru_cache
+
+import numpy as np
+from scipy.special import binom
+from scipy.stats import binom as binomial
+
+from homeadv.cache import ROOT_DIR, _atomic_write
+
+
+CACHE_DIR = os.environ.get("HOMEADV_NULLDIST_DIR", os.path.join(ROOT_DIR, ".cache", "nulldist"))
+CACHE_SIZE = 512
+MAX_STATES = 10_000_000
+MAX_RUNS = 16
+METHODS = ("auto", "exact")
+
+
+def rank_test_method():
+    """Méthode des tests de rangs : `HOMEADV_RANK_TEST_METHOD`, "auto" par défaut."""
+    method = os.environ.get("HOMEADV_RANK_TEST_METHOD") or "auto"
+    if method not in METHODS:
+        raise ValueError(f"HOMEADV_RANK_TEST_METHOD inconnue : {method!r} (attendu : {', '.join(METHODS)})")
+    return method
+
+
+def tie_structure(run_sizes):
+    """Structure d'ex-aequo des tailles de suites `run_sizes` (dans l'ordre des valeurs)."""
+    run_sizes = np.asarray(run_sizes, dtype=np.int64)
+    if len(run_sizes) == 0:
+        return ()
+    starts = np.flatnonzero(np.concatenate([[True], run_sizes[1:] != run_sizes[:-1]]))
+    repeats = np.diff(np.append(starts, len(run_sizes)))
+    return tuple((int(size), int(repeat)) for size, repeat in zip(run_sizes[starts], repeats))
+
+
+def _runs(ties):
+    """Tailles des suites et leurs rangs moyens doublés (entiers)."""
+    sizes = np.repeat([size for size, _ in ties], [repeat for _, repeat in ties]).astype(np.int64)
+    before = np.cumsum(sizes) - sizes
+    return sizes, 2 * before + sizes + 1
+
+
+def _path(kind, key):
+    digest = hashlib.sha256(repr(key).encode()).hexdigest()
+    return os.path.join(CACHE_DIR, kind, digest[:2], f"{digest}.npy")
+
+
+def _persisted(kind, key, compute, symmetric=False):
+    """
+    Loi `compute()` lue sur disque si elle y est, sinon calculée et enregistrée
+    (tableau vide pour None). D'une loi `symmetric` de longueur impaire, seule
+    la première moitié, centre compris, est enregistrée.
+    """
+    path = _path(kind, key)
+    try:
+        stored = np.load(path)
+    except (OSError, ValueError):
+        pmf = compute()
+        if pmf is None:
+            stored = np.array([])
+        else:
+            stored = pmf[:len(pmf) // 2 + 1] if symmetric else pmf
+        buffer = io.BytesIO()
+        np.save(buffer, stored)
+        try:
+            _atomic_write(path, buffer.getvalue())
+        except OSError:
+            pass
+    if not len(stored):
+        return None
+    # Même loi, au bit près, qu'elle vienne d'être calculée ou du disque
+    if symmetric:
+        return np.concatenate([stored, stored[:-1][::-1]])
+    return stored
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def signed_rank_null(ties):
+    """
+    Loi exacte de 2 R+ (somme des rangs positifs doublée) pour la structure
+    d'ex-aequo `ties` des |différences| non nulles : pmf indexée par 2 R+.
+    """
+    # Loi symétrique (changer tous les signes), de longueur n (n + 1) + 1
+    return _persisted("signed_rank", ties, lambda: _signed_rank_pmf(ties), symmetric=True)
+
+
+def _signed_rank_pmf(ties):
+    sizes, ranks = _runs(ties)
+    pmf = np.zeros(int(sizes @ ranks) + 1)
+    pmf[0] = 1
+    top = 0
+    for size, rank in zip(sizes, ranks):
+        if size == 1:
+            # Cas courant, sans copie : la moitié des tirages décale de `rank`
+            pmf[rank:top + rank + 1] += pmf[:top + 1]
+            pmf[:top + rank + 1] /= 2
+        else:
+            previous = pmf[:top + 1].copy()
+            pmf[:top + 1] = 0
+            for k, weight in enumerate(binomial.pmf(np.arange(size + 1), size, 0.5)):
+                pmf[k * rank:k * rank + top + 1] += weight * previous
+        top += size * rank
+    return pmf
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def rank_sum_null(n1, ties):
+    """
+    Loi exacte de 2 U (statistique de Mann-Whitney du premier échantillon,
+    doublée) pour un premier échantillon de `n1` valeurs et la structure
+    d'ex-aequo `ties` des deux échantillons réunis : pmf indexée par 2 U, ou
+    None si elle n'est pas calculable en au plus `MAX_STATES` états.
+    """
+    return _persisted("rank_sum", (n1, ties), lambda: _rank_sum_pmf(n1, ties))
+
+
+def _rank_sum_pmf(n1, ties):
+    sizes, ranks = _runs(ties)
+    n = int(sizes.sum())
+    n2 = n - n1
+    if (sizes == 1).all():
+        pmf = np.zeros(2 * n1 * n2 + 1)
+        pmf[::2] = _gauss_binomial(n1, n2)
+        return pmf
+    if len(sizes) > MAX_RUNS and np.log1p(sizes).sum() > np.log(MAX_STATES):
+        return None
+
+    # États : nombre de valeurs choisies et somme doublée de leurs rangs
+    chosen, total, weight = np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64), np.ones(1)
+    remaining = n
+    stride = int(2 * n * (n + 1) + 1)
+    for size, rank in zip(sizes, ranks):
+        remaining -= size
+        if len(chosen) * (size + 1) > MAX_STATES:
+            return None
+        k = np.arange(size + 1)
+        chosen = (chosen[:, None] + k).ravel()
+        total = (total[:, None] + k * rank).ravel()
+        weight = (weight[:, None] * binom(size, k)).ravel()
+        # Il faut pouvoir compléter à n1 valeurs avec les suites restantes
+        keep = (chosen <= n1) & (chosen + remaining >= n1)
+        states, inverse = np.unique(chosen[keep] * stride + total[keep], return_inverse=True)
+        weight = np.bincount(inverse, weights=weight[keep])
+        weight /= weight.max()
+        chosen, total = states // stride, states % stride
+
+    pmf = np.zeros(2 * n1 * n2 + 1)
+    np.add.at(pmf, total - n1 * (n1 + 1), weight)
+    return pmf / pmf.sum()
+
+
+def _gauss_binomial(n1, n2):
+    """Loi de U sans ex-aequo : coefficients du binôme de Gauss [n1 + n2, n1]_q normalisés."""
+    m, n = min(n1, n2), max(n1, n2)
+    # [m + n, m]_q = prod (1 - q^(n+i)) / (1 - q^i)
+    counts = np.zeros(m * n + 1)
+    counts[0] = 1
+    for i in range(1, m + 1):
+        shifted = np.zeros_like(counts)
+        shifted[n + i:] = counts[:-(n + i)]
+        counts = counts - shifted
+        for r in range(i):
+            counts[r::i] = np.cumsum(counts[r::i])
+    return counts / binom(m + n, m)
+
+
+def two_sided_pvalue(pmf, statistic):
+    """P-value bilatérale exacte de la statistique doublée `statistic` (arrondie à l'entier)."""
+    index = int(round(statistic))
+    p = 2 * min(pmf[:index + 1].sum(), pmf[index:].sum())
+    return min(max(p, 0.0), 1.0)
@@ -0,0 +1,217 @@
+"""
+Tests de permutation des rangs domicile / extérieur et entre saisons.
+
+Les p-values des scripts viennent des lois asymptotiques (ou exactes pour
+les petits échantillons) de `scipy.stats.wilcoxon` et `mannwhitneyu`, qui
+varient selon la version de SciPy. Les tests de permutation donnent des
+p-values qui ne dépendent que des données :
+
+- `sign_flip_test` (cas apparié, Wilcoxon) : sous l'hypothèse nulle, le
+  signe de chaque différence domicile - extérieur est aléatoire. Les rangs
+  des |différences| étant fixes, la somme des rangs positifs d'un tirage est
+  le produit d'une matrice de signes (un tirage par ligne) par les rangs ;
+- `label_permutation_test` (deux saisons, Mann-Whitney) : sous l'hypothèse
+  nulle, les étiquettes de saison sont échangeables. La somme des rangs de
+  la première saison d'un tirage est la somme des rangs d'un sous-ensemble
+  aléatoire de l'échantillon commun.
+
+La p-value bilatérale est celle de `homeadv.nulldist.two_sided_pvalue` :
+deux fois la plus petite des probabilités des queues inférieure et
+supérieure de la statistique (égale à 1 au plus). Les tirages sont faits par
+lots de `BATCH` ; l'estimation s'arrête dès que l'erreur type Monte-Carlo de
+la p-value est sous `tolerance`, ou après `n_permutations` tirages. Si
+toutes les permutations tiennent dans `n_permutations`, la p-value est
+exacte : elle est lue dans la loi exacte partagée de `homeadv.nulldist`. Chaque
+groupe a sa propre graine (`homeadv.bootstrap.group_seed`) et les groupes
+sont répartis sur un pool de processus (`HOMEADV_PERMUTATION_WORKERS`, un
+par cœur par défaut).
+
+`python3 -m homeadv.permutation` compare ces p-values à celles des tests
+des scripts pour toutes les ligues et saisons Understat.
+"""
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from math import comb
+from multiprocessing import get_context
+
+import numpy as np
+from scipy.stats import rankdata
+
+from homeadv.bootstrap import group_seed
+from homeadv.nulldist import rank_sum_null, signed_rank_null, tie_structure, two_sided_pvalue
+
+
+N_PERMUTATIONS = 100_000
+TOLERANCE = 0.002
+SEED = 2024
+BATCH = 2000
+
+
+def permutation_workers():
+    """Nombre de processus de calcul : `HOMEADV_PERMUTATION_WORKERS`, sinon un par cœur."""
+    return int(os.environ.get("HOMEADV_PERMUTATION_WORKERS") or os.cpu_count() or 1)
+
+
+def _sign_flips(rng, n, size):
+    """Matrice (size, n) de signes aléatoires : vrai = différence positive."""
+    bits = rng.integers(0, 256, size=(size, (n + 7) // 8), dtype=np.uint8)
+    return np.unpackbits(bits, axis=1, count=n).astype(bool)
+
+
+def _subsets(rng, n, k, size):
+    """Matrice (size, k) d'indices : un sous-ensemble aléatoire de k parmi n par ligne."""
+    return rng.random((size, n)).argpartition(k - 1, axis=1)[:, :k] if k < n else np.tile(np.arange(n), (size, 1))
+
+
+def _monte_carlo_pvalue(observed, null_statistics, n_permutations, tolerance):
+    """
+    P-value bilatérale estimée sur les statistiques doublées `null_statistics`
+    (un lot de tirages à la fois), comme `two_sided_pvalue` : deux fois la plus
+    petite des parts de tirages au plus ou au moins égaux à `observed`.
+    Retourne (p-value, tirages).
+    """
+    lower = upper = done = 0
+    for batch in null_statistics:
+        lower += np.count_nonzero(batch <= observed)
+        upper += np.count_nonzero(batch >= observed)
+        done += len(batch)
+        tail = (min(lower, upper) + 1) / (done + 1)
+        if done >= n_permutations or 2 * np.sqrt(tail * (1 - tail) / done) <= tolerance:
+            break
+    return min(2 * tail, 1.0), done
+
+
+def _sign_flip_group(differences, seed, n_permutations, tolerance):
+    d = np.asarray(differences, dtype=np.float64)
+    d = d[d != 0]
+    if len(d) == 0:
+        return np.nan, np.nan, 0
+    # Rangs moyens doublés : entiers, les sommes se comparent exactement
+    doubled = 2 * rankdata(np.abs(d))
+    observed = doubled[d > 0].sum()
+    if len(d) < 63 and 2 ** len(d) <= n_permutations:
+        ties = tie_structure(np.unique(np.abs(d), return_counts=True)[1])
+        return observed / 2, two_sided_pvalue(signed_rank_null(ties), observed), 2 ** len(d)
+    rng = np.random.default_rng(seed)
+    null_statistics = (_sign_flips(rng, len(d), BATCH) @ doubled for _ in itertools.count())
+    pvalue, done = _monte_carlo_pvalue(observed, null_statistics, n_permutations, tolerance)
+    return observed / 2, pvalue, done
+
+
+def _label_permutation_group(samples, seed, n_permutations, tolerance):
+    x, y = (np.asarray(sample, dtype=np.float64) for sample in samples)
+    if len(x) == 0 or len(y) == 0:
+        return np.nan, np.nan, 0
+    pooled = np.concatenate([x, y])
+    doubled = 2 * rankdata(pooled)
+    n, k = len(pooled), len(x)
+    # 2 U de la première saison, comme `mannwhitneyu`
+    offset = k * (k + 1)
+    observed = doubled[:k].sum() - offset
+    if comb(n, k) <= n_permutations:
+        pmf = rank_sum_null(k, tie_structure(np.unique(pooled, return_counts=True)[1]))
+        if pmf is not None:
+            return observed / 2, two_sided_pvalue(pmf, observed), comb(n, k)
+    rng = np.random.default_rng(seed)
+    null_statistics = (doubled[_subsets(rng, n, k, BATCH)].sum(axis=1) - offset for _ in itertools.count())
+    pvalue, done = _monte_carlo_pvalue(observed, null_statistics, n_permutations, tolerance)
+    return observed / 2, pvalue, done
+
+
+def _run_shard(shard, test, seed, n_permutations, tolerance):
+    return [test(data, group_seed(seed, key), n_permutations, tolerance) for key, data in shard]
+
+
+def _run(test, groups, n_permutations, tolerance, seed, workers):
+    """Applique `test` à chaque groupe ({clé: données}) ; retourne (statistics, pvalues, permutations)."""
+    items = list(groups.items())
+    workers = min(workers or permutation_workers(), len(items))
+    run = partial(_run_shard, test=test, seed=seed, n_permutations=n_permutations, tolerance=tolerance)
+    if workers <= 1:
+        results = run(items)
+    else:
+        # Lots entrelacés : les groupes voisins (même ligue) ont des tailles proches
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as executor:
+            done = list(executor.map(run, [items[k::workers] for k in range(workers)]))
+        results = [None] * len(items)
+        for k, shard_results in enumerate(done):
+            results[k::workers] = shard_results
+    if not results:
+        return np.array([]), np.array([]), np.array([], dtype=np.int64)
+    statistics, pvalues, permutations = zip(*results)
+    return np.array(statistics, dtype=np.float64), np.array(pvalues, dtype=np.float64), np.array(permutations)
+
+
+def sign_flip_test(differences, n_permutations=N_PERMUTATIONS, tolerance=TOLERANCE, seed=SEED, workers=None):
+    """
+    Test de permutation des signes (Wilcoxon apparié bilatéral, différences
+    nulles exclues) pour chaque groupe de `differences` ({clé: différences}).
+    Retourne (statistics, pvalues, permutations) dans l'ordre des clés : la
+    somme des rangs positifs R+, la p-value et le nombre de tirages utilisés
+    (toutes les permutations si la p-value est exacte).
+    """
+    return _run(_sign_flip_group, differences, n_permutations, tolerance, seed, workers)
+
+
+def label_permutation_test(samples, n_permutations=N_PERMUTATIONS, tolerance=TOLERANCE, seed=SEED, workers=None):
+    """
+    Test de permutation des étiquettes (Mann-Whitney bilatéral) pour chaque
+    couple d'échantillons de `samples` ({clé: (x, y)}). Retourne (statistics,
+    pvalues, permutations) dans l'ordre des clés : la statistique U de x, la
+    p-value et le nombre de tirages utilisés (toutes les permutations si la
+    p-value est exacte).
+    """
+    return _run(_label_permutation_group, samples, n_permutations, tolerance, seed, workers)
+
+
+def main(argv=None):
+    """Compare les p-values de permutation à celles des tests des scripts, sur les matchs Understat."""
+    import asyncio
+    from homeadv.fixtures import load_fixture_table
+    from homeadv.mannwhitney import mann_whitney_matrix
+    from homeadv.wilcoxon import paired_wilcoxon
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--permutations", type=int, default=N_PERMUTATIONS, help="tirages maximum par groupe")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="erreur type visée des p-values")
+    parser.add_argument("--workers", type=int, default=None, help="processus de calcul")
+    args = parser.parse_args(argv)
+    options = {"n_permutations": args.permutations, "tolerance": args.tolerance, "workers": args.workers}
+
+    leagues = ["Ligue_1", "La_liga", "EPL", "Bundesliga", "Serie_A", "RFPL"]
+    seasons = list(range(2014, 2024))
+    table = asyncio.run(load_fixture_table(leagues, seasons, skip_errors=True))
+    samples = table.home_away_arrays()
+
+    # Wilcoxon domicile / extérieur de chaque ligue, saison et mesure
+    metrics = [("points_home", "points_away"), ("xpts_home", "xpts_away"), ("xg_home", "xg_away")]
+    pairs = {(key, home): (group[home], group[away]) for key, group in samples.items() for home, away in metrics}
+    _, asymptotic = paired_wilcoxon(list(pairs.values()))
+    _, permuted, permutations = sign_flip_test({key: np.subtract(*pair) for key, pair in pairs.items()}, **options)
+    _report("Wilcoxon (domicile / extérieur)", asymptotic, permuted, permutations)
+
+    # Mann-Whitney des xPoints à domicile entre deux saisons d'une même ligue
+    couples, asymptotic = {}, []
+    for league in table.leagues():
+        xpoints = [table.values("xpts_home", league, season) for season in table.seasons()]
+        _, p_values = mann_whitney_matrix(xpoints)
+        for (i, first), (j, second) in itertools.combinations(enumerate(table.seasons()), 2):
+            couples[(league, first, second)] = (xpoints[i], xpoints[j])
+            asymptotic.append(p_values[i, j])
+    _, permuted, permutations = label_permutation_test(couples, **options)
+    _report("Mann-Whitney (saisons deux à deux)", np.array(asymptotic), permuted, permutations)
+
+
+def _report(name, asymptotic, permuted, permutations):
+    valid = np.isfinite(asymptotic) & np.isfinite(permuted)
+    disagree = np.count_nonzero((asymptotic[valid] < 0.05) != (permuted[valid] < 0.05))
+    print(f"{name} : {valid.sum()} tests, {int(permutations.sum())} permutations")
+    print(f"  écart maximal des p-values : {np.abs(asymptotic[valid] - permuted[valid]).max(initial=0):.4f}")
+    print(f"  conclusions différentes au seuil de 5 % : {disagree}")
+
+
+if __name__ == "__main__":
+    main()
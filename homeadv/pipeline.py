@@ -0,0 +1,477 @@
+"""
+Exécution de toute l'étude dans un seul processus.
+
+Les scripts restent lançables un par un, mais `entrypoint.sh` lance ce module
+(`python3 -m homeadv.pipeline`), qui enchaîne leurs étapes selon un graphe de
+dépendances :
+
+    fetch -> normalize -> statistics -> figures -> notebook
+
+Les étapes dont les dépendances sont terminées s'exécutent en même temps
+(fil d'exécution par étape). Les matchs Understat ne sont récupérés et
+analysés qu'une fois (`fetch:understat` puis `normalize:fixtures`) et la
+`FixtureTable` est partagée en mémoire avec toutes les analyses ; les
+résultats des statistiques sont passés directement aux figures.
+
+Les figures sont rendues dans le pool de processus de `homeadv.render` :
+les étapes de figures n'y envoient que des tâches sérialisables, et toutes
+les figures d'une exécution se répartissent sur tous les cœurs. Les scripts
+sans fonctions de calcul (diff_points des données scrapées) sont exécutés en
+entier comme tâches de rendu. Le temps de chaque étape est affiché à la fin.
+
+Avec plusieurs étapes en même temps (`--workers`), les bootstraps et tests de
+permutation restent dans le fil de leur étape (`HOMEADV_BOOTSTRAP_WORKERS` et
+`HOMEADV_PERMUTATION_WORKERS` valent 1 sauf s'ils sont déjà définis) : les
+cœurs sont déjà occupés par les étapes et le pool de rendu.
+
+Avec `--incremental`, les étapes et éléments dont l'empreinte (code, paramètres,
+données) n'a pas changé depuis la dernière exécution sont sautés
+(cf. `homeadv.incremental`).
+"""
+import argparse
+import asyncio
+import fnmatch
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from homeadv.cache import ROOT_DIR
+from homeadv.incremental import BuildState, code_digest, file_digest, fingerprint, library_versions, value_digest
+from homeadv.render import RUN_SCRIPT, figure_job, load_script, render_figures
+
+
+KINDS = ["fetch", "normalize", "statistics", "figures", "notebook"]
+SUCCESS = ("ok", "fresh")
+LEAGUES = ["Ligue_1", "La_liga", "EPL", "Bundesliga", "Serie_A", "RFPL"]
+SEASONS = range(2014, 2021)
+SEASONS_2023 = range(2014, 2024)
+WEB_CSV = [
+    "replicabilite/web_scraping/understat_team_stats_home_away.csv",
+    "replicabilite/web_scraping/understat_match_stats.csv",
+]
+CSV_2023 = [
+    "replicabilite/more_seasons/understat_team_stats_home_away_2023.csv",
+    "replicabilite/more_seasons/understat_match_stats_2023.csv",
+]
+
+_state = None
+
+
+class Stage:
+    """
+    Étape du pipeline. `run` reçoit les résultats des étapes `deps`
+    ({nom: résultat}) et peut être une coroutine.
+
+    En mode incrémental, `fingerprint` (si donné) reçoit les mêmes résultats
+    et retourne les parties de l'empreinte de l'étape ; `outputs` sont les
+    fichiers qu'elle produit.
+    """
+
+    def __init__(self, name, deps, run, fingerprint=None, outputs=()):
+        self.name = name
+        self.kind = name.split(":", 1)[0]
+        self.deps = list(deps)
+        self.run = run
+        self.fingerprint = fingerprint
+        self.outputs = list(outputs)
+        if self.kind not in KINDS:
+            raise ValueError(f"Type d'étape inconnu : {name}")
+
+
+def _call(path, function, *args, **kwargs):
+    return getattr(load_script(path), function)(*args, **kwargs)
+
+
+def _render(path, function, *args):
+    """Rend une figure du script `path` dans le pool de rendu."""
+    return render_figures([figure_job(os.path.join(ROOT_DIR, path), function, *args)])[0]
+
+
+def _build_items(items, build):
+    """
+    Produit les éléments d'une étape (ex. les figures par ligue) : `items`
+    associe à chaque élément sa clé, les parties de son empreinte et ses
+    fichiers. `build` reçoit la liste des éléments à produire, c'est-à-dire
+    tous, ou seulement ceux qui ne sont pas à jour en mode incrémental.
+    """
+    stale, digests = [], {}
+    for item, (key, parts, outputs) in items.items():
+        if _state is not None:
+            digests[item] = fingerprint(parts)
+            if _state.is_fresh(key, digests[item], outputs):
+                print(f"[pipeline] {key} à jour")
+                continue
+        stale.append(item)
+    if stale:
+        build(stale)
+    if _state is not None:
+        for item in stale:
+            _state.record(items[item][0], digests[item])
+
+
+def _stylized_tables(name, output_dir):
+    """Figures de `create_stylized_table`, une par ligue, reconstruites ligue par ligue."""
+    def figures(path, results):
+        def build(leagues):
+            render_figures(figure_job(os.path.join(ROOT_DIR, path), "create_stylized_table", {league: results[league]},
+                                      league) for league in leagues)
+            for league in leagues:
+                print(f"Tableau pour {league} enregistré.")
+
+        _build_items({
+            league: (f"figures:{name}/{league}", [code_digest(path), library_versions(), value_digest(results[league])],
+                     [os.path.join(output_dir, f"mann_whitney_{league}.png")])
+            for league in results.keys()
+        }, build)
+    return figures
+
+
+def _graphs_per_league(name, output_dir):
+    """Figures de `create_graphs`, une par ligue, reconstruites ligue par ligue."""
+    def figures(path, df):
+        _build_items({
+            league: (f"figures:{name}/{league}", [code_digest(path), library_versions(),
+                                                  value_digest(df[df["League"] == league].reset_index(drop=True))],
+                     [os.path.join(output_dir, f"evolution_points_{league}.png")])
+            for league in df["League"].unique()
+        }, lambda leagues: _call(path, "create_graphs", df[df["League"].isin(leagues)].copy()))
+    return figures
+
+
+def _season_rows(name, function, seasons):
+    """
+    Calcul d'un tableau à une ligne par ligue et saison par la fonction
+    `function` du script, qui accepte `keys` (les couples à calculer). En mode
+    incrémental, chaque ligne a sa propre empreinte (code, versions, matchs
+    de sa ligue et saison) : seules les lignes des couples nouveaux ou
+    modifiés sont recalculées, les autres sont relues depuis `_state`.
+    """
+    def statistics(path):
+        if _state is None:
+            return _call(path, function)
+        import pandas as pd
+        from homeadv.fixtures import load_fixture_table
+
+        table = asyncio.run(load_fixture_table(LEAGUES, seasons))
+        parts = [code_digest(path), library_versions()]
+        items = {key: (f"statistics:{name}/{key[0]}/{key[1]}", fingerprint(parts + [table.fingerprint([key])]))
+                 for key in table.keys()}
+        stale = [key for key, (item, digest) in items.items()
+                 if not (_state.has_result(item) and _state.is_fresh(item, digest))]
+        print(f"[pipeline] statistics:{name} : {len(items) - len(stale)} lignes à jour, {len(stale)} à calculer")
+        if stale:
+            computed = asyncio.run(_call(path, function, keys=stale))
+            for league, season in stale:
+                item, digest = items[(league, season)]
+                row = computed[(computed["League"] == league) & (computed["Season"] == season)]
+                _state.save_result(item, row.reset_index(drop=True))
+                _state.record(item, digest)
+        return pd.concat([_state.load_result(item) for item, _ in items.values()], ignore_index=True)
+    return statistics
+
+
+def _fixtures_data(seasons):
+    """Parties de l'empreinte d'une analyse des matchs Understat de `LEAGUES` x `seasons`."""
+    keys = [(league, season) for league in LEAGUES for season in seasons]
+    return lambda inputs: [LEAGUES, list(seasons), inputs["normalize:fixtures"].fingerprint(keys)]
+
+
+def _csv_data(csv_paths):
+    """Parties de l'empreinte d'une analyse des CSV `csv_paths`."""
+    return lambda inputs: [file_digest(path) for path in csv_paths]
+
+
+def _script_stage(name, deps, path, csv_paths, outputs, run=None):
+    """
+    Étape de figures d'un script qui lit lui-même les CSV `csv_paths` : son
+    `main` (`run`), ou le script entier rendu comme une tâche.
+    """
+    return Stage(name, deps, lambda inputs: _call(path, run) if run else _render(path, RUN_SCRIPT),
+                 fingerprint=lambda inputs: [code_digest(path), library_versions()] + _csv_data(csv_paths)(inputs),
+                 outputs=outputs)
+
+
+async def _fetch_understat():
+    import aiohttp
+    from homeadv.fetch import open_understat, fetch_league_results
+
+    async with aiohttp.ClientSession() as session:
+        return await fetch_league_results(open_understat(session), LEAGUES, SEASONS_2023, skip_errors=True)
+
+
+def _share_fixtures(fixtures_by_season):
+    from homeadv.fixtures import FixtureTable, share_fixture_table
+
+    table = FixtureTable.from_fixtures(fixtures_by_season)
+    share_fixture_table(table)
+    return table
+
+
+def _load_tables(csv_paths):
+    from homeadv.store import load_table
+
+    # Reconstruit les stockages en colonnes si les CSV ont changé
+    return {path: len(load_table(path, columns=["League"])) for path in csv_paths}
+
+
+def _statistics_and_figures(name, path, statistics, figures, data, outputs=None, deps=("normalize:fixtures",)):
+    """
+    Deux étapes : `statistics:<name>` calcule, `figures:<name>` dessine son
+    résultat. `data(inputs)` donne l'empreinte des données lues par le calcul ;
+    sans `outputs`, les figures gèrent elles-mêmes leurs éléments (`_build_item`).
+    """
+    statistics_name = f"statistics:{name}"
+    figures_fingerprint = None
+    if outputs is not None:
+        figures_fingerprint = lambda inputs: [code_digest(path), library_versions(), value_digest(inputs[statistics_name])]
+    return [
+        Stage(statistics_name, deps, lambda inputs: statistics(path),
+              fingerprint=lambda inputs: [code_digest(path), library_versions()] + data(inputs)),
+        Stage(f"figures:{name}", [statistics_name], lambda inputs: figures(path, inputs[statistics_name]),
+              fingerprint=figures_fingerprint, outputs=outputs or ()),
+    ]
+
+
+def build_stages(skip_scrape=False):
+    """Graphe des étapes de l'étude, dans l'ordre de `entrypoint.sh`."""
+    def scrape(path):
+        if skip_scrape:
+            return lambda inputs: print(f"Scraping ignoré, CSV versionnés utilisés ({path})")
+        return lambda inputs: _call(path, "main", [])
+
+    stages = [
+        Stage("fetch:understat", [], lambda inputs: _fetch_understat()),
+        Stage("fetch:scrape", [], scrape("replicabilite/web_scraping/scrap.py")),
+        # scrap_2023.py reprend les saisons des CSV de scrap.py : il attend qu'ils soient écrits
+        Stage("fetch:scrape_2023", ["fetch:scrape"], scrape("replicabilite/more_seasons/scrap_2023.py")),
+        Stage("normalize:fixtures", ["fetch:understat"], lambda inputs: _share_fixtures(inputs["fetch:understat"])),
+        Stage("normalize:web", ["fetch:scrape"], lambda inputs: _load_tables(WEB_CSV)),
+        Stage("normalize:2023", ["fetch:scrape_2023"], lambda inputs: _load_tables(CSV_2023)),
+    ]
+
+    # Reproduction
+    stages += _statistics_and_figures(
+        "reproduction/diff_points", "reproduction/reproduce_diff_points.py",
+        lambda path: _call(path, "fetch_understat_data", LEAGUES, SEASONS),
+        lambda path, data: _render(path, "create_graph", data), _fixtures_data(SEASONS),
+        outputs=["reproduction/results/diff_points_xpoints.png"])
+    stages += _statistics_and_figures(
+        "reproduction/graphs", "reproduction/graphs_par_ligue.py",
+        lambda path: _call(path, "fetch_understat_data", LEAGUES, SEASONS),
+        _graphs_per_league("reproduction/graphs", "results/evolutions_par_ligue"), _fixtures_data(SEASONS))
+    stages += _statistics_and_figures(
+        "reproduction/wilcoxon", "reproduction/wilcoxon_with_undestat.py",
+        _season_rows("reproduction/wilcoxon", "compute_results", SEASONS),
+        lambda path, df: _render(path, "create_image", df), _fixtures_data(SEASONS),
+        outputs=["reproduction/results/reproduction_wilcoxon.png"])
+    stages += _statistics_and_figures(
+        "reproduction/mannwhitneyu", "reproduction/mannwhitneyu.py",
+        lambda path: _call(path, "calculate_mann_whitney"),
+        _stylized_tables("reproduction/mannwhitneyu", "reproduction/results/tableau_ligues"), _fixtures_data(SEASONS))
+
+    # Réplicabilité : web scraping
+    stages += [
+        _script_stage("figures:web_scraping/diff_points", ["normalize:web"],
+                      "replicabilite/web_scraping/reproduce_diff_points.py", WEB_CSV,
+                      ["replicabilite/web_scraping/results/diff_points_xpoints.png"]),
+        _script_stage("figures:web_scraping/graphs", ["normalize:web"],
+                      "replicabilite/web_scraping/graphs_par_ligue.py", WEB_CSV,
+                      ["replicabilite/web_scraping/results/evolutions_par_ligue"], run="main"),
+    ]
+    stages += _statistics_and_figures(
+        "web_scraping/wilcoxon", "replicabilite/web_scraping/wilcoxon_replic.py",
+        lambda path: _call(path, "compute_results"),
+        lambda path, df: _render(path, "create_image", df), _csv_data(WEB_CSV),
+        outputs=["replicabilite/web_scraping/results/wilcoxon_web.png"], deps=["normalize:web"])
+    stages += _statistics_and_figures(
+        "web_scraping/mannwhitneyu", "replicabilite/web_scraping/mannwhitneyu.py",
+        lambda path: _call(path, "calculate_mann_whitney_from_csv", WEB_CSV[1]),
+        _stylized_tables("web_scraping/mannwhitneyu", "replicabilite/web_scraping/results/tableau_ligues"),
+        _csv_data(WEB_CSV), deps=["normalize:web"])
+
+    # Réplicabilité : nouvelle méthode statistique
+    stages += _statistics_and_figures(
+        "new_statistical_method/anova", "replicabilite/new_statistical_method/repeated_measures_anova.py",
+        _season_rows("new_statistical_method/anova", "compute_results", SEASONS),
+        lambda path, df: _render(path, "create_image", df), _fixtures_data(SEASONS),
+        outputs=["replicabilite/new_statistical_method/results/reproduction_anova.png"])
+
+    # Réplicabilité : plus de saisons
+    stages += [
+        _script_stage("figures:more_seasons/diff_points", ["normalize:2023"],
+                      "replicabilite/more_seasons/reproduce_diff_points_2023.py", CSV_2023,
+                      ["replicabilite/more_seasons/results/diff_points_xpoints.png"]),
+        _script_stage("figures:more_seasons/graphs", ["normalize:2023"],
+                      "replicabilite/more_seasons/graphs_par_ligue_2023.py", CSV_2023,
+                      ["replicabilite/more_seasons/results/evolutions_par_ligue"], run="main"),
+    ]
+    stages += _statistics_and_figures(
+        "more_seasons/wilcoxon", "replicabilite/more_seasons/wilcoxon_with_undestat_2023.py",
+        _season_rows("more_seasons/wilcoxon", "compute_results", SEASONS_2023),
+        lambda path, df: _render(path, "create_image", df), _fixtures_data(SEASONS_2023),
+        outputs=["replicabilite/more_seasons/results/more_seasons_wilcoxon.png"])
+    stages += _statistics_and_figures(
+        "more_seasons/mannwhitneyu", "replicabilite/more_seasons/mannwhitneyu_2023.py",
+        lambda path: _call(path, "calculate_mann_whitney"),
+        _stylized_tables("more_seasons/mannwhitneyu", "replicabilite/more_seasons/results/tableau_ligues"),
+        _fixtures_data(SEASONS_2023))
+
+    # Réplicabilité : dernière version de SciPy
+    stages += _statistics_and_figures(
+        "last_version_python/mannwhitneyu", "replicabilite/last_version_python/mannwhitneyu.py",
+        lambda path: _call(path, "calculate_mann_whitney"),
+        _stylized_tables("last_version_python/mannwhitneyu", "replicabilite/last_version_python/results/tableau_ligues"),
+        _fixtures_data(SEASONS))
+
+    figures = [stage.name for stage in stages if stage.kind == "figures"]
+    stages.append(Stage("notebook:analyse", figures, lambda inputs: subprocess.run(
+        ["jupyter", "nbconvert", "--to", "notebook", "--execute", "--inplace", "analyse.ipynb"], check=True),
+        fingerprint=lambda inputs: [_notebook_sources("analyse.ipynb")], outputs=["analyse.ipynb"]))
+    return stages
+
+
+def _notebook_sources(path):
+    """Empreinte des cellules d'un notebook, sans ses sorties (réécrites à chaque exécution)."""
+    with open(path, encoding="utf-8") as f:
+        cells = json.load(f)["cells"]
+    return fingerprint([(cell["cell_type"], "".join(cell["source"])) for cell in cells])
+
+
+def select_stages(stages, patterns):
+    """Étapes dont le nom correspond à l'un des `patterns` (fnmatch), avec leurs dépendances."""
+    by_name = {stage.name: stage for stage in stages}
+    wanted = set()
+    pending = [stage.name for stage in stages if any(fnmatch.fnmatch(stage.name, p) for p in patterns)]
+    while pending:
+        name = pending.pop()
+        if name not in wanted:
+            wanted.add(name)
+            pending.extend(by_name[name].deps)
+    return [stage for stage in stages if stage.name in wanted]
+
+
+def _run_stage(stage, inputs):
+    start = time.perf_counter()
+    result = stage.run(inputs)
+    if asyncio.iscoroutine(result):
+        # Chaque étape asynchrone a sa propre boucle, dans son fil d'exécution
+        result = asyncio.run(result)
+    return result, time.perf_counter() - start
+
+
+def _execute(stage, inputs):
+    """Exécute une étape ; retourne (résultat, statut, durée)."""
+    if _state is None or stage.fingerprint is None:
+        result, elapsed = _run_stage(stage, inputs)
+        return result, "ok", elapsed
+
+    digest = fingerprint(stage.fingerprint(inputs))
+    cached = stage.kind != "statistics" or _state.has_result(stage.name)
+    if cached and _state.is_fresh(stage.name, digest, stage.outputs):
+        return (_state.load_result(stage.name) if stage.kind == "statistics" else None), "fresh", 0.0
+
+    result, elapsed = _run_stage(stage, inputs)
+    if stage.kind == "statistics":
+        _state.save_result(stage.name, result)
+    _state.record(stage.name, digest)
+    return result, "ok", elapsed
+
+
+def run_pipeline(stages, workers=4, state=None):
+    """
+    Exécute `stages` en respectant leurs dépendances, jusqu'à `workers` à la
+    fois. Une étape en échec fait sauter les étapes qui en dépendent. Avec un
+    `BuildState`, les étapes à jour sont sautées ("fresh").
+    Retourne {nom: (statut, durée en secondes)}.
+    """
+    global _state
+    _state = state
+    known = {stage.name for stage in stages}
+    waiting = list(stages)
+    results, report, running = {}, {}, {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while waiting or running:
+            for stage in list(waiting):
+                deps = [dep for dep in stage.deps if dep in known]
+                if any(report.get(dep, ("ok",))[0] not in SUCCESS for dep in deps):
+                    waiting.remove(stage)
+                    report[stage.name] = ("skipped", 0.0)
+                elif all(dep in results for dep in deps):
+                    waiting.remove(stage)
+                    print(f"[pipeline] {stage.name}")
+                    inputs = {dep: results[dep] for dep in deps}
+                    running[executor.submit(_execute, stage, inputs)] = stage
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    results[stage.name], status, elapsed = future.result()
+                    report[stage.name] = (status, elapsed)
+                except Exception as e:
+                    print(f"[pipeline] Échec de {stage.name} : {e!r}")
+                    report[stage.name] = ("failed", 0.0)
+    if state is not None:
+        state.save()
+    return report
+
+
+def print_report(stages, report, elapsed):
+    """Durée et statut de chaque étape, puis durée totale."""
+    width = max(len(stage.name) for stage in stages)
+    print()
+    print("Étape".ljust(width), "statut ", "durée")
+    for stage in stages:
+        status, seconds = report[stage.name]
+        print(stage.name.ljust(width), status.ljust(7), f"{seconds:7.2f}s")
+    busy = sum(seconds for _, seconds in report.values())
+    print(f"Total : {elapsed:.2f}s ({busy:.2f}s cumulées sur les étapes)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exécute toutes les analyses de l'étude dans un seul processus.")
+    parser.add_argument("--only", nargs="+", metavar="ÉTAPE",
+                        help="N'exécute que ces étapes (motifs fnmatch, ex. 'figures:reproduction/*') et leurs dépendances.")
+    parser.add_argument("--skip-scrape", action="store_true",
+                        help="Ne relance pas le web scraping : les CSV versionnés sont utilisés.")
+    parser.add_argument("--skip-notebook", action="store_true", help="N'exécute pas analyse.ipynb.")
+    parser.add_argument("--workers", type=int, default=4, help="Nombre d'étapes exécutées en même temps.")
+    parser.add_argument("--list", action="store_true", help="Affiche les étapes et leurs dépendances.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Saute les étapes et figures dont le code, les paramètres et les données n'ont pas changé.")
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT_DIR)
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    if args.workers > 1:
+        # Étapes en parallèle à côté du pool de rendu : pas de pool de bootstrap en plus par étape
+        os.environ.setdefault("HOMEADV_BOOTSTRAP_WORKERS", "1")
+        os.environ.setdefault("HOMEADV_PERMUTATION_WORKERS", "1")
+    stages = build_stages(skip_scrape=args.skip_scrape)
+    if args.skip_notebook:
+        stages = [stage for stage in stages if stage.kind != "notebook"]
+    if args.only:
+        stages = select_stages(stages, args.only)
+
+    if args.list:
+        for stage in stages:
+            print(stage.name, "<-", ", ".join(stage.deps) or "-")
+        return 0
+
+    start = time.perf_counter()
+    report = run_pipeline(stages, workers=args.workers, state=BuildState() if args.incremental else None)
+    print_report(stages, report, time.perf_counter() - start)
+    if any(status not in SUCCESS for status, _ in report.values()):
+        return 1
+    print("Tous les scripts ont été exécutés avec succès!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Rendu des figures dans un pool de processus.
+
+Le rendu Matplotlib (backend Agg, tableaux à 300 dpi) occupe un cœur par
+figure et domine la durée d'une exécution une fois les données en cache. Les
+figures par ligue étant indépendantes, elles sont décrites par des tâches
+(`figure_job`) ne contenant que des données sérialisables : le chemin du
+script, le nom de sa fonction de dessin et ses arguments (chaînes, nombres,
+DataFrames). `render_figures` répartit ces tâches sur un pool de processus
+partagé, un par cœur par défaut, dont chaque processus charge une fois le
+backend Agg et les polices.
+
+`HOMEADV_RENDER_WORKERS=1` fait le rendu dans le processus courant.
+"""
+import importlib.util
+import os
+import runpy
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from homeadv.cache import ROOT_DIR
+
+
+RUN_SCRIPT = "__main__"
+
+_modules = {}
+_modules_lock = threading.Lock()
+_inprocess_lock = threading.RLock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def render_workers():
+    """Nombre de processus de rendu : `HOMEADV_RENDER_WORKERS`, sinon un par cœur."""
+    return int(os.environ.get("HOMEADV_RENDER_WORKERS") or os.cpu_count() or 1)
+
+
+def load_script(path):
+    """Importe un script du dépôt (une seule fois par processus) sans exécuter son `main`."""
+    path = os.path.relpath(os.path.join(ROOT_DIR, path), ROOT_DIR)
+    with _modules_lock:
+        if path not in _modules:
+            name = "script_" + os.path.splitext(path)[0].replace(os.sep, "_")
+            spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT_DIR, path))
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            _modules[path] = module
+        return _modules[path]
+
+
+def figure_job(script, function, *args, **kwargs):
+    """
+    Tâche de rendu : appel de `function(*args, **kwargs)` du script `script`.
+    Avec `function=RUN_SCRIPT`, le script est exécuté en entier.
+    """
+    script = os.path.relpath(os.path.abspath(script), ROOT_DIR)
+    return {"script": script, "function": function, "args": args, "kwargs": kwargs}
+
+
+def _render(job):
+    if job["function"] == RUN_SCRIPT:
+        runpy.run_path(os.path.join(ROOT_DIR, job["script"]), run_name="__main__")
+        return None
+    return getattr(load_script(job["script"]), job["function"])(*job["args"], **job["kwargs"])
+
+
+def _init_worker():
+    # Les scripts rendus dans un processus du pool n'en créent pas d'autre
+    os.environ["HOMEADV_RENDER_WORKERS"] = "1"
+    os.environ["HOMEADV_BOOTSTRAP_WORKERS"] = "1"
+    os.environ["HOMEADV_PERMUTATION_WORKERS"] = "1"
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    # Premier rendu de texte : charge le cache des polices avant la première tâche
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    figure.text(0.5, 0.5, "Préchargement")
+    figure.canvas.draw()
+
+
+def _get_executor(workers):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # "spawn" : les processus de rendu ne recopient pas les threads du processus appelant
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"),
+                                            initializer=_init_worker)
+        return _executor
+
+
+def render_figures(jobs, workers=None):
+    """
+    Rend les tâches `jobs` (cf. `figure_job`) en parallèle et retourne leurs
+    résultats dans l'ordre. Une erreur de rendu est relancée dans l'appelant.
+    """
+    jobs = list(jobs)
+    workers = workers or render_workers()
+    if workers <= 1 or not jobs:
+        # pyplot n'est pas sûr entre threads : un seul rendu à la fois dans ce processus
+        with _inprocess_lock:
+            return [_render(job) for job in jobs]
+    return list(_get_executor(workers).map(_render, jobs))
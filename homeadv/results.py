@@ -0,0 +1,61 @@
+"""
+Construction des tableaux de résultats des scripts statistiques.
+
+Les scripts produisent une ligne par ligue et saison. Plutôt que de
+concaténer un DataFrame d'une ligne à chaque itération (copie de tout le
+tableau à chaque ajout, types déduits d'un tableau vide), `ResultsTable`
+remplit des tableaux NumPy préalloués, un par colonne, au type fixé par le
+schéma, et ne construit le DataFrame qu'une fois.
+"""
+import numpy as np
+import pandas as pd
+
+
+KEY_DTYPES = {"League": object, "Season": np.int64}
+
+
+class ResultsTable:
+    """
+    Tableau de résultats au schéma connu.
+
+    `columns` donne l'ordre des colonnes ; `dtypes` le type de certaines
+    d'entre elles. Par défaut, League est une chaîne, Season un entier et
+    toutes les autres colonnes (statistiques, p-values, tailles d'effet)
+    des flottants.
+    """
+
+    def __init__(self, columns, dtypes=None, capacity=64):
+        self.columns = list(columns)
+        self.dtypes = {name: KEY_DTYPES.get(name, np.float64) for name in self.columns}
+        self.dtypes.update(dtypes or {})
+        self._size = 0
+        self._buffers = {name: np.empty(capacity, dtype=self.dtypes[name]) for name in self.columns}
+
+    def __len__(self):
+        return self._size
+
+    def _reserve(self, size):
+        capacity = len(next(iter(self._buffers.values()), ()))
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity)
+        for name, buffer in self._buffers.items():
+            grown = np.empty(capacity, dtype=buffer.dtype)
+            grown[:self._size] = buffer[:self._size]
+            self._buffers[name] = grown
+
+    def append(self, row):
+        """Ajoute une ligne ; `row` associe une valeur à chaque colonne du schéma."""
+        missing = [name for name in self.columns if name not in row]
+        unknown = [name for name in row if name not in self._buffers]
+        if missing or unknown:
+            raise ValueError(f"Ligne incompatible avec le schéma (manquantes : {missing}, inconnues : {unknown})")
+
+        self._reserve(self._size + 1)
+        for name, value in row.items():
+            self._buffers[name][self._size] = value
+        self._size += 1
+
+    def to_frame(self):
+        """DataFrame des lignes ajoutées, dans l'ordre des colonnes du schéma."""
+        return pd.DataFrame({name: self._buffers[name][:self._size].copy() for name in self.columns})
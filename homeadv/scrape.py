@@ -0,0 +1,365 @@
+"""
+Scraping des pages ligue/saison d'Understat.
+
+Chaque page est téléchargée et parsée une seule fois : le même objet
+`teamsData` produit à la fois les statistiques par équipe (domicile /
+extérieur) et le tableau des matchs. Les pages peuvent aussi être lues depuis
+un dossier de pages HTML enregistrées, ce qui permet de travailler hors-ligne.
+
+Les téléchargements passent par une session `requests` partagée (connexions
+keep-alive) et sont répartis sur plusieurs threads, sans dépasser un débit
+maximal vers Understat. Les erreurs réseau et les réponses 429 / 5xx sont
+réessayées avec un délai exponentiel aléatoire, chaque tentative attendant
+son tour auprès du limiteur de débit. Les pages enregistrées d'une saison en cours sont
+revalidées par requête conditionnelle (ETag / If-Modified-Since).
+
+`update_scraped_tables` complète des CSV existants au lieu de tout
+re-scraper : seules les ligues et saisons absentes, ou encore en cours, sont
+téléchargées, puis fusionnées partition par partition (`homeadv.store.upsert_table`).
+"""
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from homeadv.cache import UNDERSTAT_URL, is_season_finished
+from homeadv.extract import extract_teams_data
+from homeadv.store import table_partitions, upsert_table
+
+
+LEAGUE_URL = UNDERSTAT_URL + "/league/{league}/{season}"
+
+DEFAULT_WORKERS = 4
+DEFAULT_RATE = 2.0  # requêtes par seconde vers Understat
+DEFAULT_TIMEOUT = 30  # secondes
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5  # secondes
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout)
+
+TEAM_STATS_COLUMNS = ["League", "Season", "Team", "Location", "M", "W", "D", "L", "G", "GA", "PTS",
+                      "xG", "xGA", "xPTS"]
+MATCH_STATS_COLUMNS = ["League", "Season", "Team", "Home_Away", "Result", "Goals", "Goals_Against",
+                       "xG", "xGA", "xPTS", "Points"]
+
+
+def page_path(html_dir, league, season):
+    """Chemin de la page enregistrée pour une ligue et une saison."""
+    return os.path.join(html_dir, f"{league}_{season}.html")
+
+
+class ThreadRateLimiter:
+    """
+    Espace les départs de requêtes d'au moins `1 / rate` secondes, quel que
+    soit le thread qui les envoie.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class PageFetcher:
+    """
+    Télécharge les pages ligue/saison avec une session HTTP partagée.
+
+    Avec `html_dir`, les pages sont enregistrées avec leurs en-têtes ETag et
+    Last-Modified. Une page enregistrée d'une saison terminée est réutilisée
+    sans requête ; celle d'une saison en cours (ou toutes, avec `refresh`)
+    est revalidée par une requête conditionnelle.
+
+    Les nouvelles tentatives sont faites ici et non par l'adaptateur HTTP :
+    chacune passe par le limiteur de débit.
+    """
+
+    def __init__(self, html_dir=None, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE,
+                 timeout=DEFAULT_TIMEOUT, refresh=False, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+        self.html_dir = html_dir
+        self.workers = workers
+        self.timeout = timeout
+        self.refresh = refresh
+        self.retries = retries
+        self.backoff = backoff
+        self.limiter = ThreadRateLimiter(rate)
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def fetch(self, league, season):
+        """
+        Retourne (html, statut) où statut vaut "saved" (page enregistrée),
+        "304" (page enregistrée revalidée) ou le code HTTP de la réponse.
+        """
+        saved, meta = None, {}
+        if self.html_dir:
+            path = page_path(self.html_dir, league, season)
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    saved = f.read()
+                if os.path.exists(f"{path}.meta.json"):
+                    with open(f"{path}.meta.json") as f:
+                        meta = json.load(f)
+                if is_season_finished(season) and not self.refresh:
+                    return saved, "saved"
+
+        headers = {}
+        if saved is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = self._get(LEAGUE_URL.format(league=league, season=season), headers)
+        if response.status_code == 304 and saved is not None:
+            return saved, "304"
+
+        html = response.text
+        if self.html_dir and response.ok:
+            os.makedirs(self.html_dir, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
+            with open(f"{path}.meta.json", "w") as f:
+                json.dump({
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }, f)
+        return html, str(response.status_code)
+
+    def _get(self, url, headers):
+        """
+        GET limité en débit, réessayé sur erreur réseau ou statut de
+        `RETRY_STATUSES`. Lève `requests.HTTPError` si le statut est encore
+        réessayable après la dernière tentative.
+        """
+        for attempt in range(self.retries + 1):
+            self.limiter.wait()
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except RETRY_EXCEPTIONS:
+                if attempt == self.retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                if attempt == self.retries:
+                    response.raise_for_status()
+            time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    def fetch_all(self, keys):
+        """
+        Télécharge les pages des couples (ligue, saison) de `keys` en parallèle.
+
+        Retourne la liste des pages dans l'ordre de `keys` (None pour une page
+        en erreur) et un rapport de progression / débit.
+        """
+        total = len(keys)
+        report = {"pages": total, "requests": 0, "not_modified": 0, "saved": 0,
+                  "errors": 0, "bytes": 0}
+        lock = threading.Lock()
+        start = time.perf_counter()
+
+        def fetch_one(key):
+            league, season = key
+            page_start = time.perf_counter()
+            try:
+                html, status = self.fetch(league, season)
+            except requests.RequestException as e:
+                html, status = None, f"erreur : {e}"
+
+            with lock:
+                if html is None:
+                    report["errors"] += 1
+                elif status == "saved":
+                    report["saved"] += 1
+                else:
+                    report["requests"] += 1
+                    report["not_modified"] += status == "304"
+                report["bytes"] += len(html or "")
+                done = sum(report[k] for k in ("requests", "saved", "errors"))
+                print(f"[{done}/{total}] {league} {season} : {status} "
+                      f"({len(html or '') / 1024:.0f} Ko, {time.perf_counter() - page_start:.2f}s)")
+            return html
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pages = list(executor.map(fetch_one, keys))
+
+        elapsed = time.perf_counter() - start
+        report["elapsed_s"] = round(elapsed, 3)
+        report["pages_per_s"] = round(total / elapsed, 2) if elapsed else None
+        report["mb_per_s"] = round(report["bytes"] / 1e6 / elapsed, 3) if elapsed else None
+        return pages, report
+
+
+def add_scrape_arguments(parser):
+    """Ajoute les options du moteur de scraping à un `argparse.ArgumentParser`."""
+    parser.add_argument("--html-dir", help="Dossier de pages HTML enregistrées (les pages absentes y sont téléchargées).")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Nombre de téléchargements simultanés.")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Nombre maximal de requêtes par seconde vers Understat.")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Délai maximal d'une requête, en secondes.")
+    parser.add_argument("--refresh", action="store_true", help="Revalider aussi les pages enregistrées des saisons terminées.")
+    parser.add_argument("--report", help="Fichier JSON où écrire le rapport de progression et de débit.")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-scraper toutes les ligues et saisons au lieu de compléter les CSV existants.")
+
+
+def parse_teams_data(html):
+    """Extrait l'objet `teamsData` d'une page, ou None s'il est absent."""
+    return extract_teams_data(html)
+
+
+def team_stats_by_location(data_teams, league, season):
+    """Statistiques cumulées de chaque équipe, à domicile et à l'extérieur."""
+    stats = []
+
+    for team_id, team_data in data_teams.items():
+        team_name = team_data['title']
+        matches = team_data['history']
+
+        # Séparer les matchs "home" et "away"
+        home_matches = [match for match in matches if match['h_a'] == 'h']
+        away_matches = [match for match in matches if match['h_a'] == 'a']
+
+        for location, location_matches in (("home", home_matches), ("away", away_matches)):
+            xG = sum(match.get('xG', 0) for match in location_matches)
+            xGA = sum(match.get('xGA', 0) for match in location_matches)
+            xPTS = sum(match.get('xpts', 0) for match in location_matches)
+            stats.append({
+                "League": league,
+                "Season": season,
+                "Team": team_name,
+                "Location": location,
+                "M": len(location_matches),
+                "W": sum(1 for match in location_matches if match['result'] == 'w'),
+                "D": sum(1 for match in location_matches if match['result'] == 'd'),
+                "L": sum(1 for match in location_matches if match['result'] == 'l'),
+                "G": sum(match.get('scored', 0) for match in location_matches),
+                "GA": sum(match.get('missed', 0) for match in location_matches),
+                "PTS": sum(match.get('pts', 0) for match in location_matches),
+                "xG": round(xG, 2),
+                "xGA": round(xGA, 2),
+                "xPTS": round(xPTS, 2)
+            })
+
+    return stats
+
+
+def team_stats_by_match(data_teams, league, season):
+    """Une ligne par équipe et par match joué (domicile ou extérieur)."""
+    match_stats = []
+
+    for team_id, team_data in data_teams.items():
+        team_name = team_data['title']
+
+        for match in team_data['history']:
+            match_stats.append({
+                "League": league,
+                "Season": season,
+                "Team": team_name,
+                "Home_Away": match['h_a'],  # 'h' pour domicile, 'a' pour extérieur
+                "Result": match['result'],  # 'w' pour victoire, 'd' pour match nul, 'l' pour défaite
+                "Goals": match.get('scored', 0),
+                "Goals_Against": match.get('missed', 0),
+                "xG": round(match.get('xG', 0), 2),
+                "xGA": round(match.get('xGA', 0), 2),
+                "xPTS": round(match.get('xpts', 0), 2),
+                "Points": match.get('pts', 0)  # 3 pour victoire, 1 pour match nul, 0 pour défaite
+            })
+
+    return match_stats
+
+
+def scrape(leagues, seasons, html_dir=None, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE,
+           timeout=DEFAULT_TIMEOUT, refresh=False, report=None):
+    """
+    Parcourt toutes les ligues et saisons en ne téléchargeant et ne parsant
+    chaque page qu'une fois.
+
+    Retourne (team_stats, match_stats) : les statistiques par équipe et
+    par lieu, et le tableau des matchs. Avec `report`, le rapport de
+    téléchargement est écrit dans ce fichier JSON.
+    """
+    keys = [(league, season) for league in leagues for season in seasons]
+    return scrape_keys(keys, html_dir=html_dir, workers=workers, rate=rate, timeout=timeout,
+                       refresh=refresh, report=report)
+
+
+def scrape_keys(keys, html_dir=None, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE,
+                timeout=DEFAULT_TIMEOUT, refresh=False, report=None):
+    """Comme `scrape`, pour une liste quelconque de couples (ligue, saison)."""
+    fetcher = PageFetcher(html_dir=html_dir, workers=workers, rate=rate, timeout=timeout, refresh=refresh)
+    pages, fetch_report = fetcher.fetch_all(keys)
+    print(f"{fetch_report['pages']} pages en {fetch_report['elapsed_s']}s "
+          f"({fetch_report['requests']} requêtes dont {fetch_report['not_modified']} non modifiées, "
+          f"{fetch_report['saved']} pages enregistrées, {fetch_report['errors']} erreurs)")
+    if report:
+        with open(report, "w") as f:
+            json.dump(fetch_report, f, indent=2)
+
+    all_stats = []
+    all_match_stats = []
+
+    for (league, season), html in zip(keys, pages):
+        print(f"Processing {league} {season}")
+        data_teams = parse_teams_data(html) if html is not None else None
+        if data_teams is None:
+            print(f"Data not found for {league} {season}")
+            continue
+
+        all_stats.extend(team_stats_by_location(data_teams, league, season))
+        all_match_stats.extend(team_stats_by_match(data_teams, league, season))
+
+    return (pd.DataFrame(all_stats, columns=TEAM_STATS_COLUMNS),
+            pd.DataFrame(all_match_stats, columns=MATCH_STATS_COLUMNS))
+
+
+def update_scraped_tables(leagues, seasons, team_csv, match_csv, seed_team_csv=None, seed_match_csv=None,
+                          **options):
+    """
+    Complète les CSV `team_csv` et `match_csv` pour les ligues et saisons
+    demandées, en ne téléchargeant que les pages des couples (ligue, saison)
+    absents de l'un des deux tableaux (ou de leurs `seed_*`, tableaux déjà
+    scrapés aux mêmes colonnes) et ceux des saisons en cours. Les saisons
+    terminées déjà présentes ne sont pas modifiées. `options` sont celles de
+    `scrape`.
+
+    Retourne (team_stats, match_stats) fusionnés.
+    """
+    keys = [(league, int(season)) for league in leagues for season in seasons]
+    tables = ((team_csv, seed_team_csv, TEAM_STATS_COLUMNS), (match_csv, seed_match_csv, MATCH_STATS_COLUMNS))
+
+    # Couples à (re)scraper pour chaque tableau : absents, ou d'une saison en cours
+    needed = []
+    for csv_path, seed_csv, columns in tables:
+        present = table_partitions(csv_path, columns)
+        if seed_csv:
+            present |= table_partitions(seed_csv, columns)
+        needed.append({key for key in keys if key not in present or not is_season_finished(key[1])})
+
+    missing = [key for key in keys if key in needed[0] | needed[1]]
+    print(f"{len(keys) - len(missing)} ligues/saisons déjà scrapées, {len(missing)} à télécharger")
+    scraped = scrape_keys(missing, **options)
+
+    merged = []
+    for (csv_path, seed_csv, _), stats, wanted in zip(tables, scraped, needed):
+        # Un tableau ne reçoit que ses propres couples manquants : ses saisons terminées restent intactes
+        stats = stats.loc[[(league, int(season)) in wanted for league, season in zip(stats["League"], stats["Season"])]]
+        merged.append(upsert_table(stats, csv_path, seeds=[seed_csv] if seed_csv else [], order=keys))
+    return tuple(merged)
@@ -0,0 +1,352 @@
+"""
+Stockage en colonnes des tableaux Understat issus du scraping.
+
+Les CSV restent la référence versionnée, mais les scripts les lisent à travers
+un stockage en colonnes construit à côté de chaque CSV (`<nom>.store/`) :
+un fichier `.npy` par colonne, dont les lignes sont triées par partition
+League / Season / lieu (Home_Away ou Location) ; le manifeste donne les
+bornes de chaque partition. Les colonnes texte sont stockées en codes
+catégoriels, les entiers et les valeurs à deux décimales (xG, xPTS...) en
+entiers compacts. Une lecture ne charge que les fichiers des colonnes
+demandées, et seulement les plages de lignes des partitions retenues par les
+filtres (fichiers ouverts en `mmap`).
+
+Chaque écriture produit une nouvelle version des fichiers de colonnes, dans
+un sous-dossier du stockage nommé par le manifeste. La nouvelle version est
+mise en place d'abord (remplacement atomique du manifeste), l'ancienne n'est
+supprimée qu'ensuite : une lecture voit toujours un stockage complet, et
+relit le manifeste si sa version disparaît pendant qu'elle la lit.
+
+Le format Parquet demanderait `pyarrow`, qui n'a pas de wheel pour l'image
+Alpine du Dockerfile : ce stockage n'utilise que NumPy.
+"""
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrou entre threads seulement
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+
+STORE_SUFFIX = ".store"
+MANIFEST = "manifest.json"
+ROW_COLUMN = "_row"
+PARTITION_COLUMNS = ["League", "Season"]
+LOCATION_COLUMNS = ["Home_Away", "Location"]
+CATEGORICAL_COLUMNS = ["League", "Team", "Home_Away", "Location", "Result"]
+DECIMAL_SCALE = 100
+VERSION_PREFIX = "version-"
+LOCK = ".lock"
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def store_path(csv_path):
+    """Dossier du stockage en colonnes associé à un CSV."""
+    return os.path.splitext(csv_path)[0] + STORE_SUFFIX
+
+
+def _compact_int_dtype(values):
+    """Plus petit type entier signé contenant toutes les valeurs."""
+    if len(values) == 0:
+        return "int8"
+    low, high = values.min(), values.max()
+    for dtype in ("int8", "int16", "int32"):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return "int64"
+
+
+def _encode_column(series):
+    """Retourne (valeurs stockées, description de la colonne pour le manifeste)."""
+    if series.name in CATEGORICAL_COLUMNS:
+        categorical = pd.Categorical(series)
+        codes = categorical.codes
+        return codes.astype(_compact_int_dtype(codes)), {
+            "kind": "category", "categories": [str(c) for c in categorical.categories]}
+
+    values = series.to_numpy()
+    if np.issubdtype(values.dtype, np.integer):
+        dtype = _compact_int_dtype(values)
+        return values.astype(dtype), {"kind": "int", "dtype": dtype}
+
+    scaled = np.round(values * DECIMAL_SCALE)
+    if np.isfinite(values).all() and (scaled / DECIMAL_SCALE == values).all():
+        scaled = scaled.astype(np.int64)
+        dtype = _compact_int_dtype(scaled)
+        return scaled.astype(dtype), {"kind": "decimal", "scale": DECIMAL_SCALE, "dtype": dtype}
+    return values.astype(np.float64), {"kind": "float", "dtype": "float64"}
+
+
+def _decode_column(values, spec):
+    if spec["kind"] == "category":
+        return pd.Categorical.from_codes(values, categories=spec["categories"])
+    if spec["kind"] == "decimal":
+        return values / spec["scale"]
+    return values
+
+
+@contextmanager
+def _store_lock(path):
+    """Verrou exclusif sur le stockage `path`, entre threads et entre processus."""
+    with _locks_lock:
+        lock = _locks.setdefault(os.path.abspath(path), threading.Lock())
+    with lock, open(os.path.join(path, LOCK), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def _install_version(path, version_path, manifest):
+    """
+    Met en place la version `version_path` du stockage `path` décrite par
+    `manifest`, puis supprime les versions précédentes.
+    """
+    with _store_lock(path):
+        version = os.path.basename(version_path)[:-len(".tmp")]
+        os.rename(version_path, os.path.join(path, version))
+        manifest = dict(manifest, version=version)
+        manifest_path = os.path.join(path, f"{MANIFEST}.{version}.tmp")
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(manifest_path, os.path.join(path, MANIFEST))
+
+        # Les versions précédentes (et les colonnes d'un stockage sans version) ne sont plus lues
+        for name in os.listdir(path):
+            if name.startswith(VERSION_PREFIX) and not name.endswith(".tmp") and name != version:
+                shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+            elif name.endswith(".npy"):
+                os.remove(os.path.join(path, name))
+
+
+def write_store(df, path, source=None):
+    """
+    Écrit `df` dans le stockage en colonnes `path`, partitionné par
+    League / Season et par lieu si la colonne existe.
+    """
+    location = next((c for c in LOCATION_COLUMNS if c in df.columns), None)
+    partition_by = PARTITION_COLUMNS + ([location] if location else [])
+
+    df = df.reset_index(drop=True)
+    groups = df.groupby(partition_by, sort=False).indices
+    order = np.concatenate(list(groups.values())) if groups else np.array([], dtype=np.int64)
+
+    partitions = []
+    start = 0
+    for key, rows in groups.items():
+        key = dict(zip(partition_by, (str(k) if isinstance(k, str) else int(k) for k in key)))
+        partitions.append({"key": key, "start": start, "stop": start + len(rows)})
+        start += len(rows)
+
+    # Version propre à cet appel : deux threads ou processus peuvent écrire le même stockage
+    os.makedirs(path, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(prefix=VERSION_PREFIX, suffix=".tmp", dir=path)
+    os.chmod(tmp_path, 0o755)
+
+    columns = {}
+    for name in df.columns:
+        values, columns[name] = _encode_column(df[name])
+        if name not in partition_by:
+            np.save(os.path.join(tmp_path, f"{name}.npy"), values[order])
+    np.save(os.path.join(tmp_path, f"{ROW_COLUMN}.npy"), order.astype(_compact_int_dtype(np.array([len(df)]))))
+
+    manifest = {
+        "columns": columns,
+        "column_order": list(df.columns),
+        "partition_by": partition_by,
+        "partitions": partitions,
+    }
+    if source:
+        stat = os.stat(source)
+        manifest["source"] = {"mtime": stat.st_mtime, "size": stat.st_size}
+    _install_version(path, tmp_path, manifest)
+
+
+def _partition_column(values, spec):
+    """Reconstruit une colonne de partitionnement à partir de (valeur, nombre de lignes)."""
+    if spec["kind"] == "category":
+        codes = [np.full(rows, spec["categories"].index(value), dtype=np.int16) for value, rows in values]
+        codes = np.concatenate(codes) if codes else np.array([], dtype=np.int16)
+        return pd.Categorical.from_codes(codes, categories=spec["categories"])
+    columns = [np.full(rows, value, dtype=spec["dtype"]) for value, rows in values]
+    return np.concatenate(columns) if columns else np.array([], dtype=spec["dtype"])
+
+
+def _read_manifest(path):
+    try:
+        with open(os.path.join(path, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_up_to_date(manifest, csv_path):
+    if manifest is None or "source" not in manifest:
+        return False
+    stat = os.stat(csv_path)
+    return manifest["source"] == {"mtime": stat.st_mtime, "size": stat.st_size}
+
+
+def _fresh_manifest(csv_path):
+    """Manifeste du stockage de `csv_path`, reconstruit d'abord si le CSV a changé."""
+    path = store_path(csv_path)
+    manifest = _read_manifest(path)
+    if not _is_up_to_date(manifest, csv_path):
+        write_store(pd.read_csv(csv_path), path, source=csv_path)
+        manifest = _read_manifest(path)
+    return manifest
+
+
+def _matches(value, wanted):
+    if isinstance(wanted, (list, tuple, set, range)):
+        return value in {str(w) if isinstance(value, str) else int(w) for w in wanted}
+    return value == (str(wanted) if isinstance(value, str) else int(wanted))
+
+
+def load_table(csv_path, columns=None, filters=None):
+    """
+    Charge le tableau `csv_path` depuis son stockage en colonnes, reconstruit
+    si le CSV a changé depuis.
+
+    `columns` limite les colonnes lues. `filters` associe à une colonne une
+    valeur ou une liste de valeurs acceptées ; les filtres sur League, Season
+    et le lieu ne lisent que les partitions concernées.
+    Les lignes gardent l'ordre du CSV.
+    """
+    try:
+        return _load(csv_path, _fresh_manifest(csv_path), columns, filters)
+    except FileNotFoundError:
+        # Version supprimée par une écriture pendant la lecture : la suivante est déjà en place
+        return _load(csv_path, _fresh_manifest(csv_path), columns, filters)
+
+
+def _load(csv_path, manifest, columns, filters):
+    # Stockage écrit avant les versions : colonnes à la racine
+    path = os.path.join(store_path(csv_path), manifest.get("version", ""))
+    filters = filters or {}
+    partition_by = manifest["partition_by"]
+    wanted = list(columns) if columns is not None else manifest["column_order"]
+    post_filters = {name: value for name, value in filters.items() if name not in partition_by}
+    stored = [name for name in dict.fromkeys(wanted + list(post_filters)) if name not in partition_by]
+
+    # Plages de lignes des partitions retenues, fusionnées quand elles se suivent
+    ranges = []
+    keys = {name: [] for name in partition_by}
+    for partition in manifest["partitions"]:
+        key = partition["key"]
+        if not all(_matches(key[name], value) for name, value in filters.items() if name in partition_by):
+            continue
+        if ranges and ranges[-1][1] == partition["start"]:
+            ranges[-1][1] = partition["stop"]
+        else:
+            ranges.append([partition["start"], partition["stop"]])
+        for name in partition_by:
+            keys[name].append((key[name], partition["stop"] - partition["start"]))
+
+    parts = {}
+    for name in stored + [ROW_COLUMN]:
+        column = np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+        parts[name] = [column[start:stop] for start, stop in ranges]
+
+    # Remise des lignes dans l'ordre du CSV
+    rows = np.concatenate(parts[ROW_COLUMN]) if parts[ROW_COLUMN] else np.array([], dtype=np.int32)
+    restore = np.argsort(rows, kind="stable")
+
+    data = {}
+    for name in dict.fromkeys(wanted + list(post_filters)):
+        spec = manifest["columns"][name]
+        if name in partition_by:
+            data[name] = _partition_column(keys[name], spec)[restore]
+        else:
+            values = np.concatenate(parts[name]) if parts[name] else np.array([], dtype=spec.get("dtype", "int8"))
+            data[name] = _decode_column(values[restore], spec)
+    df = pd.DataFrame(data)
+
+    for name, value in post_filters.items():
+        accepted = value if isinstance(value, (list, tuple, set, range)) else [value]
+        df = df[df[name].isin(accepted)]
+    return df[wanted].reset_index(drop=True)
+
+
+def write_table(df, csv_path):
+    """Écrit `df` dans le CSV `csv_path` et met à jour son stockage en colonnes."""
+    df.to_csv(csv_path, index=False)
+    # Le stockage est construit depuis le CSV relu, pour en avoir exactement les types
+    write_store(pd.read_csv(csv_path), store_path(csv_path), source=csv_path)
+
+
+def table_partitions(csv_path, columns=None):
+    """
+    Couples (League, Season) présents dans le CSV `csv_path`, lus dans le
+    manifeste de son stockage. Ensemble vide si le CSV n'existe pas ou si ses
+    colonnes ne sont pas `columns`.
+    """
+    if not os.path.exists(csv_path):
+        return set()
+    manifest = _fresh_manifest(csv_path)
+    if columns is not None and manifest["column_order"] != list(columns):
+        return set()
+    return {(partition["key"]["League"], int(partition["key"]["Season"])) for partition in manifest["partitions"]}
+
+
+def upsert_table(df, csv_path, seeds=(), order=None):
+    """
+    Fusionne `df` dans le CSV `csv_path`, partition League / Season par
+    partition : chaque partition de `df` remplace celle du CSV, les autres
+    restent telles quelles. Les partitions des CSV `seeds` (mêmes colonnes,
+    limitées à `order` s'il est donné) absentes du CSV y sont ajoutées. Un CSV
+    existant aux colonnes différentes est remplacé.
+
+    `order` liste les (League, Season) dans l'ordre voulu des partitions ;
+    les autres suivent dans leur ordre actuel. Le CSV n'est réécrit que si son
+    contenu change : rejouer la même fusion ne modifie rien.
+    Retourne le tableau fusionné.
+    """
+    columns = list(df.columns)
+    # `df` passé par le texte CSV : ses valeurs sont celles du CSV relu, la comparaison finale est exacte
+    df = pd.read_csv(io.StringIO(df.to_csv(index=False)))
+
+    def read(path):
+        frame = pd.read_csv(path) if os.path.exists(path) else None
+        return frame if frame is not None and list(frame.columns) == columns else None
+
+    rank = {key: position for position, key in enumerate(order or [])}
+    seed_frames = [frame for frame in (read(path) for path in seeds) if frame is not None]
+    if order is not None:
+        seed_frames = [frame.loc[[key in rank for key in zip(frame["League"], frame["Season"])]] for frame in seed_frames]
+    existing = read(csv_path)
+    frames = seed_frames + ([existing] if existing is not None else [])
+    frames.append(df.astype({"Season": np.int64}))
+    # Un tableau vide (colonnes `object`) changerait les types des colonnes fusionnées
+    frames = [frame for frame in frames if len(frame)] or frames[-1:]
+
+    # Chaque partition vient de la dernière source qui la contient : seeds, CSV, puis `df`
+    owner = {}
+    for number, frame in enumerate(frames):
+        for key in zip(frame["League"], frame["Season"]):
+            owner[key] = number
+    merged = pd.concat([
+        frame.loc[[owner[key] == number for key in zip(frame["League"], frame["Season"])]]
+        for number, frame in enumerate(frames)
+    ], ignore_index=True)
+
+    keys = list(zip(merged["League"], merged["Season"]))
+    first_seen = {key: position for position, key in reversed(list(enumerate(keys)))}
+    sort_key = [(rank.get(key, len(rank)), first_seen[key]) for key in keys]
+    merged = merged.iloc[sorted(range(len(merged)), key=sort_key.__getitem__)].reset_index(drop=True)
+
+    if existing is not None and existing.equals(merged):
+        return merged
+    write_table(merged, csv_path)
+    return merged
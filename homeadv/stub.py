@@ -0,0 +1,179 @@
+"""
+Serveur HTTP local imitant Understat, pour tester et mesurer sans réseau.
+
+Il sert les données synthétiques de `homeadv.synthetic` pour toute ligue et
+toute saison :
+
+- `/league/<league>/<season>` : la page de ligue (blocs `datesData`,
+  `teamsData`, `playersData`), lue par les scrapers et par `understat` 0.1.12 ;
+- `/getLeagueData/<league>/<season>` : le JSON {"dates", "teams", "players"}
+  lu par les versions suivantes de `understat`.
+
+Chaque réponse est retardée de `latency` secondes (± `jitter`) et une part
+`error_rate` des requêtes reçoit une erreur `error_status` (503 par défaut,
+429 pour imiter une limitation de débit), tirée avec une graine fixe. Les
+réponses portent un ETag : une requête conditionnelle reçoit 304. Les
+compteurs de requêtes (`stats`) sont affichés à l'arrêt.
+
+Les scripts utilisent le serveur avec `HOMEADV_UNDERSTAT_URL` :
+
+    python3 -m homeadv.stub --port 8765 --latency 0.05 --error-rate 0.02 &
+    HOMEADV_UNDERSTAT_URL=http://127.0.0.1:8765 python3 -m homeadv.pipeline --skip-notebook
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from homeadv.synthetic import HOME_ADVANTAGE, SEED, TEAMS, SyntheticUnderstat
+
+
+DEFAULT_PORT = 8765
+BODY_CACHE_SIZE = 64
+MIN_SEASON, MAX_SEASON = 1, 9998
+ENDPOINTS = {"league": "text/html; charset=utf-8", "getLeagueData": "application/json"}
+
+
+class StubServer:
+    """
+    Serveur Understat local, lancé dans un thread. S'utilise comme gestionnaire
+    de contexte : `with StubServer(latency=0.05) as stub: ... stub.url`.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503,
+                 generator=None, seed=SEED):
+        self.generator = generator or SyntheticUnderstat()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        # Les nouvelles tentatives d'une même page ne la régénèrent pas
+        self._body = lru_cache(maxsize=BODY_CACHE_SIZE)(self._render)
+        self.server = ThreadingHTTPServer((host, port), _handler(self))
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _render(self, endpoint, league, season):
+        if endpoint == "league":
+            body = self.generator.league_page(league, season).encode("utf-8")
+        else:
+            body = json.dumps(self.generator.league_data(league, season), separators=(",", ":")).encode("utf-8")
+        return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+    def _draw(self):
+        """(retard, erreur) d'une requête ; tirages partagés entre les threads."""
+        with self._lock:
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+            failed = self._random.random() < self.error_rate
+        return max(delay, 0.0), failed
+
+    def respond(self, path, headers):
+        """Retourne (statut, type, corps, en-têtes) pour la requête GET `path`."""
+        parts = path.split("?")[0].strip("/").split("/")
+        if len(parts) != 3 or parts[0] not in ENDPOINTS or not parts[2].isdigit() \
+                or not MIN_SEASON <= int(parts[2]) <= MAX_SEASON:
+            self._count(404)
+            return 404, "text/plain", b"Not found", {}
+        endpoint, league, season = parts[0], parts[1], int(parts[2])
+
+        delay, failed = self._draw()
+        if delay:
+            time.sleep(delay)
+        if failed:
+            self._count(self.error_status)
+            return self.error_status, "text/plain", b"Synthetic error", {"Retry-After": "1"}
+
+        body, etag = self._body(endpoint, league, season)
+        if headers.get("If-None-Match") == etag:
+            self._count(304)
+            return 304, ENDPOINTS[endpoint], b"", {"ETag": etag}
+        self._count(200, len(body))
+        return 200, ENDPOINTS[endpoint], body, {"ETag": etag}
+
+    def _count(self, status, size=0):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats[status] += 1
+            self.stats["bytes"] += size
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def _handler(stub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, comme Understat
+
+        def do_GET(self):
+            status, content_type, body, headers = stub.respond(self.path, self.headers)
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main(argv=None):
+    """Lance un serveur Understat local servant des ligues et saisons synthétiques."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="retard de chaque réponse (secondes)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="variation uniforme du retard (secondes)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="part des requêtes en erreur")
+    parser.add_argument("--error-status", type=int, default=503, help="code HTTP des erreurs (ex. 429)")
+    parser.add_argument("--teams", type=int, default=TEAMS, help="équipes par ligue")
+    parser.add_argument("--home-advantage", type=float, default=HOME_ADVANTAGE, help="avantage du terrain (log-xG)")
+    parser.add_argument("--closed", type=int, nargs="*", default=[], help="saisons à huis clos (avantage nul)")
+    parser.add_argument("--seed", type=int, default=SEED)
+    args = parser.parse_args(argv)
+
+    generator = SyntheticUnderstat(args.teams, args.home_advantage, {season: 0.0 for season in args.closed}, args.seed)
+    stub = StubServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.error_status,
+                      generator, args.seed)
+    print(f"Understat synthétique sur {stub.url} (HOMEADV_UNDERSTAT_URL={stub.url}), Ctrl+C pour arrêter")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+        print(", ".join(f"{key}: {value}" for key, value in stub.stats.items()))
+
+
+if __name__ == "__main__":
+    main()
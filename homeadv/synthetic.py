@@ -0,0 +1,269 @@
+"""
+Données Understat synthétiques, à n'importe quelle échelle.
+
+`SyntheticUnderstat` produit, pour tout couple (ligue, saison), les données
+aux formats lus par le code :
+
+- les matchs de `get_league_results` (chaînes pour les buts, xG et
+  probabilités du forecast) ;
+- le JSON de `getLeagueData` ({"dates", "teams", "players"}) ;
+- la page de ligue, avec ses blocs `var teamsData = JSON.parse('...')`
+  échappés en `\\xNN` comme sur Understat (scrapers, `understat` 0.1.12).
+
+Chaque ligue a `teams` équipes qui se rencontrent en aller-retour. Les xG
+suivent une loi log-normale autour de la différence de force des équipes,
+décalée de `home_advantage` (en log) en faveur de l'équipe à domicile ; les
+buts suivent une loi de Poisson de moyenne les xG et le forecast est la loi
+de l'issue pour deux lois de Poisson indépendantes. La force d'une équipe
+est corrélée d'une saison à l'autre (`STRENGTH_PERSISTENCE`).
+`season_home_advantage` ({saison: effet}) modifie l'effet de certaines
+saisons, par exemple 0 pour des saisons à huis clos.
+
+Chaque ligue et saison a sa propre graine (`homeadv.bootstrap.group_seed`) :
+une saison est générée seule, à la demande et toujours à l'identique, sans
+générer les autres. Des centaines de ligues (`league_names`) et des
+milliers de saisons ne coûtent que le temps de générer celles qui sont lues.
+`fixture_table` construit directement la `FixtureTable` des moteurs de
+statistiques, sans passer par les dictionnaires.
+
+`homeadv.stub` sert ces données en HTTP.
+"""
+import datetime
+import json
+
+import numpy as np
+
+from homeadv.bootstrap import group_seed
+
+
+LEAGUES = ["Ligue_1", "La_liga", "EPL", "Bundesliga", "Serie_A", "RFPL"]
+TEAMS = 20
+SEED = 2024
+HOME_ADVANTAGE = 0.25  # écart des log-xG domicile - extérieur à force égale
+BASE_XG = 0.15  # log-xG moyen d'un match entre équipes de même force, hors avantage
+STRENGTH_SD = 0.3
+STRENGTH_PERSISTENCE = 0.8  # corrélation de la force d'une équipe entre deux saisons
+XG_NOISE = 0.35
+PLAYERS = 500
+MAX_GOALS = 10
+SEASON_START = (8, 1)
+SEASON_DAYS = 300
+
+
+def league_names(n):
+    """`n` noms de ligue : les six ligues Understat, puis League_7, League_8..."""
+    return LEAGUES[:n] + [f"League_{k + 1}" for k in range(len(LEAGUES), n)]
+
+
+def _escaped(value):
+    # Comme Understat : tout octet UTF-8 hors lettres et chiffres devient \xNN
+    raw = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return "".join(chr(byte) if byte < 128 and chr(byte).isalnum() else f"\\x{byte:02X}" for byte in raw)
+
+
+def _outcome_probabilities(xg_home, xg_away):
+    """Probabilités de victoire et de nul à domicile pour deux lois de Poisson de moyennes les xG."""
+    goals = np.arange(MAX_GOALS + 1)
+    factorials = np.cumprod(np.maximum(goals, 1))
+    p_home = np.exp(-xg_home[:, None]) * xg_home[:, None] ** goals / factorials
+    p_away = np.exp(-xg_away[:, None]) * xg_away[:, None] ** goals / factorials
+    joint = p_home[:, :, None] * p_away[:, None, :]
+    win = np.tril(joint, k=-1).sum(axis=(1, 2))
+    draw = np.trace(joint, axis1=1, axis2=2)
+    total = win + draw + np.triu(joint, k=1).sum(axis=(1, 2))
+    return win / total, draw / total
+
+
+def teams_data(season_fixtures):
+    """`teamsData` d'une page de ligue : l'historique de chaque équipe, match par match."""
+    teams = {}
+    for fixture in season_fixtures:
+        xg = {side: float(fixture["xG"][side]) for side in "ha"}
+        goals = {side: int(fixture["goals"][side]) for side in "ha"}
+        forecast = {key: float(value) for key, value in fixture["forecast"].items()}
+        for side, other in (("h", "a"), ("a", "h")):
+            team = fixture[side]
+            result = "w" if goals[side] > goals[other] else "d" if goals[side] == goals[other] else "l"
+            win = forecast["w"] if side == "h" else forecast["l"]
+            teams.setdefault(team["id"], {"id": team["id"], "title": team["title"], "history": []})
+            teams[team["id"]]["history"].append({
+                "h_a": side, "xG": xg[side], "xGA": xg[other], "npxG": xg[side], "npxGA": xg[other],
+                "ppda": {"att": 300, "def": 30}, "ppda_allowed": {"att": 300, "def": 30},
+                "deep": 6, "deep_allowed": 6, "scored": goals[side], "missed": goals[other],
+                "xpts": round(3 * win + forecast["d"], 4), "result": result, "date": fixture["datetime"],
+                "wins": int(result == "w"), "draws": int(result == "d"), "loses": int(result == "l"),
+                "pts": {"w": 3, "d": 1, "l": 0}[result], "npxGD": xg[side] - xg[other],
+            })
+    return teams
+
+
+class SyntheticUnderstat:
+    """
+    Générateur de ligues et saisons Understat. S'utilise aussi comme client
+    Understat (`get_league_results`), par exemple derrière `CachedUnderstat`.
+    """
+
+    def __init__(self, teams=TEAMS, home_advantage=HOME_ADVANTAGE, season_home_advantage=None, seed=SEED):
+        self.teams = teams
+        self.home_advantage = home_advantage
+        self.season_home_advantage = dict(season_home_advantage or {})
+        self.seed = seed
+
+    def _rng(self, *key):
+        return np.random.default_rng(group_seed(self.seed, key))
+
+    def _strength(self, league, season):
+        """Force de chaque équipe : une part propre à la ligue, une part propre à la saison."""
+        lasting = self._rng(league).normal(0, STRENGTH_SD, self.teams)
+        seasonal = self._rng(league, season, "strength").normal(0, STRENGTH_SD, self.teams)
+        return STRENGTH_PERSISTENCE * lasting + np.sqrt(1 - STRENGTH_PERSISTENCE ** 2) * seasonal
+
+    def season_arrays(self, league, season):
+        """
+        Matchs d'une ligue et saison en colonnes, dans l'ordre chronologique :
+        équipes (indices), buts, xG arrondis à 6 décimales et forecast arrondi
+        à 4 décimales, comme les chaînes Understat.
+        """
+        season = int(season)
+        strength = self._strength(league, season)
+        effect = self.season_home_advantage.get(season, self.home_advantage)
+        rng = self._rng(league, season)
+
+        home, away = np.nonzero(~np.eye(self.teams, dtype=bool))
+        order = rng.permutation(len(home))
+        home, away = home[order], away[order]
+        gap = strength[home] - strength[away]
+        xg_home = np.exp(BASE_XG + effect / 2 + gap + rng.normal(0, XG_NOISE, len(home)))
+        xg_away = np.exp(BASE_XG - effect / 2 - gap + rng.normal(0, XG_NOISE, len(home)))
+        goals_home = np.minimum(rng.poisson(xg_home), np.iinfo(np.int8).max)
+        goals_away = np.minimum(rng.poisson(xg_away), np.iinfo(np.int8).max)
+
+        win, draw = _outcome_probabilities(xg_home, xg_away)
+        win, draw = np.round(win, 4), np.round(draw, 4)
+        return {
+            "team_home": home, "team_away": away,
+            "goals_home": goals_home, "goals_away": goals_away,
+            "xg_home": np.round(xg_home, 6), "xg_away": np.round(xg_away, 6),
+            "forecast_w": win, "forecast_d": draw, "forecast_l": np.round(np.maximum(1 - win - draw, 0), 4),
+        }
+
+    def team_titles(self, league):
+        """Noms des équipes d'une ligue, dans l'ordre de leurs indices."""
+        return [f"{league} {k + 1}" for k in range(self.teams)]
+
+    def fixtures(self, league, season):
+        """Matchs d'une ligue et saison au format de `get_league_results`."""
+        season = int(season)
+        columns = self.season_arrays(league, season)
+        titles = self.team_titles(league)
+        start = datetime.date(season, *SEASON_START)
+        n = len(columns["team_home"])
+        fixtures = []
+        for k in range(n):
+            home, away = columns["team_home"][k], columns["team_away"][k]
+            day = start + datetime.timedelta(days=k * SEASON_DAYS // n)
+            fixtures.append({
+                "id": str(season * 100000 + k),
+                "isResult": True,
+                "h": {"id": str(home), "title": titles[home], "short_title": titles[home][:3].upper()},
+                "a": {"id": str(away), "title": titles[away], "short_title": titles[away][:3].upper()},
+                "goals": {"h": str(columns["goals_home"][k]), "a": str(columns["goals_away"][k])},
+                "xG": {"h": f"{columns['xg_home'][k]:.6f}", "a": f"{columns['xg_away'][k]:.6f}"},
+                "datetime": f"{day.isoformat()} 20:00:00",
+                "forecast": {side: f"{columns[f'forecast_{side}'][k]:.4f}" for side in "wdl"},
+            })
+        return fixtures
+
+    def players_data(self, league, season):
+        """`playersData` d'une page de ligue (quelques champs seulement)."""
+        return [{"id": str(k), "player_name": f"Player {k}", "goals": str(k % 7)} for k in range(PLAYERS)]
+
+    def league_data(self, league, season):
+        """Réponse de `getLeagueData/<league>/<season>` : matchs, équipes et joueurs."""
+        fixtures = self.fixtures(league, season)
+        return {"dates": fixtures, "teams": teams_data(fixtures), "players": self.players_data(league, season)}
+
+    def league_page(self, league, season, filler=200):
+        """Page HTML de ligue embarquant `datesData`, `teamsData` et `playersData`, un script par bloc."""
+        data = self.league_data(league, season)
+        padding = "\n".join(f'<div class="row"><span>{k}</span></div>' for k in range(filler))
+        scripts = "\n".join(f"<script>\n\tvar {name} = JSON.parse('{_escaped(data[key])}');\n</script>"
+                            for name, key in [("datesData", "dates"), ("teamsData", "teams"),
+                                              ("playersData", "players")])
+        return (f"<html><head><title>{league} {season} | Understat</title></head><body>\n"
+                f"{padding}\n{scripts}\n{padding}\n</body></html>")
+
+    async def get_league_results(self, league, season):
+        """Même interface que `understat.Understat.get_league_results`."""
+        return self.fixtures(league, season)
+
+    def fixture_table(self, leagues, seasons):
+        """
+        `FixtureTable` des ligues et saisons demandées, identique à celle
+        obtenue en analysant `fixtures`, construite directement en colonnes.
+        """
+        from homeadv.fixtures import STORED_COLUMNS, FixtureTable
+
+        leagues = list(leagues)
+        keys = [(league, int(season)) for league in leagues for season in seasons]
+        parts, offsets, start = [], {}, 0
+        for league, season in keys:
+            columns = self.season_arrays(league, season)
+            # Codes d'équipe : un bloc de `teams` codes par ligue
+            code = leagues.index(league) * self.teams
+            columns["team_home"] = columns["team_home"] + code
+            columns["team_away"] = columns["team_away"] + code
+            parts.append(columns)
+            offsets[(league, season)] = (start, start + len(columns["team_home"]))
+            start += len(columns["team_home"])
+
+        titles = [title for league in leagues for title in self.team_titles(league)]
+        code_type = np.int16 if len(titles) <= np.iinfo(np.int16).max else np.int32
+        dtypes = {"goals_home": np.int8, "goals_away": np.int8, "team_home": code_type, "team_away": code_type}
+        columns = {
+            name: np.concatenate([part[name] for part in parts] or [np.array([])]).astype(dtypes.get(name, np.float32))
+            for name in STORED_COLUMNS
+        }
+        return FixtureTable(columns, titles, offsets)
+
+
+def fixtures(leagues=LEAGUES, seasons=range(2014, 2024), **options):
+    """Matchs synthétiques {(league, season): fixtures} ; `options` : voir `SyntheticUnderstat`."""
+    generator = SyntheticUnderstat(**options)
+    return {(league, season): generator.fixtures(league, season) for league in leagues for season in seasons}
+
+
+def main(argv=None):
+    """Écrit des pages de ligue ou des matchs synthétiques dans un dossier."""
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("output", help="dossier de sortie")
+    parser.add_argument("--leagues", type=int, default=len(LEAGUES), help="nombre de ligues")
+    parser.add_argument("--seasons", default="2014-2023", help="saisons, ex. 2014-2023")
+    parser.add_argument("--teams", type=int, default=TEAMS, help="équipes par ligue")
+    parser.add_argument("--home-advantage", type=float, default=HOME_ADVANTAGE, help="avantage du terrain (log-xG)")
+    parser.add_argument("--closed", type=int, nargs="*", default=[], help="saisons à huis clos (avantage nul)")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--format", choices=["html", "json"], default="html",
+                        help="pages de ligue (<League>_<Season>.html) ou matchs (<League>_<Season>.json)")
+    args = parser.parse_args(argv)
+
+    first, _, last = args.seasons.partition("-")
+    seasons = range(int(first), int(last or first) + 1)
+    generator = SyntheticUnderstat(args.teams, args.home_advantage, {season: 0.0 for season in args.closed}, args.seed)
+    os.makedirs(args.output, exist_ok=True)
+    for league in league_names(args.leagues):
+        for season in seasons:
+            path = os.path.join(args.output, f"{league}_{season}.{args.format}")
+            with open(path, "w", encoding="utf-8") as f:
+                if args.format == "html":
+                    f.write(generator.league_page(league, season))
+                else:
+                    json.dump(generator.fixtures(league, season), f)
+    print(f"{args.leagues * len(seasons)} saisons écrites dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
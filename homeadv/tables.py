@@ -0,0 +1,191 @@
+"""
+Rendu rapide des tableaux de résultats colorés (p-values, tailles d'effet).
+
+`matplotlib.table.Table` crée un `Cell` (un rectangle et un `Text`) par case,
+puis, à chaque rendu, réduit la taille de police d'un point à la fois en
+remesurant le texte de chaque case jusqu'à ce que tout tienne. Pour le
+tableau Wilcoxon 2023 (61 lignes x 11 colonnes), cela fait des milliers
+d'artistes et de mesures de texte, répétées par `savefig(bbox_inches='tight')`.
+
+`ColorTable` dessine la même grille avec un seul artiste : les fonds et les
+bordures de toutes les cases en une `PolyCollection`, les textes directement
+par le moteur de rendu. Les chiffres ayant tous la même chasse, la mise en
+page n'est calculée qu'une fois par forme de texte ("0.000000" pour toutes
+les p-values). La taille de police commune est celle que choisirait `Table`
+(la plus grande taille entière, au plus `fontsize`, à laquelle chaque texte,
+marge de 10 % de chaque côté comprise, tient dans sa case), mais seules les
+formes les plus larges sont mesurées à plusieurs tailles.
+"""
+import re
+
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.artist import Artist, allow_rasterization
+from matplotlib.collections import PolyCollection
+from matplotlib.font_manager import FontProperties
+from matplotlib.transforms import Bbox
+
+
+FONTSIZE = 10
+PAD = 0.1
+HEADER_COLOR = "gray"
+EDGE_COLOR = "black"
+
+# Textes mesurés exactement pour le choix de la taille de police
+_WIDEST = 8
+_DIGITS = re.compile(r"\d")
+
+
+def format_cells(df, float_format, na_rep=None):
+    """
+    Textes des cases d'un DataFrame (une ligne par ligne de `df`) : les
+    flottants au format `float_format`, les autres valeurs par `str`. Les NaN
+    valent `na_rep` s'il est donné.
+    """
+    text = np.empty(df.shape, dtype=object)
+    for col_idx, (col_name, values) in enumerate(df.items()):
+        if values.dtype.kind == "f":
+            cells = [format(value, float_format) for value in values.to_numpy()]
+            if na_rep is not None:
+                cells = np.where(values.isna().to_numpy(), na_rep, np.array(cells, dtype=object))
+        else:
+            cells = [str(value) for value in values.to_numpy()]
+        text[:, col_idx] = cells
+    return text
+
+
+class ColorTable(Artist):
+    """
+    Grille de cases de même taille couvrant les axes : `text` et `colors`
+    sont des tableaux 2D (ligne 0 en haut) ; une case dont le texte est None
+    n'est pas dessinée.
+    """
+
+    def __init__(self, ax, text, colors, fontsize=FONTSIZE, edgecolor=EDGE_COLOR):
+        super().__init__()
+        self.set_figure(ax.figure)
+        self.axes = ax
+        self.set_transform(ax.transAxes)
+        self.set_clip_on(False)
+
+        self._text = np.asarray(text, dtype=object)
+        self._fontsize = fontsize
+        n_rows, n_cols = self._text.shape
+        rows, cols = np.nonzero(self._text != None)  # noqa: E711 (comparaison élément par élément)
+        self._rows, self._cols = rows, cols
+        self._shape = (n_rows, n_cols)
+        self._fitted = {}
+
+        # Coins de chaque case en coordonnées des axes, la ligne 0 en haut
+        x0, x1 = cols / n_cols, (cols + 1) / n_cols
+        y0, y1 = 1 - (rows + 1) / n_rows, 1 - rows / n_rows
+        verts = np.stack([np.column_stack(corner) for corner in ((x0, y0), (x1, y0), (x1, y1), (x0, y1))], axis=1)
+        self._cells = PolyCollection(verts, closed=True, transform=ax.transAxes,
+                                     facecolors=list(np.asarray(colors, dtype=object)[rows, cols]),
+                                     edgecolors=edgecolor, linewidths=rcParams["patch.linewidth"])
+        self._cells.set_figure(self.figure)
+        self._cells.set_clip_on(False)
+
+    def get_window_extent(self, renderer=None):
+        return Bbox.unit().transformed(self.axes.transAxes)
+
+    def fit_fontsize(self, renderer):
+        """
+        Taille de police commune des cases : comme `Table`, la plus grande
+        taille entière au plus `fontsize` à laquelle chaque texte tient dans
+        sa case (ou 1).
+        """
+        available = self.get_window_extent(renderer).width / self._shape[1]
+        if (renderer.dpi, available) in self._fitted:
+            return self._fitted[renderer.dpi, available]
+        measured = {}
+
+        def required(text, size):
+            if (text, size) not in measured:
+                width, _, _ = renderer.get_text_width_height_descent(text, FontProperties(size=size), ismath=False)
+                measured[text, size] = width * (1 + 2 * PAD)
+            return measured[text, size]
+
+        # Un texte mesuré par forme
+        shapes = {}
+        for text in self._text[self._rows, self._cols]:
+            if text:
+                shapes.setdefault(_DIGITS.sub("0", text), text)
+
+        # La largeur d'un texte croît avec la taille de police : seuls les plus
+        # larges à la taille de départ peuvent imposer la taille commune
+        texts = sorted(shapes.values(), key=lambda text: required(text, self._fontsize), reverse=True)
+        fontsize = self._fontsize
+        for text in texts[:_WIDEST]:
+            size = fontsize
+            while size > 1 and required(text, size) > available:
+                # Estimation proportionnelle, puis ajustement point par point
+                estimate = int(size * available / required(text, size))
+                size = max(1, min(size - 1, estimate + 1))
+            while size < fontsize and required(text, size + 1) <= available:
+                size += 1
+            fontsize = min(fontsize, size)
+        self._fitted[renderer.dpi, available] = fontsize
+        return fontsize
+
+    @allow_rasterization
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        renderer.open_group("table", gid=self.get_gid())
+        self._cells.draw(renderer)
+
+        # Textes centrés dans leur case, placés comme par `Text` : la hauteur
+        # d'une ligne est au moins celle de "lp" ; les textes de même forme
+        # ont la même mise en page, calculée une fois
+        prop = FontProperties(size=self.fit_fontsize(renderer))
+        _, lp_height, lp_descent = renderer.get_text_width_height_descent("lp", prop, ismath=False)
+        n_rows, n_cols = self._shape
+        centers = self.axes.transAxes.transform(np.column_stack([(self._cols + 0.5) / n_cols,
+                                                                 1 - (self._rows + 0.5) / n_rows]))
+        canvas_height = renderer.get_canvas_width_height()[1]
+        gc = renderer.new_gc()
+        gc.set_foreground(rcParams["text.color"])
+        gc.set_antialiased(rcParams["text.antialiased"])
+        layouts = {}
+        for text, (x, y) in zip(self._text[self._rows, self._cols], centers):
+            if not text:
+                continue
+            shape = _DIGITS.sub("0", text)
+            if shape not in layouts:
+                width, height, descent = renderer.get_text_width_height_descent(text, prop, ismath=False)
+                height, descent = max(height, lp_height), max(descent, lp_descent)
+                layouts[shape] = (-width / 2, descent - height / 2)
+            dx, dy = layouts[shape]
+            # Origine de la ligne de base, en coordonnées du canevas (y vers le bas)
+            renderer.draw_text(gc, x + dx, canvas_height - (y + dy), text, prop, 0)
+        gc.restore()
+
+        renderer.close_group("table")
+        self.stale = False
+
+
+def draw_table(ax, text, colors, col_labels, row_labels=None, fontsize=FONTSIZE,
+               header_color=HEADER_COLOR, edgecolor=EDGE_COLOR):
+    """
+    Dessine sur `ax` un tableau de résultats : une ligne d'en-tête
+    `col_labels`, et une colonne d'en-tête `row_labels` si elle est donnée
+    (sans case de coin), au-dessus des cases `text` colorées par `colors`.
+    Le tableau occupe toute la surface des axes.
+    """
+    text = np.asarray(text, dtype=object)
+    colors = np.asarray(colors, dtype=object)
+    n_rows, n_cols = text.shape
+    offset = 0 if row_labels is None else 1
+
+    grid_text = np.full((n_rows + 1, n_cols + offset), None, dtype=object)
+    grid_colors = np.full(grid_text.shape, header_color, dtype=object)
+    grid_text[0, offset:] = [str(label) for label in col_labels]
+    if row_labels is not None:
+        grid_text[1:, 0] = [str(label) for label in row_labels]
+    grid_text[1:, offset:] = text
+    grid_colors[1:, offset:] = colors
+
+    table = ColorTable(ax, grid_text, grid_colors, fontsize=fontsize, edgecolor=edgecolor)
+    ax.add_artist(table)
+    return table
@@ -0,0 +1,121 @@
+"""
+Test des rangs signés de Wilcoxon pour plusieurs échantillons appariés à la fois.
+
+Reproduit `scipy.stats.wilcoxon(x, y)` avec ses options par défaut dans la
+version fixée par `requirements.txt` (SciPy 1.14) : test bilatéral,
+différences nulles exclues (`zero_method="wilcox"`), pas de correction de
+continuité, loi exacte si l'échantillon compte au plus 50 différences et
+aucune nulle, approximation normale corrigée des ex-aequo sinon.
+
+Toutes les différences sont concaténées et classées ensemble : le tri, les
+rangs moyens des ex-aequo et les sommes par groupe sont des opérations
+vectorisées sur le tableau complet, quel que soit le nombre de groupes.
+
+Avec `method="exact"`, toutes les p-values viennent de la loi exacte de R+
+sachant les ex-aequo de chaque groupe (`homeadv.nulldist`).
+"""
+import numpy as np
+from scipy.special import ndtr
+
+from homeadv.nulldist import rank_test_method, signed_rank_null, tie_structure, two_sided_pvalue
+
+
+EXACT_MAX_SIZE = 50
+
+
+def signed_rank_distribution(n):
+    """
+    Loi exacte de la somme des rangs positifs R+ pour n différences sans
+    ex-aequo : retourne (cdf, sf) indexées par la valeur de R+.
+    """
+    # Rangs entiers : 2 R+ est toujours pair
+    pmf = signed_rank_null(((1, n),) if n else ())[::2]
+    cdf = np.cumsum(pmf)
+    sf = np.cumsum(pmf[::-1])[::-1]
+    return cdf, sf
+
+
+def _exact_pvalue(r_plus, n):
+    cdf, sf = signed_rank_distribution(int(n))
+    # Statistique non entière (ex-aequo) : arrondi conservateur, comme SciPy
+    p = 2 * min(sf[int(np.floor(r_plus))], cdf[int(np.ceil(r_plus))])
+    return min(max(p, 0.0), 1.0)
+
+
+def wilcoxon_batch(differences, method=None):
+    """
+    Test de Wilcoxon bilatéral pour chaque tableau de différences appariées
+    de `differences` (tableaux de longueurs quelconques). `method` vaut
+    "auto" (comme SciPy 1.14) ou "exact" ; par défaut, `rank_test_method()`.
+
+    Retourne (statistics, pvalues) : min(R+, R-) et la p-value de chaque
+    groupe, NaN pour un groupe sans différence non nulle.
+    """
+    differences = [np.asarray(d, dtype=np.float64) for d in differences]
+    n_groups = len(differences)
+    sizes = np.array([len(d) for d in differences], dtype=np.int64)
+    if n_groups == 0:
+        return np.array([]), np.array([])
+
+    d = np.concatenate(differences)
+    group = np.repeat(np.arange(n_groups), sizes)
+    n_zero = np.bincount(group, weights=(d == 0), minlength=n_groups)
+
+    # Les différences nulles sont exclues
+    nonzero = d != 0
+    d, group = d[nonzero], group[nonzero]
+    count = np.bincount(group, minlength=n_groups).astype(np.float64)
+
+    # Tri par groupe puis par valeur absolue : rang de chaque différence dans son groupe
+    absolute = np.abs(d)
+    order = np.lexsort((absolute, group))
+    absolute, group, positive = absolute[order], group[order], d[order] > 0
+    starts = np.concatenate([[0], np.cumsum(count)[:-1]]).astype(np.int64)
+    position = np.arange(len(d)) - starts[group] + 1
+
+    # Ex-aequo : suites de valeurs égales dans un même groupe, rang moyen de la suite
+    new_run = np.ones(len(d), dtype=bool)
+    new_run[1:] = (group[1:] != group[:-1]) | (absolute[1:] != absolute[:-1])
+    run = np.cumsum(new_run) - 1
+    run_first = position[new_run]
+    run_size = np.bincount(run).astype(np.float64)
+    ranks = (run_first + (run_first + run_size - 1)) / 2
+    ranks = ranks[run]
+
+    # Sans aucune différence non nulle, `bincount` retourne des entiers : NaN impossible ensuite
+    r_plus = np.bincount(group, weights=ranks * positive, minlength=n_groups).astype(np.float64)
+    r_minus = np.bincount(group, weights=ranks * ~positive, minlength=n_groups).astype(np.float64)
+    tie_correct = np.bincount(group[new_run], weights=run_size ** 3 - run_size, minlength=n_groups)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mn = count * (count + 1.) * 0.25
+        se = count * (count + 1.) * (2. * count + 1.)
+        se = np.sqrt((se - tie_correct / 2) / 24)
+        z = (r_plus - mn) / se
+        pvalues = 2 * ndtr(-np.abs(z))
+
+    if (method or rank_test_method()) == "exact":
+        # Tailles des suites d'ex-aequo de chaque groupe, dans l'ordre des |différences|
+        run_group = group[new_run]
+        run_starts = np.searchsorted(run_group, np.arange(n_groups + 1))
+        for i in np.flatnonzero(count > 0):
+            ties = tie_structure(run_size[run_starts[i]:run_starts[i + 1]])
+            pvalues[i] = two_sided_pvalue(signed_rank_null(ties), 2 * r_plus[i])
+    else:
+        exact = (sizes <= EXACT_MAX_SIZE) & (n_zero == 0) & (count > 0)
+        for i in np.flatnonzero(exact):
+            pvalues[i] = _exact_pvalue(r_plus[i], count[i])
+
+    statistics = np.minimum(r_plus, r_minus)
+    empty = count == 0
+    statistics[empty] = np.nan
+    pvalues[empty] = np.nan
+    return statistics, pvalues
+
+
+def paired_wilcoxon(pairs, method=None):
+    """
+    Test de Wilcoxon pour chaque couple (x, y) de `pairs`, sur les
+    différences x - y. Retourne (statistics, pvalues).
+    """
+    return wilcoxon_batch([np.subtract(x, y, dtype=np.float64) for x, y in pairs], method=method)
@@ -1,67 +1,44 @@
 import numpy as np
 import pandas as pd
 from scipy.stats import mannwhitneyu
-from understat import Understat
-import aiohttp
+from homeadv.fixtures import load_fixture_table
+from homeadv.render import figure_job, render_figures
+from homeadv.tables import draw_table, format_cells
 import asyncio
 import matplotlib.pyplot as plt
-from matplotlib.table import Table
 import os
 
-async def fetch_xpoints(understat, league, season):
-    """Récupère les xPoints pour une ligue et une saison."""
-    fixtures = await understat.get_league_results(league, season)
-    home_xpts = []
-    
-    for fixture in fixtures:
-        forecast = fixture['forecast']
-        home_xpt = (float(forecast['w']) * 3) + (float(forecast['d']) * 1)
-        home_xpts.append(home_xpt)
-
-    return home_xpts
-
 async def calculate_mann_whitney():
     """Calcule les tests de Mann-Whitney U pour les xPoints entre saisons."""
-    async with aiohttp.ClientSession() as session:
-        understat = Understat(session)
-
-        LEAGUES = ["Ligue_1", "La_liga", "EPL", "Bundesliga", "Serie_A", "RFPL"]
-        SEASONS = list(range(2014, 2021))
-
-        results = {}
-
-        for league in LEAGUES:
-            league_results = {}
-            
-            # Récupérer les xPoints pour chaque saison
-            xpoints_per_season = {}
-            for season in SEASONS:
-                xpoints_per_season[season] = await fetch_xpoints(understat, league, season)
-
-            # Comparer les saisons deux à deux sans doublons
-            for i, season1 in enumerate(SEASONS):
-                league_results[season1] = {}
-                for season2 in SEASONS[i+1:]:  # Comparer chaque saison à toutes celles qui viennent après
-                    stat, p_value = mannwhitneyu(
-                        xpoints_per_season[season1], 
-                        xpoints_per_season[season2]
-                    )
-                    league_results[season1][season2] = p_value  # Ajuster la p-value pour un test one-sided
-                # Remplir la diagonale avec NaN (pas de comparaison pour une saison avec elle-même)
-                for season2 in SEASONS:
-                    if season2 == season1:
-                        league_results[season1][season2] = np.nan
-            
-            # Convertir les résultats en DataFrame et trier explicitement les lignes et colonnes
-            df = pd.DataFrame(league_results)
-            
-            # S'assurer que les saisons sont dans l'ordre correct (2014 à 2020)
-            df = df.sort_index(axis=0, ascending=True)  # Trie les lignes par saison croissante
-            df = df.sort_index(axis=1, ascending=True)  # Trie les colonnes par saison croissante
-
-            results[league] = df
-
-        return results
+    LEAGUES = ["Ligue_1", "La_liga", "EPL", "Bundesliga", "Serie_A", "RFPL"]
+    SEASONS = list(range(2014, 2021))
+    table = await load_fixture_table(LEAGUES, SEASONS)
+
+    results = {}
+
+    for league in LEAGUES:
+        # Récupérer les xPoints pour chaque saison
+        xpoints_per_season = {}
+        for season in SEASONS:
+            xpoints_per_season[season] = table.values("xpts_home", league, season)
+
+        # Comparer chaque saison à celles qui viennent après, avec le `mannwhitneyu` de la
+        # version de SciPy installée (le but de ce dossier) : les saisons suivantes de même
+        # nombre de matchs sont testées en un seul appel vectorisé (axis=1)
+        df = pd.DataFrame(np.nan, index=SEASONS, columns=SEASONS)
+        for i, season1 in enumerate(SEASONS):
+            by_size = {}
+            for season2 in SEASONS[i + 1:]:
+                by_size.setdefault(len(xpoints_per_season[season2]), []).append(season2)
+            for later in by_size.values():
+                stat, p_values = mannwhitneyu(xpoints_per_season[season1][None, :],
+                                              np.stack([xpoints_per_season[season2] for season2 in later]),
+                                              axis=1)
+                df.loc[later, season1] = p_values
+
+        results[league] = df
+
+    return results
 
 def create_stylized_table(results, league):
     # Créer le dossier pour enregistrer les graphiques
@@ -72,43 +49,24 @@ def create_stylized_table(results, league):
     """Crée un tableau croisé stylisé avec les p-values pour une ligue donnée."""
     df = results[league]
 
-    def get_cell_color(val):
-        if val < 0.05:
-            return 'red'
-        return 'white'
+    # Cases rouges : p-value < 0.05 (les NaN restent blancs)
+    colors = np.where(df.to_numpy() < 0.05, 'red', 'white').astype(object)
 
     fig, ax = plt.subplots(figsize=(12, 6))
     ax.axis('off')
-    table = Table(ax, bbox=[0, 0, 1, 1])
-    n_rows, n_cols = df.shape
-
-    # Add headers
-    for (i, col_name) in enumerate(df.columns):
-        table.add_cell(0, i + 1, width=1 / (n_cols + 1), height=0.1, text=col_name, loc='center',
-                       facecolor='gray', edgecolor='black')
-    for (i, row_name) in enumerate(df.index):
-        table.add_cell(i + 1, 0, width=1 / (n_cols + 1), height=0.1, text=row_name, loc='center',
-                       facecolor='gray', edgecolor='black')
-
-    # Add data rows
-    for row_idx, row in enumerate(df.iterrows()):
-        for col_idx, (col_name, value) in enumerate(row[1].items()):
-            color = get_cell_color(value)
-            table.add_cell(row_idx + 1, col_idx + 1, width=1 / (n_cols + 1), height=0.1,
-                           text=f"{value:.6f}" if pd.notna(value) else "", loc='center',
-                           facecolor=color, edgecolor='black')
-
-    ax.add_table(table)
+    draw_table(ax, format_cells(df, ".6f", na_rep=""), colors, df.columns, row_labels=df.index)
     plt.title(f"xPoints_home significance with mann: {league}")
     file_path = os.path.join(output_dir, f"mann_whitney_{league}.png")
-    plt.savefig(file_path, bbox_inches='tight', dpi=300)
+    fig.savefig(file_path, bbox_inches='tight', dpi=300)
     plt.close()
 
 async def main():
     results = await calculate_mann_whitney()
 
+    # Un tableau par ligue, rendus en parallèle
+    render_figures(figure_job(__file__, "create_stylized_table", {league: results[league]}, league)
+                   for league in results.keys())
     for league in results.keys():
-        create_stylized_table(results, league)
         print(f"Tableau pour {league} enregistré.")
 
 if __name__ == "__main__":
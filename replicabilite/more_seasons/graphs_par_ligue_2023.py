@@ -1,52 +1,49 @@
 import os
 import pandas as pd
 import matplotlib.pyplot as plt
+from homeadv.store import load_table
+from homeadv.render import figure_job, render_figures
 
-# Chargement des données CSV
-df = pd.read_csv("./replicabilite/more_seasons/understat_team_stats_home_away_2023.csv")
-
-# Vérifier que les colonnes nécessaires existent
-required_columns = ["League", "Season", "Location", "PTS", "xPTS", "M"]
-if not all(col in df.columns for col in required_columns):
-    raise ValueError(f"Le fichier CSV doit contenir les colonnes suivantes : {required_columns}")
-
-# Créer le dossier pour enregistrer les graphiques
-output_dir = "replicabilite/more_seasons/results/evolutions_par_ligue"
-os.makedirs(output_dir, exist_ok=True)
-
-# Calculer les moyennes par league, season, et home/away
-grouped = df.groupby(["League", "Season", "Location"]).agg(
-    points_avg=("PTS", "sum"),
-    xpoints_avg=("xPTS", "sum"),
-    matchs_count=("M", "sum")
-).reset_index()
-
-# Calcul des points moyens par match
-grouped["points_avg_per_game"] = grouped["points_avg"] / grouped["matchs_count"]
-grouped["xpoints_avg_per_game"] = grouped["xpoints_avg"] / grouped["matchs_count"]
-
-# Séparer les données à domicile et à l'extérieur
-home_data = grouped[grouped["Location"] == "home"].rename(
-    columns={"points_avg_per_game": "points_home", "xpoints_avg_per_game": "xpoints_home"}
-)
-away_data = grouped[grouped["Location"] == "away"].rename(
-    columns={"points_avg_per_game": "points_away", "xpoints_avg_per_game": "xpoints_away"}
-)
-
-# Fusionner les données à domicile et à l'extérieur
-merged = pd.merge(
-    home_data[["League", "Season", "points_home", "xpoints_home"]],
-    away_data[["League", "Season", "points_away", "xpoints_away"]],
-    on=["League", "Season"]
-)
-
-# Créer un graphique pour chaque ligue
-leagues = merged["League"].unique()
-
-# Créer et enregistrer les graphiques
-for league in leagues:
-    league_data = merged[merged["League"] == league]
 
+def load_points_per_game(csv_path):
+    """Points et points attendus moyens par match, à domicile et à l'extérieur, par ligue et saison."""
+    # Chargement des données CSV
+    df = load_table(csv_path)
+
+    # Vérifier que les colonnes nécessaires existent
+    required_columns = ["League", "Season", "Location", "PTS", "xPTS", "M"]
+    if not all(col in df.columns for col in required_columns):
+        raise ValueError(f"Le fichier CSV doit contenir les colonnes suivantes : {required_columns}")
+
+    # Calculer les moyennes par league, season, et home/away
+    grouped = df.groupby(["League", "Season", "Location"], observed=True).agg(
+        points_avg=("PTS", "sum"),
+        xpoints_avg=("xPTS", "sum"),
+        matchs_count=("M", "sum")
+    ).reset_index()
+
+    # Calcul des points moyens par match
+    grouped["points_avg_per_game"] = grouped["points_avg"] / grouped["matchs_count"]
+    grouped["xpoints_avg_per_game"] = grouped["xpoints_avg"] / grouped["matchs_count"]
+
+    # Séparer les données à domicile et à l'extérieur
+    home_data = grouped[grouped["Location"] == "home"].rename(
+        columns={"points_avg_per_game": "points_home", "xpoints_avg_per_game": "xpoints_home"}
+    )
+    away_data = grouped[grouped["Location"] == "away"].rename(
+        columns={"points_avg_per_game": "points_away", "xpoints_avg_per_game": "xpoints_away"}
+    )
+
+    # Fusionner les données à domicile et à l'extérieur
+    return pd.merge(
+        home_data[["League", "Season", "points_home", "xpoints_home"]],
+        away_data[["League", "Season", "points_away", "xpoints_away"]],
+        on=["League", "Season"]
+    )
+
+
+def create_league_graph(league_data, league, output_dir):
+    """Crée et enregistre le graphique d'une ligue."""
     # Créer une nouvelle figure
     plt.figure(figsize=(10, 6))
 
@@ -63,11 +60,28 @@ for league in leagues:
     plt.legend()
     plt.grid(True)
     plt.xticks(league_data["Season"], rotation=45)
-    
+
     # Enregistrer le graphique en tant qu'image PNG dans le dossier
     file_path = os.path.join(output_dir, f"evolution_points_{league}.png")
     plt.tight_layout()
     plt.savefig(file_path)  # Enregistrer le graphique
     plt.close()  # Fermer la figure après l'avoir sauvegardée
 
-print(f"graphs are in the repertory : '{output_dir}'.")
+
+def main():
+    merged = load_points_per_game("./replicabilite/more_seasons/understat_team_stats_home_away_2023.csv")
+
+    # Créer le dossier pour enregistrer les graphiques
+    output_dir = "replicabilite/more_seasons/results/evolutions_par_ligue"
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Créer et enregistrer un graphique pour chaque ligue, en parallèle
+    leagues = merged["League"].unique()
+    render_figures(figure_job(__file__, "create_league_graph", merged[merged["League"] == league], league, output_dir)
+                   for league in leagues)
+
+    print(f"graphs are in the repertory : '{output_dir}'.")
+
+
+if __name__ == "__main__":
+    main()
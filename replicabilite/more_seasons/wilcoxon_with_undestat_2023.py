@@ -1,75 +1,56 @@
 import numpy as np
-import pandas as pd
-from scipy.stats import wilcoxon
-from understat import Understat
-import aiohttp
+from homeadv.fixtures import load_fixture_table
+from homeadv.wilcoxon import paired_wilcoxon
+from homeadv.effect_size import effect_sizes
+from homeadv.bootstrap import STATISTICS, bootstrap_intervals
+from homeadv.results import ResultsTable
+from homeadv.tables import draw_table, format_cells
 import asyncio
 import matplotlib.pyplot as plt
-from matplotlib.table import Table
 import os
 
-def getHomeAwayResultPerMatch(result, home, away, xpts_home, xpts_away, xg_home, xg_away):
+METRICS = [("points_home", "points_away"), ("xpts_home", "xpts_away"), ("xg_home", "xg_away")]
+
+
+def wilcoxon_test(samples):
     """
-    Attribue les points et enregistre les statistiques avancées pour les matchs à domicile et à l'extérieur.
+    Tests de Wilcoxon pour les points, xPTS et xG de toutes les ligues et saisons en un seul appel.
+    `samples` est le résultat de `FixtureTable.home_away_arrays()`.
     """
-    # Points réels
-    if int(result['goals']['h']) > int(result['goals']['a']):
-        home.append(3)
-        away.append(0)
-    elif int(result['goals']['h']) < int(result['goals']['a']):
-        home.append(0)
-        away.append(3)
-    else:
-        home.append(1)
-        away.append(1)
+    pairs = [(group[home], group[away]) for group in samples.values() for home, away in METRICS]
+    statistics, pvalues = paired_wilcoxon(pairs)
+    tests = list(zip(statistics, pvalues))
 
-    # xPTS (calculés à partir de forecast)
-    forecast = result['forecast']
-    home_xpts, away_xpts = calculate_xpts(forecast)
-    xpts_home.append(home_xpts)
-    xpts_away.append(away_xpts)
+    # ((stat_points, p_points), (stat_xpts, p_xpts), (stat_xg, p_xg)) pour chaque ligue et saison
+    return {key: tuple(tests[3 * k:3 * k + 3]) for k, key in enumerate(samples)}
 
-    # xG
-    xg_home.append(float(result['xG']['h']))
-    xg_away.append(float(result['xG']['a']))
 
-def calculate_xpts(forecast):
+def cohen_d(samples):
     """
-    Calcule les xPTS (Expected Points) à partir des probabilités de victoire, nul et défaite.
+    Calcul du score de taille d'effet (Cohen's d) entre domicile et extérieur pour les points,
+    xPTS et xG de toutes les ligues et saisons en un seul appel.
     """
-    home_xpts = (float(forecast['w']) * 3) + (float(forecast['d']) * 1) + (float(forecast['l']) * 0)
-    away_xpts = (float(forecast['l']) * 3) + (float(forecast['d']) * 1) + (float(forecast['w']) * 0)
-    return home_xpts, away_xpts
+    pairs = [(group[home], group[away]) for group in samples.values() for home, away in METRICS]
+    values = effect_sizes(pairs)["cohen_d"]
+
+    # (cohend_points, cohend_xpts, cohend_xg) pour chaque ligue et saison
+    return {key: tuple(values[3 * k:3 * k + 3]) for k, key in enumerate(samples)}
 
 
-def cohen_d(home, away):
+def bootstrap_cis(samples):
     """
-    Calcul du score de taille d'effet (Cohen's d) entre deux groupes.
+    Intervalles de confiance bootstrap (95 %) de la différence des moyennes et du Cohen's d entre
+    domicile et extérieur pour les points, xPTS et xG de toutes les ligues et saisons.
     """
-    mean_a = np.mean(home)
-    mean_b = np.mean(away)
-    std_a = np.std(home, ddof=1)
-    std_b = np.std(away, ddof=1)
+    groups = {(key, home): (group[home], group[away]) for key, group in samples.items() for home, away in METRICS}
+    # Matchs Understat : les valeurs domicile et extérieur de même rang viennent du même match
+    intervals = bootstrap_intervals(groups, paired=True)
 
-    n_a = len(home)
-    n_b = len(away)
-
-    s_p = np.sqrt(((n_a - 1) * std_a**2 + (n_b - 1) * std_b**2) / (n_a + n_b - 2))
-    cohen_d_value = (mean_a - mean_b) / s_p
-    return cohen_d_value
-
-
-def wilcoxon_test(home_points, away_points, home_xpts, away_xpts, home_xg, away_xg):
-    # Test de Wilcoxon pour les points
-    stat_points, p_points = wilcoxon(home_points, away_points)
-    
-    # Test de Wilcoxon pour les xPTS
-    stat_xpts, p_xpts = wilcoxon(home_xpts, away_xpts)
-    
-    # Test de Wilcoxon pour les xG
-    stat_xg, p_xg = wilcoxon(home_xg, away_xg)
-    
-    return (stat_points, p_points), (stat_xpts, p_xpts), (stat_xg, p_xg)
+    # Pour chaque ligue et saison et chaque statistique ("mean_diff", "cohen_d") :
+    # ((bas, haut) points, (bas, haut) xPTS, (bas, haut) xG)
+    return {key: {statistic: tuple(intervals[(key, home)][statistic] for home, _ in METRICS)
+                  for statistic in STATISTICS}
+            for key in samples}
 
 
 def create_image(df):
@@ -79,99 +60,97 @@ def create_image(df):
 
     file_path = os.path.join("replicabilite/more_seasons/results", "more_seasons_wilcoxon.png")
     
-    def get_cell_color(val, col_name):
-        if col_name.startswith('wilco-pvalue') and val > 0.05:
-            return 'red'
-        elif col_name.startswith('cohend') and val < 0.2:
-            return 'yellow'
-        return 'white'
-
-    fig, ax = plt.subplots(figsize=(12, 16))
+    def get_cell_colors(df):
+        colors = np.full(df.shape, 'white', dtype=object)
+        for col_idx, col_name in enumerate(df.columns):
+            if col_name.startswith('wilco-pvalue'):
+                colors[(df[col_name] > 0.05).to_numpy(), col_idx] = 'red'
+            elif col_name.startswith('cohend'):
+                colors[(df[col_name] < 0.2).to_numpy(), col_idx] = 'yellow'
+        return colors
+
+    fig, ax = plt.subplots(figsize=(24, 16))
     ax.axis('off')
-    table = Table(ax, bbox=[0, 0, 1, 1])
-    n_rows, n_cols = df.shape
-
-    # Add headers
-    for (i, col_name) in enumerate(df.columns):
-        table.add_cell(0, i, width=1 / n_cols, height=0.1, text=col_name, loc='center',
-                       facecolor='gray', edgecolor='black')
-
-    # Add data rows
-    for row_idx, row in df.iterrows():
-        for col_idx, (col_name, value) in enumerate(row.items()):
-            color = get_cell_color(value, col_name)
-            table.add_cell(row_idx + 1, col_idx, width=1 / n_cols, height=0.1,
-                           text=f"{value:.6f}" if isinstance(value, float) else str(value),
-                           loc='center', facecolor=color, edgecolor='black')
-
-    ax.add_table(table)
-    plt.savefig(file_path, bbox_inches='tight', dpi=300)
+    draw_table(ax, format_cells(df, ".6f"), get_cell_colors(df), df.columns)
+    fig.savefig(file_path, bbox_inches='tight', dpi=300)
+    plt.close(fig)
     print("Image saved as 'results/reproduction_wilcoxon.png'")
 
 
+async def compute_results(keys=None):
+    """
+    Tableau des tests de Wilcoxon et des Cohen's d, avec les intervalles de confiance bootstrap
+    du Cohen's d et de la différence des moyennes domicile - extérieur, pour chaque ligue et
+    saison (seulement les couples (ligue, saison) de `keys` s'il est donné, même hors de `SEASONS`).
+    """
+    LEAGUES = ["Ligue_1", "La_liga", "EPL", "Bundesliga", "Serie_A", "RFPL"]
+    SEASONS = list(range(2014, 2024))
+    if keys is None:
+        table = await load_fixture_table(LEAGUES, SEASONS)
+    else:
+        leagues = list(dict.fromkeys(league for league, _ in keys))
+        seasons = sorted({season for _, season in keys})
+        table = (await load_fixture_table(leagues, seasons)).subset(keys)
+
+    results = ResultsTable([
+        "League", "Season", "wilco-result", "wilco-pvalue-result", "cohend-result",
+        "ci-low-cohend-result", "ci-high-cohend-result",
+        "ci-low-mean-diff-result", "ci-high-mean-diff-result",
+        "wilco-xPoints", "wilco-pvalue-xPoints", "cohend-xPoints",
+        "ci-low-cohend-xPoints", "ci-high-cohend-xPoints",
+        "ci-low-mean-diff-xPoints", "ci-high-mean-diff-xPoints",
+        "wilco-xG", "wilco-pvalue-xG", "cohend-xG",
+        "ci-low-cohend-xG", "ci-high-cohend-xG",
+        "ci-low-mean-diff-xG", "ci-high-mean-diff-xG"
+    ])
+
+    # Points, xPTS et xG à domicile et à l'extérieur pour toutes les ligues et saisons
+    samples = table.home_away_arrays()
+
+    # Calcul des tests de Wilcoxon et de Cohen's d pour points, xPTS et xG de toutes les ligues et saisons
+    wilco_tests = wilcoxon_test(samples)
+    cohen_ds = cohen_d(samples)
+    cis = bootstrap_cis(samples)
+
+    for (league, season) in samples:
+        wilco_test = wilco_tests[(league, season)]
+        cohend_points, cohend_xpts, cohend_xg = cohen_ds[(league, season)]
+        ci_points, ci_xpts, ci_xg = cis[(league, season)]["cohen_d"]
+        mean_ci_points, mean_ci_xpts, mean_ci_xg = cis[(league, season)]["mean_diff"]
+
+        # Ajout de la ligne au tableau de résultats
+        results.append({
+            "League": league,
+            "Season": season,
+            "wilco-result": wilco_test[0][0],  # Statistique pour les points
+            "wilco-pvalue-result": wilco_test[0][1],  # P-value pour les points
+            "cohend-result": cohend_points,  # Cohen's d pour les points
+            "ci-low-cohend-result": ci_points[0],  # Intervalle de confiance du Cohen's d
+            "ci-high-cohend-result": ci_points[1],
+            "ci-low-mean-diff-result": mean_ci_points[0],  # Intervalle de confiance de la différence des moyennes
+            "ci-high-mean-diff-result": mean_ci_points[1],
+            "wilco-xPoints": wilco_test[1][0],  # Statistique pour les xPTS
+            "wilco-pvalue-xPoints": wilco_test[1][1],  # P-value pour les xPTS
+            "cohend-xPoints": cohend_xpts,  # Cohen's d pour les xPTS
+            "ci-low-cohend-xPoints": ci_xpts[0],
+            "ci-high-cohend-xPoints": ci_xpts[1],
+            "ci-low-mean-diff-xPoints": mean_ci_xpts[0],
+            "ci-high-mean-diff-xPoints": mean_ci_xpts[1],
+            "wilco-xG": wilco_test[2][0],  # Statistique pour les xG
+            "wilco-pvalue-xG": wilco_test[2][1],  # P-value pour les xG
+            "cohend-xG": cohend_xg,  # Cohen's d pour les xG
+            "ci-low-cohend-xG": ci_xg[0],
+            "ci-high-cohend-xG": ci_xg[1],
+            "ci-low-mean-diff-xG": mean_ci_xg[0],
+            "ci-high-mean-diff-xG": mean_ci_xg[1]
+        })
+
+    return results.to_frame()
+
+
 async def main():
-    async with aiohttp.ClientSession() as session:
-        understat = Understat(session)
-
-        LEAGUES = ["Ligue_1", "La_liga", "EPL", "Bundesliga", "Serie_A", "RFPL"]
-        SEASONS = list(range(2014, 2024))
-
-        final_df = pd.DataFrame(columns=[
-            "League", "Season", "wilco-result", "wilco-pvalue-result", "cohend-result",
-            "wilco-xPoints", "wilco-pvalue-xPoints", "cohend-xPoints",
-            "wilco-xG", "wilco-pvalue-xG", "cohend-xG"
-        ])       
-
-        for league in LEAGUES:
-            for season in SEASONS:
-                home_results = []
-                away_results = []
-                home_xpts = []
-                away_xpts = []
-                home_xg = []
-                away_xg = []
-
-                fixtures = await understat.get_league_results(league, season)
-
-                # Remplissage des résultats pour chaque match
-                for fixture in fixtures:
-                    getHomeAwayResultPerMatch(
-                        result=fixture,
-                        home=home_results,
-                        away=away_results,
-                        xpts_home=home_xpts,
-                        xpts_away=away_xpts,
-                        xg_home=home_xg,
-                        xg_away=away_xg
-                    )
-
-                # Calcul des tests de Wilcoxon pour points, xPTS et xG
-                wilco_test = wilcoxon_test(home_results, away_results, home_xpts, away_xpts, home_xg, away_xg)
-                
-                # Calcul de Cohen's d pour points, xPTS et xG
-                cohend_points = cohen_d(home_results, away_results)
-                cohend_xpts = cohen_d(home_xpts, away_xpts)
-                cohend_xg = cohen_d(home_xg, away_xg)
-
-                # Création de la nouvelle ligne pour le DataFrame
-                new_row = pd.DataFrame({
-                    "League": [league],
-                    "Season": [season],
-                    "wilco-result": [wilco_test[0][0]],  # Statistique pour les points
-                    "wilco-pvalue-result": [wilco_test[0][1]],  # P-value pour les points
-                    "cohend-result": [cohend_points],  # Cohen's d pour les points
-                    "wilco-xPoints": [wilco_test[1][0]],  # Statistique pour les xPTS
-                    "wilco-pvalue-xPoints": [wilco_test[1][1]],  # P-value pour les xPTS
-                    "cohend-xPoints": [cohend_xpts],  # Cohen's d pour les xPTS
-                    "wilco-xG": [wilco_test[2][0]],  # Statistique pour les xG
-                    "wilco-pvalue-xG": [wilco_test[2][1]],  # P-value pour les xG
-                    "cohend-xG": [cohend_xg]  # Cohen's d pour les xG
-                })
-                final_df = pd.concat([final_df, new_row], ignore_index=True)
-
-
-        # Create and save the stylized table image
-        create_image(final_df)
+    # Create and save the stylized table image
+    create_image(await compute_results())
 
 if __name__ == "__main__":
     asyncio.run(main())
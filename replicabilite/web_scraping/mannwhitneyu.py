@@ -1,53 +1,45 @@
 import numpy as np
 import pandas as pd
-from scipy.stats import mannwhitneyu
 import matplotlib.pyplot as plt
-from matplotlib.table import Table
 import os
+from homeadv.matches import MatchIndex
+from homeadv.store import load_table
+from homeadv.mannwhitney import mann_whitney_matrix
+from homeadv.render import figure_job, render_figures
+from homeadv.tables import draw_table, format_cells
 
 
-def fetch_xpoints_from_csv(df, league, season):
-    """Récupère les xPoints pour une ligue et une saison depuis le CSV."""
-    group = df[(df['League'] == league) & (df['Season'] == season) & (df['Home_Away'] == 'h')]
-    xpoints = group['xPTS'].tolist()
-    return xpoints
+def fetch_xpoints_from_csv(index, league, season):
+    """Récupère les xPoints à domicile pour une ligue et une saison depuis l'index du CSV."""
+    return index.values('xPTS', league, season, 'h')
 
 
 def calculate_mann_whitney_from_csv(csv_file):
     """Calcule les tests de Mann-Whitney U pour les xPoints entre saisons à partir d'un fichier CSV."""
-    df = pd.read_csv(csv_file)
+    # Seuls les xPoints des matchs à domicile sont lus
+    df = load_table(csv_file, columns=['League', 'Season', 'Home_Away', 'xPTS'], filters={'Home_Away': 'h'})
     
-    LEAGUES = df['League'].unique()
-    SEASONS = sorted(df['Season'].unique())
+    index = MatchIndex(df)
+
+    LEAGUES = index.leagues()
+    SEASONS = sorted(index.seasons())
     results = {}
 
     for league in LEAGUES:
-        league_results = {}
         
         # Récupérer les xPoints pour chaque saison
         xpoints_per_season = {}
         for season in SEASONS:
-            xpoints_per_season[season] = fetch_xpoints_from_csv(df, league, season)
-
-        # Comparer les saisons deux à deux sans doublons
-        for i, season1 in enumerate(SEASONS):
-            league_results[season1] = {}
-            for season2 in SEASONS[i + 1:]:  # Comparer chaque saison à toutes celles qui viennent après
-                stat, p_value = mannwhitneyu(
-                    xpoints_per_season[season1],
-                    xpoints_per_season[season2]
-                )
-                league_results[season1][season2] = p_value / 2  # Ajuster la p-value pour un test one-sided
-
-            # Remplir la diagonale avec NaN (pas de comparaison pour une saison avec elle-même)
-            for season2 in SEASONS:
-                if season2 == season1:
-                    league_results[season1][season2] = np.nan
-        
-        # Convertir les résultats en DataFrame et trier explicitement les lignes et colonnes
-        df_results = pd.DataFrame(league_results)
-        df_results = df_results.sort_index(axis=0, ascending=True)  # Trie les lignes par saison croissante
-        df_results = df_results.sort_index(axis=1, ascending=True)  # Trie les colonnes par saison croissante
+            xpoints_per_season[season] = fetch_xpoints_from_csv(index, league, season)
+
+        # Comparer les saisons deux à deux : toutes les p-values en un seul calcul
+        stats, p_values = mann_whitney_matrix([xpoints_per_season[season] for season in SEASONS])
+
+        # Chaque saison (colonne) est comparée à celles qui viennent après (lignes),
+        # la diagonale et le triangle supérieur restent à NaN
+        later = np.tril(np.ones((len(SEASONS), len(SEASONS)), dtype=bool), k=-1)
+        df_results = pd.DataFrame(np.where(later, p_values / 2, np.nan), index=SEASONS, columns=SEASONS)  # Ajuster la p-value pour un test one-sided
+
         results[league] = df_results
 
     return results
@@ -62,36 +54,15 @@ def create_stylized_table(results, league):
 
     df = results[league]
 
-    def get_cell_color(val):
-        if val < 0.05:
-            return 'red'
-        return 'white'
+    # Cases rouges : p-value < 0.05 (les NaN restent blancs)
+    colors = np.where(df.to_numpy() < 0.05, 'red', 'white').astype(object)
 
     fig, ax = plt.subplots(figsize=(12, 6))
     ax.axis('off')
-    table = Table(ax, bbox=[0, 0, 1, 1])
-    n_rows, n_cols = df.shape
-
-    # Add headers
-    for (i, col_name) in enumerate(df.columns):
-        table.add_cell(0, i + 1, width=1 / (n_cols + 1), height=0.1, text=col_name, loc='center',
-                       facecolor='gray', edgecolor='black')
-    for (i, row_name) in enumerate(df.index):
-        table.add_cell(i + 1, 0, width=1 / (n_cols + 1), height=0.1, text=row_name, loc='center',
-                       facecolor='gray', edgecolor='black')
-
-    # Add data rows
-    for row_idx, row in enumerate(df.iterrows()):
-        for col_idx, (col_name, value) in enumerate(row[1].items()):
-            color = get_cell_color(value)
-            table.add_cell(row_idx + 1, col_idx + 1, width=1 / (n_cols + 1), height=0.1,
-                           text=f"{value:.6f}" if pd.notna(value) else "", loc='center',
-                           facecolor=color, edgecolor='black')
-
-    ax.add_table(table)
+    draw_table(ax, format_cells(df, ".6f", na_rep=""), colors, df.columns, row_labels=df.index)
     plt.title(f"xPoints_home significance with mann: {league}")
     file_path = os.path.join(output_dir, f"mann_whitney_{league}.png")
-    plt.savefig(file_path, bbox_inches='tight', dpi=300)
+    fig.savefig(file_path, bbox_inches='tight', dpi=300)
     plt.close()
 
 
@@ -99,8 +70,10 @@ def main():
     csv_file = './replicabilite/web_scraping/understat_match_stats.csv'  # Remplacez par le chemin correct
     results = calculate_mann_whitney_from_csv(csv_file)
 
+    # Un tableau par ligue, rendus en parallèle
+    render_figures(figure_job(__file__, "create_stylized_table", {league: results[league]}, league)
+                   for league in results.keys())
     for league in results.keys():
-        create_stylized_table(results, league)
         print(f"Tableau pour {league} enregistré.")
 
 
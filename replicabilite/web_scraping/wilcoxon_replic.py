@@ -1,67 +1,40 @@
-from scipy.stats import wilcoxon
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.table import Table
+from homeadv.matches import MatchIndex, home_away_arrays, result_points
+from homeadv.effect_size import home_away_effect_sizes
+from homeadv.bootstrap import bootstrap_intervals
+from homeadv.store import load_table
+from homeadv.wilcoxon import paired_wilcoxon
+from homeadv.results import ResultsTable
+from homeadv.tables import draw_table, format_cells
 
 
-def getHomeAwayResultPerMatch(row, home, away, xpts_home, xpts_away, xg_home, xg_away):
+def wilcoxon_test(arrays):
     """
-    Fonction qui attribue les points pour les matchs à domicile et à l'extérieur.
-    Les buts sont extraits des colonnes 'Goals' et 'Goals_Against'.
-    Les xPTS et xG sont aussi extraits.
+    Effectue le test de Wilcoxon pour comparer les résultats à domicile et à l'extérieur
+    (points, xPTS et xG) de toutes les ligues et saisons de `arrays` en un seul appel.
     """
-    if row['Home_Away'] == 'h':  # Match à domicile
-        if row['Result'] == 'w':  # Victoire à domicile
-            home.append(3)
-            xpts_home.append(row['xPTS'])
-            xg_home.append(row['xG'])
-        elif row['Result'] == 'd':  # Match nul
-            home.append(1)
-            xpts_home.append(row['xPTS'])
-            xg_home.append(row['xG'])
-        else:  # Défaite à domicile
-            home.append(0)
-            xpts_home.append(row['xPTS'])
-            xg_home.append(row['xG'])
-    elif row['Home_Away'] == 'a':  # Match à l'extérieur
-        if row['Result'] == 'w':  # Victoire à l'extérieur
-            away.append(3)
-            xpts_away.append(row['xPTS'])
-            xg_away.append(row['xG'])
-        elif row['Result'] == 'd':  # Match nul
-            away.append(1)
-            xpts_away.append(row['xPTS'])
-            xg_away.append(row['xG'])
-        else:  # Défaite à l'extérieur
-            away.append(0)
-            xpts_away.append(row['xPTS'])
-            xg_away.append(row['xG'])
-
-
-def cohen_d(home, away):
-    """
-    Calcul de la taille de l'effet de Cohen (d) entre les résultats à domicile et à l'extérieur.
-    """
-    mean_a = np.mean(home)
-    mean_b = np.mean(away)
-    std_a = np.std(home, ddof=1)
-    std_b = np.std(away, ddof=1)
-
-    n_a = len(home)
-    n_b = len(away)
+    metrics = [("points_home", "points_away"), ("xpts_home", "xpts_away"), ("xg_home", "xg_away")]
+    pairs = [(group[home], group[away]) for group in arrays.values() for home, away in metrics]
+    statistics, pvalues = paired_wilcoxon(pairs)
+    tests = list(zip(statistics, pvalues))
 
-    s_p = np.sqrt(((n_a - 1) * std_a**2 + (n_b - 1) * std_b**2) / (n_a + n_b - 2))
-    cohen_d_value = (mean_a - mean_b) / s_p
-    return cohen_d_value
+    # ((stat_points, p_points), (stat_xpts, p_xpts), (stat_xg, p_xg)) pour chaque ligue et saison
+    return {key: tuple(tests[3 * k:3 * k + 3]) for k, key in enumerate(arrays)}
 
 
-def wilcoxon_test(home, away):
+def cohen_d_intervals(arrays):
     """
-    Effectue le test de Wilcoxon pour comparer les résultats à domicile et à l'extérieur.
+    Intervalles de confiance bootstrap (95 %) du Cohen's d entre domicile et extérieur
+    (points, xPTS et xG) de toutes les ligues et saisons de `arrays`.
     """
-    stat, p = wilcoxon(home, away)
-    return stat, p
+    metrics = [("points_home", "points_away"), ("xpts_home", "xpts_away"), ("xg_home", "xg_away")]
+    groups = {(key, home): (group[home], group[away]) for key, group in arrays.items() for home, away in metrics}
+    # CSV par équipe : les lignes domicile et extérieur sont des matchs différents
+    intervals = bootstrap_intervals(groups, paired=False)
+
+    # ((bas, haut) points, (bas, haut) xPTS, (bas, haut) xG) pour chaque ligue et saison
+    return {key: tuple(intervals[(key, home)]["cohen_d"] for home, _ in metrics) for key in arrays}
 
 
 def create_image(df):
@@ -69,93 +42,96 @@ def create_image(df):
     Fonction pour créer et enregistrer une image avec les résultats sous forme de tableau stylisé.
     """
     # Styling function
-    def get_cell_color(val, col_name):
-        if col_name.startswith('wilco-result-pvalue') and val > 0.05:
-            return 'red'
-        elif col_name.startswith('result-cohend') and val < 0.2:
-            return 'yellow'
-        return 'white'
+    def get_cell_colors(df):
+        colors = np.full(df.shape, 'white', dtype=object)
+        for col_idx, col_name in enumerate(df.columns):
+            if col_name.startswith('wilco-result-pvalue'):
+                colors[(df[col_name] > 0.05).to_numpy(), col_idx] = 'red'
+            elif col_name.startswith('result-cohend'):
+                colors[(df[col_name] < 0.2).to_numpy(), col_idx] = 'yellow'
+        return colors
 
     # Plotting
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = plt.subplots(figsize=(18, 6))
     ax.axis('off')
-    table = Table(ax, bbox=[0, 0, 1, 1])
-    n_rows, n_cols = df.shape
-
-    # Add headers
-    for (i, col_name) in enumerate(df.columns):
-        table.add_cell(0, i, width=1 / n_cols, height=0.1, text=col_name, loc='center',
-                       facecolor='gray', edgecolor='black')
-
-    # Add data rows
-    for row_idx, row in df.iterrows():
-        for col_idx, (col_name, value) in enumerate(row.items()):
-            color = get_cell_color(value, col_name)
-            table.add_cell(row_idx + 1, col_idx, width=1 / n_cols, height=0.1,
-                           text=f"{value:.6f}" if isinstance(value, float) else str(value),
-                           loc='center', facecolor=color, edgecolor='black')
-
-    ax.add_table(table)
-    plt.savefig("replicabilite/web_scraping/results/wilcoxon_web.png", bbox_inches='tight', dpi=300)
+    draw_table(ax, format_cells(df, ".6f"), get_cell_colors(df), df.columns)
+    fig.savefig("replicabilite/web_scraping/results/wilcoxon_web.png", bbox_inches='tight', dpi=300)
+    plt.close(fig)
     print("Image saved as 'wilcoxon_web.png'")
 
 
-def main():
+def compute_results():
+    """
+    Tableau des tests de Wilcoxon et des Cohen's d, avec leur intervalle de confiance bootstrap,
+    pour chaque ligue et saison du CSV scrapé.
+    """
     # Charger les données depuis un fichier CSV
-    understat = pd.read_csv('./replicabilite/web_scraping/understat_match_stats.csv')
+    understat = load_table('./replicabilite/web_scraping/understat_match_stats.csv')
     
-    final_df = pd.DataFrame(columns=["League", "Season", "wilco-result", "wilco-result-pvalue", "result-cohend",
-                                     "wilco-xPTS", "wilco-xPTS-pvalue", "result-cohend-xPTS", 
-                                     "wilco-xG", "wilco-xG-pvalue", "result-cohend-xG"])
-    leagues = understat['League'].unique()
-    seasons = understat['Season'].unique()
+    results = ResultsTable(["League", "Season", "wilco-result", "wilco-result-pvalue", "result-cohend",
+                            "ci-low-result-cohend", "ci-high-result-cohend",
+                            "wilco-xPTS", "wilco-xPTS-pvalue", "result-cohend-xPTS",
+                            "ci-low-result-cohend-xPTS", "ci-high-result-cohend-xPTS",
+                            "wilco-xG", "wilco-xG-pvalue", "result-cohend-xG",
+                            "ci-low-result-cohend-xG", "ci-high-result-cohend-xG"])
+    # Index construit une seule fois : chaque ligue/saison/lieu est une plage de lignes
+    index = MatchIndex(understat)
+    leagues = index.leagues()
+    seasons = index.seasons()
+
+    # Points, xPTS et xG à domicile et à l'extérieur pour toutes les ligues et saisons
+    arrays = home_away_arrays(index)
+    wilco_tests = wilcoxon_test(arrays)
+    cohen_cis = cohen_d_intervals(arrays)
+
+    # Cohen's d domicile / extérieur de toutes les ligues et saisons, une réduction par mesure
+    # (CSV par équipe : les lignes domicile et extérieur sont des matchs différents)
+    cohen_ds = {
+        metric: home_away_effect_sizes(index, values, paired=False)
+        for metric, values in [("points", result_points(index.column("Result"))),
+                               ("xpts", index.column("xPTS")),
+                               ("xg", index.column("xG"))]
+    }
 
     # Parcours des ligues et saisons
     for league in leagues:
         for season in seasons:
-            # Filtrer les données pour chaque ligue et saison
-            group = understat[(understat['League'] == league) & (understat['Season'] == season)]
-
-            # Initialisation des listes pour les résultats à domicile et à l'extérieur
-            home_results = []
-            away_results = []
-            home_xpts = []
-            away_xpts = []
-            home_xg = []
-            away_xg = []
-
-            # Parcours des résultats de chaque match
-            for _, row in group.iterrows():
-                getHomeAwayResultPerMatch(row, home_results, away_results, home_xpts, away_xpts, home_xg, away_xg)
-
-            # Effectuer les tests de Wilcoxon et le calcul de Cohen's d pour les différentes mesures
-            wilco_pts = wilcoxon_test(home_results, away_results)
-            cohend_pts = cohen_d(home_results, away_results)
-
-            wilco_xpts = wilcoxon_test(home_xpts, away_xpts)
-            cohend_xpts = cohen_d(home_xpts, away_xpts)
-
-            wilco_xg = wilcoxon_test(home_xg, away_xg)
-            cohend_xg = cohen_d(home_xg, away_xg)
-
-            # Ajouter les résultats dans un nouveau DataFrame
-            new_row = pd.DataFrame({
-                "League": [league],
-                "Season": [season],
-                "wilco-result": [wilco_pts[0]],
-                "wilco-result-pvalue": [wilco_pts[1]],
-                "result-cohend": [cohend_pts],
-                "wilco-xPTS": [wilco_xpts[0]],
-                "wilco-xPTS-pvalue": [wilco_xpts[1]],
-                "result-cohend-xPTS": [cohend_xpts],
-                "wilco-xG": [wilco_xg[0]],
-                "wilco-xG-pvalue": [wilco_xg[1]],
-                "result-cohend-xG": [cohend_xg],
+            # Tests de Wilcoxon et Cohen's d déjà calculés pour les différentes mesures
+            wilco_pts, wilco_xpts, wilco_xg = wilco_tests[(league, season)]
+            cohend_pts = cohen_ds["points"][(league, season)]["cohen_d"]
+            cohend_xpts = cohen_ds["xpts"][(league, season)]["cohen_d"]
+            cohend_xg = cohen_ds["xg"][(league, season)]["cohen_d"]
+            ci_pts, ci_xpts, ci_xg = cohen_cis[(league, season)]
+
+            # Ajouter les résultats au tableau
+            results.append({
+                "League": league,
+                "Season": season,
+                "wilco-result": wilco_pts[0],
+                "wilco-result-pvalue": wilco_pts[1],
+                "result-cohend": cohend_pts,
+                "ci-low-result-cohend": ci_pts[0],
+                "ci-high-result-cohend": ci_pts[1],
+                "wilco-xPTS": wilco_xpts[0],
+                "wilco-xPTS-pvalue": wilco_xpts[1],
+                "result-cohend-xPTS": cohend_xpts,
+                "ci-low-result-cohend-xPTS": ci_xpts[0],
+                "ci-high-result-cohend-xPTS": ci_xpts[1],
+                "wilco-xG": wilco_xg[0],
+                "wilco-xG-pvalue": wilco_xg[1],
+                "result-cohend-xG": cohend_xg,
+                "ci-low-result-cohend-xG": ci_xg[0],
+                "ci-high-result-cohend-xG": ci_xg[1],
             })
-            final_df = pd.concat([final_df, new_row], ignore_index=True)
 
+    return results.to_frame()
+
+
+def main():
     # Créer et sauvegarder l'image stylisée
-    create_image(final_df)
+    create_image(compute_results())
+
 
 # Exécution du script
-main()
+if __name__ == "__main__":
+    main()
@@ -1,61 +1,41 @@
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
-import aiohttp
 import asyncio
-from understat import Understat
+from homeadv.fixtures import load_fixture_table
+from homeadv.render import figure_job, render_figures
 
 
 async def fetch_understat_data(leagues, seasons):
     """
     Récupère les données des ligues et saisons depuis Understat.
     """
-    async with aiohttp.ClientSession() as session:
-        understat = Understat(session)
-        data = []
-
-        for league in leagues:
-            for season in seasons:
-                print(f"Fetching data for {league} {season}...")
-                try:
-                    fixtures = await understat.get_league_results(league, season)
-                except Exception as e:
-                    print(f"Erreur lors de la récupération des données pour {league} {season}: {e}")
-                    continue
-
-                home_points, away_points, home_xpts, away_xpts = [], [], [], []
-                for fixture in fixtures:
-                    # Récupérer les résultats et les xPTS
-                    home_goals, away_goals = int(fixture['goals']['h']), int(fixture['goals']['a'])
-                    forecast = fixture['forecast']
-
-                    # Points réels
-                    if home_goals > away_goals:
-                        home_points.append(3)
-                        away_points.append(0)
-                    elif home_goals < away_goals:
-                        home_points.append(0)
-                        away_points.append(3)
-                    else:
-                        home_points.append(1)
-                        away_points.append(1)
-
-                    # xPTS
-                    home_xpts.append((float(forecast['w']) * 3) + (float(forecast['d']) * 1))
-                    away_xpts.append((float(forecast['l']) * 3) + (float(forecast['d']) * 1))
-
-                data.append({
-                    "League": league,
-                    "Season": season,
-                    "points_home": sum(home_points),
-                    "points_away": sum(away_points),
-                    "xpoints_home": sum(home_xpts),
-                    "xpoints_away": sum(away_xpts),
-                    "matchs_home": len(home_points),
-                    "matchs_away": len(away_points)
-                })
-
-        return pd.DataFrame(data)
+    table = await load_fixture_table(leagues, seasons, skip_errors=True)
+
+    # Totaux des points et xPTS, et nombre de matchs, par ligue et saison
+    return table.season_totals()
+
+
+def create_league_graph(league_data, league, output_dir):
+    """
+    Crée le graphique d'évolution des points d'une ligue.
+    """
+    plt.figure(figsize=(10, 6))
+    plt.plot(league_data["Season"], league_data["points_home_avg"], label="Points à domicile", marker='o', color='blue')
+    plt.plot(league_data["Season"], league_data["xpoints_home_avg"], label="xPoints à domicile", marker='o', color='orange')
+    plt.plot(league_data["Season"], league_data["points_away_avg"], label="Points à l'extérieur", marker='o', color='green')
+    plt.plot(league_data["Season"], league_data["xpoints_away_avg"], label="xPoints à l'extérieur", marker='o', color='red')
+
+    plt.title(f"Évolution des points pour {league}", fontsize=16)
+    plt.xlabel("Saison", fontsize=12)
+    plt.ylabel("Points moyens par match", fontsize=12)
+    plt.legend()
+    plt.grid(True)
+    plt.xticks(league_data["Season"], rotation=45)
+
+    file_path = os.path.join(output_dir, f"evolution_points_{league}.png")
+    plt.tight_layout()
+    plt.savefig(file_path)
+    plt.close()
 
 
 def create_graphs(df):
@@ -72,27 +52,9 @@ def create_graphs(df):
     output_dir = "results/evolutions_par_ligue"
     os.makedirs(output_dir, exist_ok=True)
 
-    # Tracer les graphiques pour chaque ligue
-    for league in df["League"].unique():
-        league_data = df[df["League"] == league]
-
-        plt.figure(figsize=(10, 6))
-        plt.plot(league_data["Season"], league_data["points_home_avg"], label="Points à domicile", marker='o', color='blue')
-        plt.plot(league_data["Season"], league_data["xpoints_home_avg"], label="xPoints à domicile", marker='o', color='orange')
-        plt.plot(league_data["Season"], league_data["points_away_avg"], label="Points à l'extérieur", marker='o', color='green')
-        plt.plot(league_data["Season"], league_data["xpoints_away_avg"], label="xPoints à l'extérieur", marker='o', color='red')
-
-        plt.title(f"Évolution des points pour {league}", fontsize=16)
-        plt.xlabel("Saison", fontsize=12)
-        plt.ylabel("Points moyens par match", fontsize=12)
-        plt.legend()
-        plt.grid(True)
-        plt.xticks(league_data["Season"], rotation=45)
-
-        file_path = os.path.join(output_dir, f"evolution_points_{league}.png")
-        plt.tight_layout()
-        plt.savefig(file_path)
-        plt.close()
+    # Tracer les graphiques de chaque ligue en parallèle
+    render_figures(figure_job(__file__, "create_league_graph", df[df["League"] == league], league, output_dir)
+                   for league in df["League"].unique())
 
     print(f"Graphiques enregistrés dans le répertoire : {output_dir}.")
 
@@ -0,0 +1,9 @@
+"""
+Configuration commune des tests : le paquet `homeadv` est importé depuis la
+racine du dépôt, comme les scripts lancés avec `PYTHONPATH=.`.
+"""
+import os
+import sys
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
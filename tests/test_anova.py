@@ -0,0 +1,85 @@
+"""
+`homeadv.anova.rm_anova_batch` (forme fermée, tous les groupes à la fois)
+face à `pingouin.rm_anova` (`rm_anova_pingouin`, groupe par groupe) : valeurs
+continues ou avec ex-aequo, groupes de tailles différentes.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from homeadv.anova import rm_anova_batch, rm_anova_pingouin
+
+
+pg = pytest.importorskip("pingouin")
+
+
+def _continuous(n, shift=0.0):
+    def make(rng):
+        return rng.normal(shift, 1, n), rng.normal(0, 1, n)
+    return make
+
+
+def _points(n):
+    def make(rng):
+        # Ex-aequo fréquents : les points d'un match
+        return rng.choice([0, 1, 3], n, p=[0.3, 0.25, 0.45]), rng.choice([0, 1, 3], n, p=[0.45, 0.25, 0.3])
+    return make
+
+
+def _rounded(n, decimals):
+    def make(rng):
+        return np.round(rng.uniform(0, 3, n), decimals), np.round(rng.uniform(0, 3, n), decimals)
+    return make
+
+
+CASES = {
+    "continuous-n3": _continuous(3),
+    "continuous-n20": _continuous(20),
+    "continuous-n190-shift": _continuous(190, 0.3),
+    "continuous-n380": _continuous(380),
+    "ties-points-n10": _points(10),
+    "ties-points-n190": _points(190),
+    "ties-rounded-n38": _rounded(38, 1),
+    "ties-rounded-n380": _rounded(380, 0),
+}
+
+
+def _pairs(names):
+    return [CASES[name](np.random.default_rng(list(CASES).index(name))) for name in names]
+
+
+def _degrees_of_freedom(home, away):
+    """Degrés de liberté (condition, erreur) de la table détaillée de pingouin."""
+    data = pd.DataFrame({
+        'score': list(home) + list(away),
+        'condition': ['home'] * len(home) + ['away'] * len(away),
+        'team': list(range(len(home))) + list(range(len(away)))
+    })
+    aov = pg.rm_anova(dv='score', within='condition', subject='team', data=data, detailed=True)
+    return int(aov.loc[0, 'DF']), int(aov.loc[1, 'DF'])
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_matches_pingouin(name):
+    pairs = _pairs([name])
+    F, pvalues, ng2 = rm_anova_batch(pairs)
+    expected_F, expected_pvalues, expected_ng2 = rm_anova_pingouin(pairs)
+
+    assert F[0] == pytest.approx(expected_F[0], rel=1e-9)
+    assert pvalues[0] == pytest.approx(expected_pvalues[0], rel=1e-9, abs=1e-15)
+    assert ng2[0] == pytest.approx(expected_ng2[0], rel=1e-9, abs=1e-15)
+    # F suit une loi de Fisher à 1 et n - 1 degrés de liberté
+    home, away = pairs[0]
+    assert _degrees_of_freedom(home, away) == (1, len(home) - 1)
+
+
+def test_batch_matches_single_groups():
+    pairs = _pairs(CASES)
+    batch = rm_anova_batch(pairs)
+    for k, pair in enumerate(pairs):
+        for values, single in zip(batch, rm_anova_batch([pair])):
+            assert values[k] == pytest.approx(single[0], rel=1e-12)
+
+
+def test_empty_batch():
+    assert all(len(values) == 0 for values in rm_anova_batch([]))
@@ -0,0 +1,119 @@
+"""
+`homeadv.bootstrap` : réplicats identiques à un rééchantillonnage par indices
+tiré du même générateur, intervalles indépendants de la répartition entre
+processus, appariement des valeurs d'un même match, groupes vides, et
+intervalles des deux statistiques dans les tableaux Wilcoxon Understat.
+"""
+import numpy as np
+import pytest
+
+from homeadv.bootstrap import STATISTICS, bootstrap_intervals, bootstrap_replicates
+from homeadv.fixtures import FixtureTable
+from homeadv.render import load_script
+from homeadv.synthetic import SyntheticUnderstat
+
+
+N_RESAMPLES = 200
+SEED = 7
+
+
+def make_groups(n_groups=5, seed=0):
+    rng = np.random.default_rng(seed)
+    groups = {}
+    for k in range(n_groups):
+        size = 10 + 3 * k
+        groups[("EPL", 2014 + k)] = (rng.poisson(1.5, size).astype(float), rng.poisson(1.1, size).astype(float))
+    return groups
+
+
+def cohen_d(a, b):
+    pooled_sd = np.sqrt(((len(a) - 1) * a.var(ddof=1) + (len(b) - 1) * b.var(ddof=1)) / (len(a) + len(b) - 2))
+    return (a.mean() - b.mean()) / pooled_sd
+
+
+def naive_replicates(home, away, n_resamples, seed, paired):
+    """Réplicats par tirage explicite des indices, dans l'ordre des tirages de `bootstrap_replicates`."""
+    rng = np.random.default_rng(seed)
+    index_home = rng.integers(0, len(home), size=(n_resamples, len(home)))
+    index_away = index_home if paired else rng.integers(0, len(away), size=(n_resamples, len(away)))
+    resampled_home, resampled_away = home[index_home], away[index_away]
+    return {
+        "mean_diff": resampled_home.mean(axis=1) - resampled_away.mean(axis=1),
+        "cohen_d": np.array([cohen_d(a, b) for a, b in zip(resampled_home, resampled_away)]),
+    }
+
+
+@pytest.mark.parametrize("paired", [False, True], ids=["unpaired", "paired"])
+def test_replicates_match_index_resampling(paired):
+    home, away = make_groups()[("EPL", 2016)]
+    replicates = bootstrap_replicates(home, away, N_RESAMPLES, SEED, paired)
+    expected = naive_replicates(home, away, N_RESAMPLES, SEED, paired)
+
+    assert sorted(replicates) == sorted(STATISTICS)
+    for name in STATISTICS:
+        np.testing.assert_allclose(replicates[name], expected[name], rtol=1e-10, atol=1e-12)
+
+
+def test_intervals_do_not_depend_on_workers():
+    groups = make_groups()
+    serial = bootstrap_intervals(groups, paired=True, n_resamples=N_RESAMPLES, workers=1)
+    parallel = bootstrap_intervals(groups, paired=True, n_resamples=N_RESAMPLES, workers=3)
+
+    assert list(parallel) == list(groups)
+    assert parallel == serial
+
+
+def test_intervals_do_not_depend_on_group_order():
+    groups = make_groups()
+    reversed_groups = dict(reversed(list(groups.items())))
+    intervals = bootstrap_intervals(groups, n_resamples=N_RESAMPLES, workers=1)
+    reversed_intervals = bootstrap_intervals(reversed_groups, n_resamples=N_RESAMPLES, workers=1)
+
+    assert {key: reversed_intervals[key] for key in groups} == intervals
+
+
+def test_paired_resampling_keeps_matches_together():
+    home = np.arange(20, dtype=float)
+    away = home - 1.0  # chaque match : un but d'écart exactement
+    groups = {"group": (home, away)}
+    paired = bootstrap_intervals(groups, paired=True, n_resamples=N_RESAMPLES, workers=1)["group"]
+    unpaired = bootstrap_intervals(groups, paired=False, n_resamples=N_RESAMPLES, workers=1)["group"]
+
+    assert paired["mean_diff"] == pytest.approx((1.0, 1.0))
+    low, high = unpaired["mean_diff"]
+    assert low < 1.0 < high
+    assert paired != unpaired
+
+
+def test_unequal_paired_groups_are_rejected():
+    groups = {"group": (np.ones(10), np.ones(9))}
+    with pytest.raises(ValueError):
+        bootstrap_intervals(groups, paired=True, n_resamples=N_RESAMPLES, workers=1)
+    # Sans appariement, des tailles différentes sont permises
+    assert set(bootstrap_intervals(groups, paired=False, n_resamples=N_RESAMPLES, workers=1)["group"]) == set(STATISTICS)
+
+
+def test_empty_groups_give_nan_intervals():
+    groups = {"group": (np.array([]), np.array([1.0, 2.0]))}
+    intervals = bootstrap_intervals(groups, n_resamples=N_RESAMPLES, workers=1)["group"]
+
+    for name in STATISTICS:
+        assert np.isnan(intervals[name]).all()
+
+
+@pytest.mark.parametrize("path", ["reproduction/wilcoxon_with_undestat.py",
+                                  "replicabilite/more_seasons/wilcoxon_with_undestat_2023.py"])
+def test_understat_tables_report_both_intervals(monkeypatch, path):
+    monkeypatch.setenv("HOMEADV_BOOTSTRAP_WORKERS", "1")
+    generator = SyntheticUnderstat(teams=6)
+    keys = [("EPL", 2014), ("RFPL", 2015)]
+    samples = FixtureTable.from_fixtures({key: generator.fixtures(*key) for key in keys}).home_away_arrays()
+    script = load_script(path)
+    cis = script.bootstrap_cis(samples)
+
+    assert list(cis) == keys
+    for key, group in samples.items():
+        assert set(cis[key]) == set(STATISTICS)
+        for (home, away), (low, high) in zip(script.METRICS, cis[key]["mean_diff"]):
+            # Intervalle des percentiles autour de la différence observée des moyennes
+            assert low <= group[home].mean() - group[away].mean() <= high
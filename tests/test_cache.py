@@ -0,0 +1,55 @@
+"""
+Cache disque de `homeadv.cache` : aller-retour d'une réponse, expiration de
+la saison en cours et écritures concurrentes d'un même fichier.
+"""
+import os
+import threading
+
+from homeadv.cache import FixtureCache, _atomic_write
+
+
+FIXTURES = [{"id": "1", "isResult": True, "goals": {"h": "2", "a": "1"}}]
+
+
+def test_round_trip(tmp_path):
+    cache = FixtureCache(str(tmp_path), offline=False)
+    assert cache.get("league_results", "EPL", 2019) is None
+    cache.put("league_results", "EPL", 2019, FIXTURES)
+    assert cache.get("league_results", "EPL", 2019) == FIXTURES
+
+
+def test_current_season_expires(tmp_path):
+    cache = FixtureCache(str(tmp_path), ttl=-1, offline=False)
+    cache.put("league_results", "EPL", 2019, FIXTURES)
+    cache.put("league_results", "EPL", 9000, FIXTURES)
+    # Saison terminée : jamais expirée ; saison en cours : expirée après `ttl`
+    assert cache.get("league_results", "EPL", 2019) == FIXTURES
+    assert cache.get("league_results", "EPL", 9000) is None
+
+
+def test_concurrent_atomic_writes(tmp_path):
+    path = str(tmp_path / "objects" / "state.json")
+    payloads = [bytes([k]) * 200_000 for k in range(8)]
+    errors = []
+    barrier = threading.Barrier(len(payloads))
+
+    def write(raw):
+        try:
+            barrier.wait()
+            for _ in range(20):
+                _atomic_write(path, raw)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(raw,)) for raw in payloads]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    # Le fichier est celui d'une seule écriture complète, sans fichier temporaire laissé
+    with open(path, "rb") as f:
+        assert f.read() in payloads
+    assert os.listdir(os.path.dirname(path)) == ["state.json"]
+    assert oct(os.stat(path).st_mode & 0o777) == oct(0o644)
@@ -0,0 +1,72 @@
+"""
+`homeadv.diverging` avec le backend Agg : géométrie du tableau de barres
+divergentes (fonds alternés, barres à l'échelle de la plus grande valeur,
+couleurs selon le signe, étiquettes) et enregistrement de la figure dans
+`tmp_path`.
+"""
+import matplotlib
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.colors import to_rgba
+
+from homeadv.diverging import (COLUMNS, NEGATIVE_COLOR, POSITIVE_COLOR, WIDTH_RATIOS, create_diff_figure,
+                               draw_diverging_table)
+
+
+LEAGUES = ["Ligue_1", "Ligue_1", "EPL", "EPL", "RFPL"]
+SEASONS = [2014, 2015, 2014, 2015, 2014]
+POINTS = np.array([40.0, -12.0, 0.0, 80.0, 7.0])
+XPOINTS = np.array([20.0, 5.0, -30.0, 10.0, -1.0])
+
+
+def draw(ax):
+    draw_diverging_table(ax, [LEAGUES, [str(season) for season in SEASONS]], [POINTS, XPOINTS])
+    shading, bars = ax.collections
+    return shading, bars
+
+
+def test_diverging_table_geometry():
+    fig, ax = plt.subplots()
+    shading, bars = draw(ax)
+    n_rows = len(POINTS)
+
+    assert ax.get_xlim() == (0, sum(WIDTH_RATIOS))
+    assert ax.get_ylim() == (n_rows + 1, 0)
+
+    # Une ligne de données sur deux grisée, à partir de la première
+    shaded = [path.vertices[:, 1] for path in shading.get_paths()]
+    assert [(y.min(), y.max()) for y in shaded] == [(1.0, 2.0), (3.0, 4.0), (5.0, 6.0)]
+
+    # Barres partant du milieu de leur colonne ; la plus grande valeur occupe une demi-colonne
+    paths = bars.get_paths()
+    assert len(paths) == 2 * n_rows
+    max_value = max(np.abs(POINTS).max(), np.abs(XPOINTS).max())
+    for k, (center, width, values) in enumerate([(3.5, 3, POINTS), (6.5, 3, XPOINTS)]):
+        for row, value in enumerate(values):
+            x = paths[k * n_rows + row].vertices[:, 0]
+            assert np.isclose(x.min(), min(center, center + value / max_value * width / 2))
+            assert np.isclose(x.max(), max(center, center + value / max_value * width / 2))
+    assert np.isclose(paths[3].vertices[:, 0].max() - 3.5, 1.5)  # 80 points : la plus grande valeur
+
+    colors = [tuple(color) for color in bars.get_facecolors()]
+    expected = [POSITIVE_COLOR if value > 0 else NEGATIVE_COLOR for value in np.concatenate([POINTS, XPOINTS])]
+    assert colors == [to_rgba(color) for color in expected]
+
+    texts = [text.get_text() for text in ax.texts]
+    assert texts[:len(COLUMNS)] == COLUMNS
+    assert texts[len(COLUMNS):len(COLUMNS) + n_rows] == LEAGUES
+    assert texts[-2 * n_rows:] == [str(int(value)) for value in np.concatenate([POINTS, XPOINTS])]
+    plt.close(fig)
+
+
+def test_create_diff_figure_writes_file(tmp_path):
+    data = pd.DataFrame({"League": LEAGUES, "Season": SEASONS,
+                         "diff_points_homeaway": POINTS, "diff_xpoints_homeaway": XPOINTS})
+    output = tmp_path / "diff_points_xpoints.png"
+    create_diff_figure(data, str(output))
+
+    assert output.stat().st_size > 0
+    assert plt.get_fignums() == []
@@ -0,0 +1,124 @@
+"""
+`homeadv.effect_size` face à un calcul NumPy direct, groupe par groupe :
+Cohen's d (écart-type combiné, ddof=1), correction de Hedges, mesures
+appariées d_z et d_av, et NaN pour les groupes de tailles différentes ou
+trop petits, même pour des valeurs loin de zéro. Les valeurs d'un groupe ne
+dépendent pas des autres groupes.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from homeadv.effect_size import EFFECT_SIZES, effect_sizes, home_away_effect_sizes
+from homeadv.matches import MatchIndex
+
+
+def direct(a, b):
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    n_a, n_b = len(a), len(b)
+    pooled_sd = np.sqrt(((n_a - 1) * np.var(a, ddof=1) + (n_b - 1) * np.var(b, ddof=1)) / (n_a + n_b - 2))
+    d = (np.mean(a) - np.mean(b)) / pooled_sd
+    sizes = {"cohen_d": d, "hedges_g": d * (1 - 3 / (4 * (n_a + n_b) - 9)),
+             "paired_d_z": np.nan, "paired_d_av": np.nan}
+    if n_a == n_b:
+        diff = a - b
+        sizes["paired_d_z"] = np.mean(diff) / np.std(diff, ddof=1)
+        sizes["paired_d_av"] = (np.mean(a) - np.mean(b)) / ((np.std(a, ddof=1) + np.std(b, ddof=1)) / 2)
+    return sizes
+
+
+def make_pairs(seed=0):
+    rng = np.random.default_rng(seed)
+    pairs = []
+    for n_home, n_away in [(30, 30), (12, 12), (25, 19), (380, 380), (2, 2), (5, 8)]:
+        pairs.append((rng.poisson(1.5, n_home), rng.poisson(1.1, n_away)))
+    # xG-like : valeurs continues, ex-aequo rares
+    pairs.append((np.round(rng.gamma(2.0, 0.7, 40), 6), np.round(rng.gamma(2.0, 0.55, 40), 6)))
+    return pairs
+
+
+def test_effect_sizes_match_direct_computation():
+    pairs = make_pairs()
+    sizes = effect_sizes(pairs)
+
+    assert sorted(sizes) == sorted(EFFECT_SIZES)
+    for k, (a, b) in enumerate(pairs):
+        expected = direct(a, b)
+        for name in EFFECT_SIZES:
+            np.testing.assert_allclose(sizes[name][k], expected[name], rtol=1e-9, equal_nan=True,
+                                       err_msg=f"groupe {k} {name}")
+
+
+def test_hedges_correction():
+    sizes = effect_sizes([([3, 1, 0, 3, 1], [0, 1, 1, 3, 0, 0])])
+    n = 11
+    assert sizes["hedges_g"][0] == pytest.approx(sizes["cohen_d"][0] * (1 - 3 / (4 * n - 9)))
+    assert abs(sizes["hedges_g"][0]) < abs(sizes["cohen_d"][0])
+
+
+def test_paired_sizes_need_equal_groups():
+    sizes = effect_sizes([([3, 1, 0, 3], [0, 1, 3]), ([3, 1, 0, 3], [0, 1, 3, 1])])
+
+    assert np.isfinite(sizes["cohen_d"]).all()
+    assert np.isnan(sizes["paired_d_z"][0]) and np.isnan(sizes["paired_d_av"][0])
+    assert np.isfinite(sizes["paired_d_z"][1]) and np.isfinite(sizes["paired_d_av"][1])
+
+
+@pytest.mark.parametrize("pair", [([1.0], [2.0]), ([], [1.0, 2.0]), ([], [])], ids=["one-each", "empty", "both-empty"])
+def test_too_small_groups_are_nan(pair):
+    with np.errstate(all="ignore"):
+        sizes = effect_sizes([pair, ([3, 1, 0], [0, 1, 1])])
+
+    for name in EFFECT_SIZES:
+        assert np.isnan(sizes[name][0]), name
+        assert np.isfinite(sizes[name][1]), name
+
+
+def test_groups_do_not_affect_each_other():
+    pairs = make_pairs()
+    together = effect_sizes(pairs)
+    for k, pair in enumerate(pairs):
+        alone = effect_sizes([pair])
+        for name in EFFECT_SIZES:
+            # Au bit près : chaque somme ne porte que sur les valeurs de son groupe
+            np.testing.assert_array_equal(alone[name][0], together[name][k])
+
+
+@pytest.mark.parametrize("paired", [False, True], ids=["per-team", "paired"])
+def test_home_away_effect_sizes_match_direct_computation(paired):
+    pairs = make_pairs(seed=1)
+    rows = []
+    for k, (home, away) in enumerate(pairs):
+        league, season = ("EPL", "Serie_A")[k % 2], 2014 + k
+        rows += [{"League": league, "Season": season, "Home_Away": "h", "xG": value} for value in home]
+        rows += [{"League": league, "Season": season, "Home_Away": "a", "xG": value} for value in away]
+    # Une saison sans match à l'extérieur
+    rows += [{"League": "RFPL", "Season": 2020, "Home_Away": "h", "xG": value} for value in [1.2, 0.4, 2.1]]
+    # Lignes mélangées : l'index regroupe par ligue, saison et lieu en gardant l'ordre des lignes
+    df = pd.DataFrame(rows).sample(frac=1.0, random_state=3).sort_values("Home_Away", kind="stable")
+    index = MatchIndex(df.reset_index(drop=True))
+
+    sizes = home_away_effect_sizes(index, index.column("xG"), paired=paired)
+    for league, season in sizes:
+        if league == "RFPL":
+            continue
+        expected = direct(index.values("xG", league, season, "h"), index.values("xG", league, season, "a"))
+        if not paired:
+            # Lignes par équipe : pas de mesures appariées
+            expected["paired_d_z"] = expected["paired_d_av"] = np.nan
+        for name in EFFECT_SIZES:
+            np.testing.assert_allclose(sizes[(league, season)][name], expected[name], rtol=1e-9, equal_nan=True,
+                                       err_msg=f"{league} {season} {name}")
+    assert len(sizes) == len(pairs) + 1
+    assert all(np.isnan(value) for value in sizes[("RFPL", 2020)].values())
+
+
+def test_large_offset_keeps_precision():
+    # Σx² - (Σx)² / n perd toute la variance sur des valeurs loin de zéro ; les carrés centrés non
+    pairs = [(a + 1e8, b + 1e8) for a, b in make_pairs(seed=2)[:4]]
+    sizes = effect_sizes(pairs)
+    for k, (a, b) in enumerate(pairs):
+        expected = direct(a, b)
+        for name in EFFECT_SIZES:
+            np.testing.assert_allclose(sizes[name][k], expected[name], rtol=1e-6, equal_nan=True,
+                                       err_msg=f"groupe {k} {name}")
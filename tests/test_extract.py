@@ -0,0 +1,108 @@
+"""
+Non-régression de `homeadv.extract` face aux méthodes qu'il remplace, sur
+des pages de ligue synthétiques (`homeadv.synthetic`) : expression régulière
+sur toute la page puis `codecs.escape_decode` (client `understat`) ou
+`unicode_escape` (ancien `scrap.py`), puis `json.loads`. Les noms d'équipe
+contiennent des guillemets, apostrophes, barres obliques inverses et
+caractères non ASCII, échappés en `\\xNN` comme sur Understat ou en `\\uXXXX`.
+"""
+import codecs
+import json
+import re
+
+import pytest
+
+from homeadv.extract import extract_json_blobs, extract_teams_data
+from homeadv.synthetic import SyntheticUnderstat
+
+
+BLOCKS = ["datesData", "teamsData", "playersData"]
+TITLES = ["Borussia M.Gladbach", "Atlético Madrid", "FC Köln", "Saint-Étienne", "Spartak Moskva",
+          "Brighton & Hove", 'The "Reds"', "Nott'm Forest", "Back\\slash", "Dynamo Москва"]
+PAGES = [("EPL", 2019), ("Bundesliga", 2020), ("La_liga", 2021)]
+
+
+class NamedUnderstat(SyntheticUnderstat):
+    """Données synthétiques avec les noms d'équipe de `TITLES`."""
+
+    def __init__(self, ascii_escapes=False):
+        super().__init__(teams=len(TITLES))
+        self.ascii_escapes = ascii_escapes
+
+    def team_titles(self, league):
+        return list(TITLES)
+
+    def league_page(self, league, season, filler=20):
+        if not self.ascii_escapes:
+            return super().league_page(league, season, filler)
+        # Variante : caractères non ASCII en \uXXXX dans le JSON, le reste en \xNN
+        data = self.league_data(league, season)
+        scripts = "\n".join(
+            f"<script>\n\tvar {name} = JSON.parse('{_ascii_escaped(data[key])}');\n</script>"
+            for name, key in [("datesData", "dates"), ("teamsData", "teams"), ("playersData", "players")])
+        return f"<html><body>\n{scripts}\n</body></html>"
+
+
+def _ascii_escaped(value):
+    raw = json.dumps(value, separators=(",", ":"))
+    return "".join(char if char.isalnum() else f"\\x{ord(char):02X}" for char in raw)
+
+
+def understat_blob(html, name):
+    """Méthode du client `understat` 0.1.12 (`find_match` + `decode_data`)."""
+    match = re.search(r"{}\s+=\s+JSON.parse\(\'(.*?)\'\)".format(name), html)
+    if not match:
+        return None
+    return json.loads(codecs.escape_decode(match.group(1))[0].decode("utf-8"))
+
+
+def scrap_teams_data(html):
+    """Méthode historique de `scrap.py`."""
+    match = re.search(r"var teamsData\s*=\s*JSON\.parse\(\'(.*?)\'\);", html)
+    if not match:
+        return None
+    return json.loads(bytes(match.group(1), "utf-8").decode("unicode_escape"))
+
+
+def _titles(teams_data):
+    return {team["title"] for team in teams_data.values()}
+
+
+@pytest.mark.parametrize("ascii_escapes", [False, True], ids=["utf8-bytes", "unicode-escapes"])
+@pytest.mark.parametrize("league, season", PAGES)
+def test_blobs_match_understat_client(league, season, ascii_escapes):
+    html = NamedUnderstat(ascii_escapes).league_page(league, season)
+    blobs = extract_json_blobs(html)
+
+    assert list(blobs) == BLOCKS
+    for name in BLOCKS:
+        assert blobs[name] == understat_blob(html, name)
+    assert _titles(blobs["teamsData"]) == set(TITLES)
+
+
+@pytest.mark.parametrize("league, season", PAGES)
+def test_teams_data_matches_scrap_with_unicode_escapes(league, season):
+    html = NamedUnderstat(ascii_escapes=True).league_page(league, season)
+    assert extract_teams_data(html) == scrap_teams_data(html)
+
+
+def test_teams_data_matches_scrap_for_ascii_titles():
+    html = SyntheticUnderstat().league_page("EPL", 2020)
+    assert extract_teams_data(html) == scrap_teams_data(html)
+
+
+def test_utf8_escapes_are_decoded_once():
+    # `unicode_escape` lit chaque octet \xNN comme un caractère latin-1 : "Ã©" au lieu de "é"
+    html = NamedUnderstat().league_page("La_liga", 2020)
+    legacy, teams = scrap_teams_data(html), extract_teams_data(html)
+
+    assert _titles(teams) == set(TITLES)
+    assert _titles(legacy) == {title.encode("utf-8").decode("latin-1") for title in TITLES}
+    for team_id, team in teams.items():
+        assert team["history"] == legacy[team_id]["history"]
+
+
+def test_selected_and_missing_blocks():
+    html = NamedUnderstat().league_page("EPL", 2020)
+    assert list(extract_json_blobs(html, names=("teamsData",))) == ["teamsData"]
+    assert extract_teams_data("<html><script>var datesData = JSON.parse('\\x5B\\x5D');</script></html>") is None
@@ -0,0 +1,174 @@
+"""
+`homeadv.fetch` face au serveur Understat local (`homeadv.stub`) : résultats
+rangés par (ligue, saison), concurrence bornée, débit limité, nouvelles
+tentatives sur `RETRY_EXCEPTIONS` et propagation des erreurs selon
+`skip_errors`.
+"""
+import asyncio
+import itertools
+import threading
+import time
+from collections import Counter
+
+import aiohttp
+import pytest
+from understat import Understat
+
+from homeadv.fetch import UnderstatSession, ThrottledUnderstat, fetch_league_results, host_limiter
+from homeadv.stub import StubServer
+
+
+LEAGUES = ["EPL", "La_liga"]
+SEASONS = [2019, 2020, 2021]
+MISSING_SEASON = 0  # hors des saisons servies : 404 à chaque requête
+
+_hosts = itertools.count()
+
+
+class FlakyStub(StubServer):
+    """Serveur local dont les `failures` premières requêtes de chaque page échouent."""
+
+    def __init__(self, failures, **options):
+        super().__init__(**options)
+        self.failures = failures
+        self.attempts = Counter()
+        self._attempts_lock = threading.Lock()
+
+    def respond(self, path, headers):
+        with self._attempts_lock:
+            self.attempts[path] += 1
+            failed = self.attempts[path] <= self.failures
+        if failed:
+            self._count(self.error_status)
+            return self.error_status, "text/plain", b"Synthetic error", {}
+        return super().respond(path, headers)
+
+
+class CountingUnderstat:
+    """Client Understat qui compte ses appels et le plus grand nombre d'appels simultanés."""
+
+    def __init__(self):
+        self.understat = None
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def get_league_results(self, league, season):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            return await self.understat.get_league_results(league, season)
+        finally:
+            self.active -= 1
+
+
+def run_fetch(stub, counter, leagues=LEAGUES, seasons=SEASONS, skip_errors=False, **options):
+    """`fetch_league_results` en HTTP depuis `stub`, sans délai entre les tentatives par défaut."""
+    options = {"rate": None, "backoff": 0.0, **options}
+
+    async def fetch():
+        async with aiohttp.ClientSession() as session:
+            counter.understat = Understat(UnderstatSession(session, stub.url))
+            # Un hôte par appel : les limiteurs de débit ne sont pas partagés entre les tests
+            client = ThrottledUnderstat(counter, host=f"test-{next(_hosts)}", **options)
+            return await fetch_league_results(client, leagues, seasons, skip_errors=skip_errors)
+
+    return asyncio.run(fetch())
+
+
+def test_results_match_stub_data():
+    counter = CountingUnderstat()
+    with StubServer() as stub:
+        fixtures = run_fetch(stub, counter)
+
+    keys = [(league, season) for league in LEAGUES for season in SEASONS]
+    assert list(fixtures) == keys
+    for league, season in keys:
+        assert fixtures[(league, season)] == stub.generator.fixtures(league, season)
+    assert counter.calls == len(keys)
+    assert stub.stats[200] == len(keys)
+
+
+def test_concurrency_is_bounded():
+    counter = CountingUnderstat()
+    with StubServer(latency=0.05) as stub:
+        fixtures = run_fetch(stub, counter, concurrency=2)
+
+    assert len(fixtures) == len(LEAGUES) * len(SEASONS)
+    assert counter.max_active == 2
+
+
+def test_rate_is_limited():
+    counter = CountingUnderstat()
+    with StubServer() as stub:
+        start = time.monotonic()
+        run_fetch(stub, counter, rate=20.0)
+        elapsed = time.monotonic() - start
+
+    # Six départs espacés d'au moins 1/20 s
+    assert elapsed >= 5 / 20.0
+
+
+def test_transient_errors_are_retried():
+    counter = CountingUnderstat()
+    with FlakyStub(failures=2) as stub:
+        fixtures = run_fetch(stub, counter, retries=3)
+
+    keys = [(league, season) for league in LEAGUES for season in SEASONS]
+    assert list(fixtures) == keys
+    assert fixtures[("EPL", 2020)] == stub.generator.fixtures("EPL", 2020)
+    # Deux échecs puis un succès par page
+    assert counter.calls == 3 * len(keys)
+    assert stub.stats[503] == 2 * len(keys)
+    assert set(stub.attempts.values()) == {3}
+
+
+def test_persistent_errors_are_skipped():
+    counter = CountingUnderstat()
+    with StubServer() as stub:
+        fixtures = run_fetch(stub, counter, seasons=[2020, MISSING_SEASON], skip_errors=True, retries=2)
+
+    assert list(fixtures) == [(league, 2020) for league in LEAGUES]
+    # Une réponse 404 (ClientResponseError) est réessayée jusqu'à épuisement
+    assert stub.stats[404] == 3 * len(LEAGUES)
+    assert counter.calls == len(LEAGUES) + 3 * len(LEAGUES)
+
+
+def test_persistent_errors_propagate():
+    counter = CountingUnderstat()
+    with StubServer() as stub:
+        with pytest.raises(aiohttp.ClientResponseError) as excinfo:
+            run_fetch(stub, counter, seasons=[2020, MISSING_SEASON], retries=1)
+    assert excinfo.value.status == 404
+
+
+def test_rate_limited_responses_are_retried():
+    counter = CountingUnderstat()
+    with FlakyStub(failures=1, error_status=429) as stub:
+        fixtures = run_fetch(stub, counter, seasons=[2020], retries=1)
+
+    assert list(fixtures) == [(league, 2020) for league in LEAGUES]
+    assert stub.stats[429] == len(LEAGUES)
+
+
+def test_other_errors_are_not_retried():
+    class BrokenUnderstat:
+        calls = 0
+
+        async def get_league_results(self, league, season):
+            BrokenUnderstat.calls += 1
+            raise KeyError("dates")
+
+    client = ThrottledUnderstat(BrokenUnderstat(), rate=None, backoff=0.0, host=f"test-{next(_hosts)}")
+    with pytest.raises(KeyError):
+        asyncio.run(fetch_league_results(client, ["EPL"], [2020]))
+    assert BrokenUnderstat.calls == 1
+
+
+def test_host_limiter_has_one_rate_per_host():
+    host = f"test-{next(_hosts)}"
+    limiter = host_limiter(host, 2.0)
+    assert host_limiter(host, 2.0) is limiter
+    with pytest.raises(ValueError):
+        host_limiter(host, 3.0)
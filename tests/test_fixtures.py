@@ -0,0 +1,139 @@
+"""
+Non-régression de `homeadv.fixtures.FixtureTable` face aux boucles qu'il
+remplace (`getHomeAwayResultPerMatch` / `calculate_xpts` des scripts), sur
+des matchs synthétiques (`homeadv.synthetic`) : points, xPTS et xG match par
+match, totaux domicile / extérieur par ligue et saison, et retour exact des
+colonnes float32 aux valeurs des chaînes Understat (`exact`).
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from homeadv.fixtures import FixtureTable
+from homeadv.synthetic import SyntheticUnderstat
+
+
+LEAGUES = ["EPL", "Bundesliga", "RFPL"]
+SEASONS = [2014, 2018, 2023]
+SOURCES = {"xg_home": ("xG", "h"), "xg_away": ("xG", "a"),
+           "forecast_w": ("forecast", "w"), "forecast_d": ("forecast", "d"), "forecast_l": ("forecast", "l")}
+
+
+def calculate_xpts(forecast):
+    home_xpts = (float(forecast['w']) * 3) + (float(forecast['d']) * 1) + (float(forecast['l']) * 0)
+    away_xpts = (float(forecast['l']) * 3) + (float(forecast['d']) * 1) + (float(forecast['w']) * 0)
+    return home_xpts, away_xpts
+
+
+def getHomeAwayResultPerMatch(result, home, away, xpts_home, xpts_away, xg_home, xg_away):
+    """Boucle historique des scripts Understat, match par match."""
+    if int(result['goals']['h']) > int(result['goals']['a']):
+        home.append(3)
+        away.append(0)
+    elif int(result['goals']['h']) < int(result['goals']['a']):
+        home.append(0)
+        away.append(3)
+    else:
+        home.append(1)
+        away.append(1)
+
+    home_xpts, away_xpts = calculate_xpts(result['forecast'])
+    xpts_home.append(home_xpts)
+    xpts_away.append(away_xpts)
+
+    xg_home.append(float(result['xG']['h']))
+    xg_away.append(float(result['xG']['a']))
+
+
+def legacy_arrays(fixtures):
+    home, away, xpts_home, xpts_away, xg_home, xg_away = [], [], [], [], [], []
+    for fixture in fixtures:
+        getHomeAwayResultPerMatch(fixture, home, away, xpts_home, xpts_away, xg_home, xg_away)
+    return {"points_home": home, "points_away": away, "xpts_home": xpts_home, "xpts_away": xpts_away,
+            "xg_home": xg_home, "xg_away": xg_away}
+
+
+@pytest.fixture(scope="module")
+def fixtures_by_season():
+    generator = SyntheticUnderstat()
+    return {(league, season): generator.fixtures(league, season) for league in LEAGUES for season in SEASONS}
+
+
+def test_home_away_arrays_match_legacy_loop(fixtures_by_season):
+    arrays = FixtureTable.from_fixtures(fixtures_by_season).home_away_arrays()
+
+    assert list(arrays) == list(fixtures_by_season)
+    for key, fixtures in fixtures_by_season.items():
+        expected = legacy_arrays(fixtures)
+        for name, values in expected.items():
+            # Égalité exacte : mêmes valeurs, donc mêmes ex-aequo dans les tests de rangs
+            np.testing.assert_array_equal(arrays[key][name], np.array(values), err_msg=f"{key} {name}")
+
+
+def test_season_totals_match_legacy_sums(fixtures_by_season):
+    totals = FixtureTable.from_fixtures(fixtures_by_season).season_totals()
+
+    rows = []
+    for (league, season), fixtures in fixtures_by_season.items():
+        values = legacy_arrays(fixtures)
+        rows.append({"League": league, "Season": season,
+                     "points_home": sum(values["points_home"]), "points_away": sum(values["points_away"]),
+                     "xpoints_home": sum(values["xpts_home"]), "xpoints_away": sum(values["xpts_away"]),
+                     "matchs_home": len(fixtures), "matchs_away": len(fixtures)})
+    pd.testing.assert_frame_equal(totals, pd.DataFrame(rows), check_dtype=False, check_exact=True)
+
+
+def test_exact_returns_source_values(fixtures_by_season):
+    table = FixtureTable.from_fixtures(fixtures_by_season)
+    records = [fixture for fixtures in fixtures_by_season.values() for fixture in fixtures]
+
+    for name, (field, side) in SOURCES.items():
+        assert table.column(name).dtype == np.float32
+        exact = table.exact(name)
+        assert exact.dtype == np.float64
+        np.testing.assert_array_equal(exact, [float(fixture[field][side]) for fixture in records], err_msg=name)
+
+
+def test_exact_keeps_understat_strings():
+    # Écritures réelles d'Understat : jusqu'à 7 chiffres significatifs, zéros de tête
+    strings = ["0.0710382", "2.59987", "0.9129", "1.15479", "0.00617843", "3.28351", "0", "0.1", "4.76537"]
+    fixture = {"h": {"title": "A"}, "a": {"title": "B"}, "goals": {"h": "1", "a": "0"},
+               "forecast": {"w": "0.5", "d": "0.3", "l": "0.2"}}
+    fixtures = [{**fixture, "xG": {"h": value, "a": value}} for value in strings]
+    table = FixtureTable.from_fixtures({("EPL", 2020): fixtures})
+
+    np.testing.assert_array_equal(table.exact("xg_home"), [float(value) for value in strings])
+    assert [repr(float(value)) for value in table.exact("xg_away")] == [repr(float(value)) for value in strings]
+
+
+def test_values_and_subset_keep_season_ranges(fixtures_by_season):
+    table = FixtureTable.from_fixtures(fixtures_by_season)
+    keys = [("RFPL", 2023), ("EPL", 2014)]
+    subset = table.subset(keys)
+
+    assert subset.keys() == keys
+    for key in keys:
+        np.testing.assert_array_equal(subset.values("points_home", *key), table.values("points_home", *key))
+        np.testing.assert_array_equal(subset.values("xpts_away", *key), table.values("xpts_away", *key))
+        assert [subset.teams[code] for code in subset.values("team_home", *key)] == \
+            [fixture["h"]["title"] for fixture in fixtures_by_season[key]]
+    assert subset.fingerprint(keys) == table.fingerprint(keys)
+    assert len(table.values("points_home", "EPL", 1999)) == 0
+
+
+def test_long_strings_stay_float64():
+    # Plus de 7 chiffres significatifs : float32 ne retrouve pas la chaîne
+    strings = ["0.123456789", "2.59987", "1.000000001"]
+    fixture = {"h": {"title": "A"}, "a": {"title": "B"}, "goals": {"h": "1", "a": "0"},
+               "forecast": {"w": "0.5", "d": "0.3", "l": "0.2"}}
+    fixtures = [{**fixture, "xG": {"h": value, "a": "0.5"}} for value in strings]
+    short = [{**fixture, "xG": {"h": "1.25", "a": "0.5"}}]
+    table = FixtureTable.from_fixtures({("EPL", 2020): fixtures, ("EPL", 2021): short})
+
+    assert table.column("xg_home").dtype == np.float64
+    assert table.column("xg_away").dtype == table.column("forecast_w").dtype == np.float32
+    np.testing.assert_array_equal(table.exact("xg_home"), [float(value) for value in strings] + [1.25])
+    # L'empreinte d'une saison ne dépend pas du type choisi à cause d'une autre saison
+    alone = FixtureTable.from_fixtures({("EPL", 2021): short})
+    assert alone.column("xg_home").dtype == np.float32
+    assert alone.fingerprint([("EPL", 2021)]) == table.fingerprint([("EPL", 2021)])
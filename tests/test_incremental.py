@@ -0,0 +1,185 @@
+"""
+Mode incrémental du pipeline (`homeadv.incremental`, `homeadv.pipeline`) :
+une étape dont l'empreinte n'a pas changé est sautée et son résultat relu,
+un fichier produit supprimé force sa reconstruction, et une analyse par
+ligue et saison (`_season_rows`) ne recalcule que les lignes des couples
+(ligue, saison) dont les matchs ont changé. Avec plusieurs étapes à la fois,
+les bootstraps et tests de permutation restent dans le fil de leur étape.
+"""
+import copy
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import homeadv.fixtures
+import homeadv.pipeline
+from homeadv.fixtures import FixtureTable, load_fixture_table, share_fixture_table
+from homeadv.incremental import BuildState
+from homeadv.pipeline import Stage, _season_rows, run_pipeline
+from homeadv.synthetic import SyntheticUnderstat
+
+
+SCRIPT = "reproduction/wilcoxon_with_undestat.py"
+SEASONS = range(2014, 2016)
+
+
+@pytest.fixture(autouse=True)
+def reset_state(monkeypatch):
+    # `run_pipeline` garde son `BuildState` dans le module : restauré après chaque test
+    monkeypatch.setattr(homeadv.pipeline, "_state", None)
+
+
+class Counting:
+    """Fonction d'étape qui compte ses appels et retourne `value`."""
+
+    def __init__(self, value=None):
+        self.calls = 0
+        self.value = value
+
+    def __call__(self, inputs):
+        self.calls += 1
+        return self.value
+
+
+def test_unchanged_fingerprint_skips_stage(tmp_path):
+    data = {"version": 1}
+    statistics = Counting(pd.DataFrame({"League": ["EPL"], "value": [1.5]}))
+    figures = Counting()
+    stages = [Stage("statistics:test", [], statistics, fingerprint=lambda inputs: [data["version"]]),
+              Stage("figures:test", ["statistics:test"], figures,
+                    fingerprint=lambda inputs: [inputs["statistics:test"].to_dict()])]
+
+    report = run_pipeline(stages, workers=1, state=BuildState(str(tmp_path)))
+    assert {name: status for name, (status, _) in report.items()} == {"statistics:test": "ok", "figures:test": "ok"}
+
+    # Nouvelle exécution, état relu depuis le disque : tout est à jour
+    report = run_pipeline(stages, workers=1, state=BuildState(str(tmp_path)))
+    assert {name: status for name, (status, _) in report.items()} == {"statistics:test": "fresh",
+                                                                       "figures:test": "fresh"}
+    assert statistics.calls == figures.calls == 1
+
+    data["version"] = 2
+    report = run_pipeline(stages, workers=1, state=BuildState(str(tmp_path)))
+    assert report["statistics:test"][0] == "ok"
+    # Même résultat : les figures restent à jour
+    assert report["figures:test"][0] == "fresh"
+    assert statistics.calls == 2 and figures.calls == 1
+
+
+def test_missing_output_forces_rebuild(tmp_path):
+    output = tmp_path / "figure.png"
+
+    def draw(inputs):
+        output.write_bytes(b"png")
+
+    figures = Counting()
+    stages = [Stage("figures:test", [], lambda inputs: (figures(inputs), draw(inputs)),
+                    fingerprint=lambda inputs: ["inchangé"], outputs=[str(output)])]
+    state_dir = str(tmp_path / "state")
+
+    assert run_pipeline(stages, workers=1, state=BuildState(state_dir))["figures:test"][0] == "ok"
+    assert run_pipeline(stages, workers=1, state=BuildState(state_dir))["figures:test"][0] == "fresh"
+    output.unlink()
+    assert run_pipeline(stages, workers=1, state=BuildState(state_dir))["figures:test"][0] == "ok"
+    assert output.exists()
+    assert figures.calls == 2
+
+
+def test_missing_result_forces_rebuild(tmp_path):
+    statistics = Counting(42)
+    stages = [Stage("statistics:test", [], statistics, fingerprint=lambda inputs: ["inchangé"])]
+    state = BuildState(str(tmp_path))
+    run_pipeline(stages, workers=1, state=state)
+    os.remove(state._result_path("statistics:test"))
+
+    assert run_pipeline(stages, workers=1, state=BuildState(str(tmp_path)))["statistics:test"][0] == "ok"
+    assert statistics.calls == 2
+
+
+@pytest.fixture
+def season_rows(monkeypatch, tmp_path):
+    """
+    `_season_rows` en mode incrémental sur des matchs synthétiques partagés,
+    avec une analyse qui somme les points de chaque ligue et saison.
+    Retourne (exécuter, fixtures d'origine, couples calculés à chaque exécution).
+    """
+    generator = SyntheticUnderstat(teams=6)
+    fixtures = {(league, season): generator.fixtures(league, season)
+                for league in homeadv.pipeline.LEAGUES for season in SEASONS}
+    computed = []
+
+    async def compute_results(keys=None):
+        computed.append(list(keys))
+        leagues = list(dict.fromkeys(league for league, _ in keys))
+        table = (await load_fixture_table(leagues, sorted({season for _, season in keys}))).subset(keys)
+        return pd.DataFrame([{"League": league, "Season": season,
+                              "points_home": int(table.values("points_home", league, season).sum()),
+                              "xpts_home": float(table.values("xpts_home", league, season).sum())}
+                             for league, season in keys])
+
+    monkeypatch.setattr(homeadv.pipeline, "_call", lambda path, function, **kwargs: compute_results(**kwargs))
+    statistics = _season_rows("test", "compute_results", SEASONS)
+
+    def run(fixtures_by_season):
+        # Une exécution du pipeline par processus : tables analysées repartant de zéro
+        monkeypatch.setattr(homeadv.fixtures, "_tables", {})
+        monkeypatch.setattr(homeadv.fixtures, "_shared", [])
+        share_fixture_table(FixtureTable.from_fixtures(fixtures_by_season))
+        monkeypatch.setattr(homeadv.pipeline, "_state", BuildState(str(tmp_path)))
+        result = statistics(SCRIPT)
+        homeadv.pipeline._state.save()
+        return result
+
+    return run, fixtures, computed
+
+
+def test_season_rows_recompute_only_changed_partitions(season_rows):
+    run, fixtures, computed = season_rows
+    keys = list(fixtures)
+
+    first = run(fixtures)
+    assert computed == [keys]
+    assert list(zip(first["League"], first["Season"])) == keys
+
+    # Mêmes matchs : aucune ligne recalculée
+    pd.testing.assert_frame_equal(run(fixtures), first)
+    assert len(computed) == 1
+
+    # Un seul match modifié dans une seule ligue et saison
+    changed_key = ("EPL", 2015)
+    changed = copy.deepcopy(fixtures)
+    fixture = changed[changed_key][0]
+    fixture["goals"] = {"h": str(int(fixture["goals"]["h"]) + 5), "a": fixture["goals"]["a"]}
+    second = run(changed)
+
+    assert computed[1] == [changed_key]
+    assert list(zip(second["League"], second["Season"])) == keys
+    row = keys.index(changed_key)
+    others = [k for k in range(len(keys)) if k != row]
+    pd.testing.assert_frame_equal(second.iloc[others], first.iloc[others])
+    expected = FixtureTable.from_fixtures({changed_key: changed[changed_key]}).column("points_home").sum()
+    assert second["points_home"][row] == expected != first["points_home"][row]
+    assert np.isclose(second["xpts_home"][row], first["xpts_home"][row])
+
+
+def test_season_rows_rebuild_missing_results(season_rows):
+    run, fixtures, computed = season_rows
+    first = run(fixtures)
+    state = homeadv.pipeline._state
+    os.remove(state._result_path("statistics:test/RFPL/2014"))
+
+    pd.testing.assert_frame_equal(run(fixtures), first)
+    assert computed[1] == [("RFPL", 2014)]
+
+
+@pytest.mark.parametrize("workers, expected", [(4, "1"), (1, None)])
+def test_parallel_stages_keep_bootstrap_in_stage(monkeypatch, tmp_path, workers, expected):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MPLBACKEND", "Agg")
+    for variable in ["HOMEADV_BOOTSTRAP_WORKERS", "HOMEADV_PERMUTATION_WORKERS"]:
+        monkeypatch.delenv(variable, raising=False)
+
+    assert homeadv.pipeline.main(["--list", "--workers", str(workers)]) == 0
+    assert os.environ.get("HOMEADV_BOOTSTRAP_WORKERS") == os.environ.get("HOMEADV_PERMUTATION_WORKERS") == expected
@@ -0,0 +1,92 @@
+"""
+`homeadv.mannwhitney.mann_whitney_matrix` face à `scipy.stats.mannwhitneyu`
+(options par défaut) pour chaque couple de saisons : saisons de tailles
+différentes, valeurs continues ou avec ex-aequo, loi exacte (une saison
+d'au plus 8 valeurs, sans ex-aequo) et approximation normale. Ces cas ne
+dépendent pas de la version de SciPy (1.14 et suivantes).
+"""
+import itertools
+
+import numpy as np
+import pytest
+from scipy.stats import mannwhitneyu
+
+from homeadv.mannwhitney import mann_whitney_matrix
+
+
+def _continuous(*sizes, shift=0.0):
+    def make(rng):
+        return [rng.normal(k * shift, 1, size) for k, size in enumerate(sizes)]
+    return make
+
+
+def _rounded(*sizes, decimals=1):
+    def make(rng):
+        # Ex-aequo entre saisons et dans une même saison : les xPTS arrondis
+        return [np.round(rng.uniform(0, 3, size), decimals) for size in sizes]
+    return make
+
+
+def _points(*sizes):
+    def make(rng):
+        return [rng.choice([0, 1, 3], size, p=[0.3, 0.25, 0.45]) for size in sizes]
+    return make
+
+
+CASES = {
+    # Loi exacte : une saison d'au plus 8 valeurs, aucun ex-aequo
+    "exact-1x1": _continuous(1, 1),
+    "exact-3x4": _continuous(3, 4),
+    "exact-8x8": _continuous(8, 8),
+    "exact-5x8x2": _continuous(5, 8, 2),
+    "exact-8x40-shift": _continuous(8, 40, shift=0.7),
+    "exact-2x7x30x6": _continuous(2, 7, 30, 6),
+    # Approximation normale : deux saisons de plus de 8 valeurs
+    "approx-9x9": _continuous(9, 9),
+    "approx-20x35x12": _continuous(20, 35, 12),
+    "approx-190x190x190": _continuous(190, 190, 190, shift=0.1),
+    "approx-mixed-sizes": _continuous(9, 380, 50, 120),
+    # Ex-aequo : approximation normale corrigée des ex-aequo
+    "ties-6x7": _rounded(6, 7, decimals=0),
+    "ties-3x8x5": _rounded(3, 8, 5),
+    "ties-points-4x9": _points(4, 9),
+    "ties-20x30": _rounded(20, 30),
+    "ties-190x190x190": _rounded(190, 190, 190, decimals=2),
+    "ties-points-38x19x76": _points(38, 19, 76),
+}
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_matches_scipy(name):
+    samples = CASES[name](np.random.default_rng(list(CASES).index(name)))
+    statistics, pvalues = mann_whitney_matrix(samples, method="auto")
+
+    for i, j in itertools.permutations(range(len(samples)), 2):
+        expected_statistic, expected_pvalue = mannwhitneyu(samples[i], samples[j])
+        assert statistics[i, j] == expected_statistic
+        assert pvalues[i, j] == pytest.approx(expected_pvalue, rel=1e-9, abs=1e-15)
+    assert np.isnan(np.diag(pvalues)).all()
+
+
+@pytest.mark.parametrize("name", [name for name in CASES if not name.startswith("ties")])
+def test_exact_method_matches_scipy_exact(name):
+    # Sans ex-aequo, la loi exacte sachant les ex-aequo est la loi exacte de SciPy
+    samples = CASES[name](np.random.default_rng(list(CASES).index(name)))
+    statistics, pvalues = mann_whitney_matrix(samples, method="exact")
+
+    for i, j in itertools.permutations(range(len(samples)), 2):
+        expected_statistic, expected_pvalue = mannwhitneyu(samples[i], samples[j], method="exact")
+        assert statistics[i, j] == expected_statistic
+        assert pvalues[i, j] == pytest.approx(expected_pvalue, rel=1e-9, abs=1e-15)
+
+
+def test_empty_season():
+    rng = np.random.default_rng(0)
+    samples = [rng.normal(size=10), np.array([]), rng.normal(size=12)]
+    statistics, pvalues = mann_whitney_matrix(samples, method="auto")
+
+    assert np.isnan(statistics[1]).all() and np.isnan(statistics[:, 1]).all()
+    assert np.isnan(pvalues[1]).all() and np.isnan(pvalues[:, 1]).all()
+    expected_statistic, expected_pvalue = mannwhitneyu(samples[0], samples[2])
+    assert statistics[0, 2] == expected_statistic
+    assert pvalues[0, 2] == pytest.approx(expected_pvalue, rel=1e-9)
@@ -0,0 +1,133 @@
+"""
+Lois exactes de `homeadv.nulldist` face à l'énumération des permutations
+pour de petits échantillons avec ex-aequo, p-value bilatérale, mémoire LRU
+et enregistrement sur disque (une loi relue est identique au bit près).
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+import homeadv.nulldist as nulldist
+from homeadv.nulldist import rank_sum_null, signed_rank_null, tie_structure, two_sided_pvalue
+
+
+TIES = [
+    ((1, 1),),
+    ((1, 6),),
+    ((2, 1), (1, 3)),
+    ((1, 2), (3, 1), (1, 2), (2, 2)),
+    ((4, 1), (2, 1), (5, 1)),
+    ((3, 3),),
+]
+
+
+def _doubled_ranks(ties):
+    """Rang moyen doublé de chaque valeur, suite par suite."""
+    sizes = [size for size, repeat in ties for _ in range(repeat)]
+    before = np.cumsum(sizes) - sizes
+    return np.repeat(2 * before + np.array(sizes) + 1, sizes)
+
+
+def _histogram(statistics, length):
+    pmf = np.bincount(np.asarray(statistics, dtype=np.int64), minlength=length).astype(np.float64)
+    return pmf / pmf.sum()
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Lois enregistrées dans un dossier temporaire, mémoire LRU vide avant et après le test."""
+    monkeypatch.setattr(nulldist, "CACHE_DIR", str(tmp_path))
+    signed_rank_null.cache_clear()
+    rank_sum_null.cache_clear()
+    yield tmp_path
+    signed_rank_null.cache_clear()
+    rank_sum_null.cache_clear()
+
+
+@pytest.mark.parametrize("ties", TIES)
+def test_signed_rank_matches_enumeration(ties, cache_dir):
+    ranks = _doubled_ranks(ties)
+    statistics = [ranks[list(signs)].sum() for signs in itertools.product([False, True], repeat=len(ranks))]
+    expected = _histogram(statistics, ranks.sum() + 1)
+
+    np.testing.assert_allclose(signed_rank_null(ties), expected, rtol=1e-12, atol=1e-15)
+
+
+@pytest.mark.parametrize("ties", TIES)
+def test_rank_sum_matches_enumeration(ties, cache_dir):
+    ranks = _doubled_ranks(ties)
+    n = len(ranks)
+    for n1 in range(1, n):
+        offset = n1 * (n1 + 1)
+        statistics = [ranks[list(subset)].sum() - offset for subset in itertools.combinations(range(n), n1)]
+        expected = _histogram(statistics, 2 * n1 * (n - n1) + 1)
+
+        np.testing.assert_allclose(rank_sum_null(n1, ties), expected, rtol=1e-12, atol=1e-15)
+
+
+def test_rank_sum_too_many_states(cache_dir, monkeypatch):
+    monkeypatch.setattr(nulldist, "MAX_STATES", 100)
+    ties = ((2, 20),)
+    assert rank_sum_null(20, ties) is None
+    # None est enregistré aussi : relu du disque sans être recalculé
+    rank_sum_null.cache_clear()
+    monkeypatch.setattr(nulldist, "_rank_sum_pmf", _not_computed)
+    assert rank_sum_null(20, ties) is None
+
+
+def test_tie_structure():
+    assert tie_structure([]) == ()
+    assert tie_structure([1, 1, 1]) == ((1, 3),)
+    assert tie_structure([1, 2, 2, 1, 3]) == ((1, 1), (2, 2), (1, 1), (3, 1))
+
+
+def test_two_sided_pvalue():
+    # Trois différences distinctes : 2 R+ vaut 0, 2, 4, 6, 6, 8, 10 ou 12
+    pmf = signed_rank_null(((1, 3),))
+    assert two_sided_pvalue(pmf, 12) == 2 / 8
+    assert two_sided_pvalue(pmf, 0) == 2 / 8
+    assert two_sided_pvalue(pmf, 2) == 4 / 8
+    # Au centre, les deux queues dépassent 1/2 : p-value bornée à 1
+    assert two_sided_pvalue(pmf, 6) == 1.0
+
+
+def test_lru_returns_the_same_array(cache_dir):
+    ties = ((2, 1), (1, 3))
+    first = signed_rank_null(ties)
+    assert signed_rank_null(ties) is first
+    assert signed_rank_null.cache_info().hits == 1
+    assert rank_sum_null(2, ties) is rank_sum_null(2, ties)
+
+
+def _not_computed(*args):
+    raise AssertionError("loi recalculée au lieu d'être relue du disque")
+
+
+@pytest.mark.parametrize("ties", TIES)
+def test_reload_from_disk_is_identical(ties, cache_dir, monkeypatch):
+    n = sum(size * repeat for size, repeat in ties)
+    signed = signed_rank_null(ties)
+    sums = [rank_sum_null(n1, ties) for n1 in range(n + 1)]
+    assert list(cache_dir.rglob("*.npy"))
+
+    signed_rank_null.cache_clear()
+    rank_sum_null.cache_clear()
+    monkeypatch.setattr(nulldist, "_signed_rank_pmf", _not_computed)
+    monkeypatch.setattr(nulldist, "_rank_sum_pmf", _not_computed)
+
+    reloaded = signed_rank_null(ties)
+    assert reloaded is not signed
+    np.testing.assert_array_equal(reloaded, signed)
+    for n1, pmf in enumerate(sums):
+        np.testing.assert_array_equal(rank_sum_null(n1, ties), pmf)
+
+
+def test_unreadable_file_is_recomputed(cache_dir):
+    ties = ((1, 5),)
+    expected = signed_rank_null(ties)
+    for path in cache_dir.rglob("*.npy"):
+        path.write_bytes(b"truncated")
+
+    signed_rank_null.cache_clear()
+    np.testing.assert_array_equal(signed_rank_null(ties), expected)
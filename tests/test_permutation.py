@@ -0,0 +1,190 @@
+"""
+`homeadv.permutation` face à l'énumération de toutes les permutations sur de
+petits échantillons avec ex-aequo : statistique, p-value bilatérale (deux
+fois la plus petite queue, comme `homeadv.nulldist.two_sided_pvalue`) et
+nombre de tirages. Les estimations Monte-Carlo doivent tomber à quelques
+`tolerance` près des p-values exactes.
+"""
+import itertools
+from math import comb
+
+import numpy as np
+import pytest
+from scipy.stats import rankdata
+
+import homeadv.permutation
+from homeadv.permutation import BATCH, label_permutation_test, sign_flip_test
+
+
+def _two_sided(null_statistics, observed):
+    null_statistics = np.asarray(null_statistics)
+    tail = min(np.mean(null_statistics <= observed), np.mean(null_statistics >= observed))
+    return min(2 * tail, 1.0)
+
+
+def brute_sign_flip(differences):
+    """(R+, p-value) en parcourant les 2^n signes des différences non nulles."""
+    d = np.asarray(differences, dtype=np.float64)
+    d = d[d != 0]
+    doubled = 2 * rankdata(np.abs(d))
+    observed = doubled[d > 0].sum()
+    null_statistics = [doubled[list(signs)].sum() for signs in itertools.product([False, True], repeat=len(d))]
+    return observed / 2, _two_sided(null_statistics, observed)
+
+
+def brute_label_permutation(x, y):
+    """(U de x, p-value) en parcourant les C(n, k) choix de la première saison."""
+    pooled = np.concatenate([x, y]).astype(np.float64)
+    doubled = 2 * rankdata(pooled)
+    k = len(x)
+    offset = k * (k + 1)
+    observed = doubled[:k].sum() - offset
+    null_statistics = [doubled[list(subset)].sum() - offset
+                       for subset in itertools.combinations(range(len(pooled)), k)]
+    return observed / 2, _two_sided(null_statistics, observed)
+
+
+def _differences(n, low, high):
+    def make(rng):
+        return rng.integers(low, high + 1, n)
+    return make
+
+
+def _points_differences(n):
+    def make(rng):
+        return rng.choice([0, 1, 3], n, p=[0.3, 0.25, 0.45]) - rng.choice([0, 1, 3], n, p=[0.45, 0.25, 0.3])
+    return make
+
+
+def _shifted(n, shift):
+    def make(rng):
+        return np.round(rng.normal(shift, 1, n), 1)
+    return make
+
+
+SIGN_CASES = {
+    "distinct-n8": lambda rng: rng.normal(0.5, 1, 8),
+    "ties-n10": _differences(10, -3, 3),
+    "ties-n14": _differences(14, -2, 4),
+    "points-n12": _points_differences(12),
+    "points-n16": _points_differences(16),
+    "rounded-n13": _shifted(13, 0.4),
+}
+
+
+def _seasons(n1, n2, values=None):
+    def make(rng):
+        if values is None:
+            return np.round(rng.uniform(0, 3, n1), 1), np.round(rng.uniform(0, 3, n2), 1)
+        return rng.choice(values, n1), rng.choice(values, n2)
+    return make
+
+
+LABEL_CASES = {
+    "distinct-4x5": lambda rng: (rng.normal(0, 1, 4), rng.normal(0.5, 1, 5)),
+    "points-5x6": _seasons(5, 6, [0, 1, 3]),
+    "points-7x7": _seasons(7, 7, [0, 1, 3]),
+    "goals-4x9": _seasons(4, 9, [0, 1, 2, 3]),
+    "rounded-6x8": _seasons(6, 8),
+    "rounded-8x4": _seasons(8, 4),
+}
+
+
+def _data(cases, name):
+    return cases[name](np.random.default_rng(list(cases).index(name)))
+
+
+@pytest.mark.parametrize("name", list(SIGN_CASES))
+def test_sign_flip_exact_matches_enumeration(name):
+    differences = _data(SIGN_CASES, name)
+    n = np.count_nonzero(differences)
+    statistics, pvalues, permutations = sign_flip_test({name: differences}, workers=1)
+
+    expected_statistic, expected_pvalue = brute_sign_flip(differences)
+    assert statistics[0] == expected_statistic
+    assert pvalues[0] == pytest.approx(expected_pvalue, rel=1e-12)
+    assert permutations[0] == 2 ** n
+
+
+@pytest.mark.parametrize("name", list(LABEL_CASES))
+def test_label_permutation_exact_matches_enumeration(name):
+    x, y = _data(LABEL_CASES, name)
+    statistics, pvalues, permutations = label_permutation_test({name: (x, y)}, workers=1)
+
+    expected_statistic, expected_pvalue = brute_label_permutation(x, y)
+    assert statistics[0] == expected_statistic
+    assert pvalues[0] == pytest.approx(expected_pvalue, rel=1e-12)
+    assert permutations[0] == comb(len(x) + len(y), len(x))
+
+
+def test_two_sided_pvalue_is_twice_the_smaller_tail():
+    # Trois différences positives distinctes : R+ = 6 est le maximum, atteint par 1 tirage sur 8
+    _, pvalues, _ = sign_flip_test({"all-positive": [1.0, 2.0, 3.0]}, workers=1)
+    assert pvalues[0] == 2 / 8
+    # Statistique au centre d'une loi discrète : les deux queues dépassent 1/2
+    _, pvalues, _ = sign_flip_test({"centre": [1.0, -2.0, -3.0, 4.0]}, workers=1)
+    assert pvalues[0] == 1.0
+
+
+def test_monte_carlo_stops_early_within_tolerance():
+    differences = {f"n40-{k}": np.random.default_rng(k).normal(0.3 * k, 1, 40) for k in range(4)}
+    tolerance = 0.01
+    _, exact, exact_permutations = sign_flip_test(differences, n_permutations=2 ** 40, workers=1)
+    assert (exact_permutations == 2 ** 40).all()
+
+    _, estimated, permutations = sign_flip_test(differences, n_permutations=200_000, tolerance=tolerance, workers=1)
+    assert (permutations < 200_000).all()
+    assert (permutations % BATCH == 0).all()
+    # `tolerance` est l'erreur type visée de la p-value
+    assert np.abs(estimated - exact).max() <= 4 * tolerance
+
+
+def test_monte_carlo_runs_all_permutations_without_tolerance():
+    differences = {"n30": np.random.default_rng(0).normal(0, 1, 30)}
+    _, _, permutations = sign_flip_test(differences, n_permutations=5 * BATCH, tolerance=0.0, workers=1)
+    assert permutations[0] == 5 * BATCH
+
+
+def test_label_permutation_monte_carlo_within_tolerance():
+    x, y = _data(LABEL_CASES, "points-7x7")
+    tolerance = 0.005
+    _, exact, _ = label_permutation_test({"points": (x, y)}, workers=1)
+    _, estimated, permutations = label_permutation_test({"points": (x, y)}, n_permutations=1000,
+                                                        tolerance=tolerance, workers=1)
+    assert permutations[0] < comb(14, 7)
+    # Au plus n_permutations tirages, arrondis au lot supérieur
+    assert permutations[0] <= BATCH
+    # Tolérance non atteinte en un lot : quatre erreurs types de la p-value à ce nombre de tirages
+    tail = exact[0] / 2
+    assert abs(estimated[0] - exact[0]) <= 4 * 2 * np.sqrt(tail * (1 - tail) / permutations[0])
+
+
+def test_label_permutation_falls_back_to_monte_carlo(monkeypatch):
+    # Loi exacte non calculable (trop d'états) : estimation Monte-Carlo malgré C(n, k) <= n_permutations
+    monkeypatch.setattr(homeadv.permutation, "rank_sum_null", lambda n1, ties: None)
+    x, y = _data(LABEL_CASES, "rounded-6x8")
+    tolerance = 0.01
+    statistics, pvalues, permutations = label_permutation_test({"rounded": (x, y)}, n_permutations=10 ** 6,
+                                                               tolerance=tolerance, workers=1)
+
+    expected_statistic, expected_pvalue = brute_label_permutation(x, y)
+    assert statistics[0] == expected_statistic
+    # Tirages Monte-Carlo, par lots, et non les C(n, k) sous-ensembles de la loi exacte
+    assert permutations[0] % BATCH == 0
+    assert abs(pvalues[0] - expected_pvalue) <= 4 * tolerance
+
+
+def test_groups_keep_their_results_across_workers():
+    groups = {name: _data(SIGN_CASES, name) for name in SIGN_CASES}
+    groups.update({f"n40-{k}": np.random.default_rng(k).normal(0, 1, 40) for k in range(3)})
+    single = sign_flip_test(groups, n_permutations=20_000, workers=1)
+    pooled = sign_flip_test(groups, n_permutations=20_000, workers=2)
+    for values, expected in zip(pooled, single):
+        np.testing.assert_array_equal(values, expected)
+
+
+def test_empty_groups():
+    statistics, pvalues, permutations = sign_flip_test({"zeros": [0.0, 0.0]}, workers=1)
+    assert np.isnan(statistics[0]) and np.isnan(pvalues[0]) and permutations[0] == 0
+    statistics, pvalues, permutations = label_permutation_test({"empty": ([], [1.0, 2.0])}, workers=1)
+    assert np.isnan(statistics[0]) and np.isnan(pvalues[0]) and permutations[0] == 0
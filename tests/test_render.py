@@ -0,0 +1,106 @@
+"""
+`homeadv.render` avec le backend Agg : les tâches de rendu des scripts
+produisent leurs fichiers (dans `tmp_path`) et ferment leurs figures, dans
+le processus courant comme dans le pool de processus, et les résultats sont
+rendus dans l'ordre des tâches.
+"""
+import matplotlib
+matplotlib.use("Agg")
+
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+import homeadv.render
+from homeadv.cache import ROOT_DIR
+from homeadv.render import figure_job, render_figures
+
+
+LEAGUES = ["EPL", "RFPL"]
+SEASONS = [2014, 2015, 2016]
+
+
+def script(path):
+    return os.path.join(ROOT_DIR, path)
+
+
+def wilcoxon_table():
+    rng = np.random.default_rng(0)
+    n = len(LEAGUES) * len(SEASONS)
+    return pd.DataFrame({"League": np.repeat(LEAGUES, len(SEASONS)), "Season": SEASONS * len(LEAGUES),
+                         "wilco-points": rng.uniform(1000, 5000, n), "wilco-pvalue-points": rng.uniform(0, 0.1, n),
+                         "cohend-points": rng.normal(0.2, 0.1, n)})
+
+
+def anova_table():
+    rng = np.random.default_rng(1)
+    n = len(LEAGUES) * len(SEASONS)
+    return pd.DataFrame({"League": np.repeat(LEAGUES, len(SEASONS)), "Season": SEASONS * len(LEAGUES),
+                         "anova-F": rng.uniform(0, 20, n), "anova-pvalue": rng.uniform(0, 0.1, n)})
+
+
+def mann_whitney_results():
+    later = np.tril(np.ones((len(SEASONS), len(SEASONS)), dtype=bool), k=-1)
+    p_values = np.where(later, np.linspace(0.001, 0.2, len(SEASONS) ** 2).reshape(len(SEASONS), -1), np.nan)
+    return {league: pd.DataFrame(p_values, index=SEASONS, columns=SEASONS) for league in LEAGUES}
+
+
+def diff_data():
+    return pd.DataFrame({"League": np.repeat(LEAGUES, len(SEASONS)), "Season": SEASONS * len(LEAGUES),
+                         "diff_points_homeaway": [40, -12, 0, 80, 7, 3],
+                         "diff_xpoints_homeaway": [20.0, 5.0, -30.0, 10.0, -1.0, 2.0]})
+
+
+@pytest.fixture
+def pool():
+    """Pool de rendu propre au test, arrêté à la fin."""
+    homeadv.render._executor = None
+    yield
+    executor, homeadv.render._executor = homeadv.render._executor, None
+    if executor is not None:
+        executor.shutdown()
+
+
+def test_inprocess_jobs_write_files_and_close_figures(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    plt.close("all")
+    results = mann_whitney_results()
+    jobs = [figure_job(script("reproduction/wilcoxon_with_undestat.py"), "create_image", wilcoxon_table()),
+            figure_job(script("replicabilite/new_statistical_method/repeated_measures_anova.py"), "create_image",
+                       anova_table())]
+    jobs += [figure_job(script("reproduction/mannwhitneyu.py"), "create_stylized_table", {league: results[league]},
+                        league) for league in LEAGUES]
+
+    assert render_figures(jobs, workers=1) == [None] * len(jobs)
+    for path in ["reproduction/results/reproduction_wilcoxon.png",
+                 "replicabilite/new_statistical_method/results/reproduction_anova.png",
+                 "reproduction/results/tableau_ligues/mann_whitney_EPL.png",
+                 "reproduction/results/tableau_ligues/mann_whitney_RFPL.png"]:
+        assert (tmp_path / path).stat().st_size > 0, path
+    assert plt.get_fignums() == []
+
+
+def test_pool_jobs_write_files_in_order(tmp_path, pool):
+    outputs = [tmp_path / f"diff_{k}.png" for k in range(3)]
+    jobs = [figure_job(script("homeadv/diverging.py"), "create_diff_figure", diff_data(), str(output))
+            for output in outputs]
+    jobs.append(figure_job(script("homeadv/render.py"), "render_workers"))
+    jobs.append(figure_job(script("homeadv/bootstrap.py"), "bootstrap_workers"))
+
+    results = render_figures(jobs, workers=2)
+    assert results[:-2] == [None] * len(outputs)
+    # Les processus du pool rendent eux-mêmes dans leur processus (un seul rendu à la fois)
+    # et n'ouvrent pas de pool de bootstrap
+    assert results[-2:] == [1, 1]
+    for output in outputs:
+        assert output.stat().st_size > 0
+
+
+def test_render_errors_are_raised(tmp_path):
+    job = figure_job(script("homeadv/diverging.py"), "create_diff_figure", diff_data(), str(tmp_path / "no/such/dir.png"))
+    with pytest.raises(FileNotFoundError):
+        render_figures([job], workers=1)
+    plt.close("all")
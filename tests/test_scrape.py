@@ -0,0 +1,203 @@
+"""
+`homeadv.scrape` : tableaux par équipe et par match identiques à ceux de
+l'ancien `scrap.py` (une requête et un parsing par tableau), et
+`PageFetcher` face au serveur Understat local (`homeadv.stub`) : nouvelles
+tentatives sur les statuts 429 / 5xx, chacune passant par le limiteur de
+débit, et pages en erreur après la dernière.
+"""
+import json
+import re
+import threading
+import time
+from collections import Counter
+
+import pandas as pd
+import pytest
+import requests
+
+import homeadv.scrape
+from homeadv.scrape import (PageFetcher, ThreadRateLimiter, page_path, parse_teams_data, scrape,
+                            team_stats_by_location, team_stats_by_match)
+from homeadv.stub import StubServer
+from homeadv.synthetic import SyntheticUnderstat
+
+
+LEAGUES = ["EPL", "Serie_A"]
+SEASONS = ["2018", "2019"]
+
+
+def legacy_teams_data(html):
+    match = re.search(r"var teamsData\s*=\s*JSON\.parse\(\'(.*?)\'\);", html)
+    if not match:
+        return None
+    return json.loads(bytes(match.group(1), "utf-8").decode("unicode_escape"))
+
+
+def legacy_stats_by_location(html, league, season):
+    """`extract_team_stats_by_location` de l'ancien `scrap.py`, à partir de la page."""
+    data_teams = legacy_teams_data(html)
+    if data_teams is None:
+        return []
+    stats = []
+    for team_id, team_data in data_teams.items():
+        matches = team_data['history']
+
+        def calculate_stats(matches, location):
+            return {
+                "League": league, "Season": season, "Team": team_data['title'], "Location": location,
+                "M": len(matches),
+                "W": sum(1 for match in matches if match['result'] == 'w'),
+                "D": sum(1 for match in matches if match['result'] == 'd'),
+                "L": sum(1 for match in matches if match['result'] == 'l'),
+                "G": sum(match.get('scored', 0) for match in matches),
+                "GA": sum(match.get('missed', 0) for match in matches),
+                "PTS": sum(match.get('pts', 0) for match in matches),
+                "xG": round(sum(match.get('xG', 0) for match in matches), 2),
+                "xGA": round(sum(match.get('xGA', 0) for match in matches), 2),
+                "xPTS": round(sum(match.get('xpts', 0) for match in matches), 2),
+            }
+
+        stats.extend([calculate_stats([m for m in matches if m['h_a'] == 'h'], "home"),
+                      calculate_stats([m for m in matches if m['h_a'] == 'a'], "away")])
+    return stats
+
+
+def legacy_stats_by_match(html, league, season):
+    """`extract_team_stats_by_match` de l'ancien `scrap.py`, à partir de la page."""
+    data_teams = legacy_teams_data(html)
+    if data_teams is None:
+        return []
+    return [{
+        "League": league, "Season": season, "Team": team_data['title'], "Home_Away": match['h_a'],
+        "Result": match['result'], "Goals": match.get('scored', 0), "Goals_Against": match.get('missed', 0),
+        "xG": round(match.get('xG', 0), 2), "xGA": round(match.get('xGA', 0), 2),
+        "xPTS": round(match.get('xpts', 0), 2), "Points": match.get('pts', 0),
+    } for team_id, team_data in data_teams.items() for match in team_data['history']]
+
+
+@pytest.mark.parametrize("league, season", [("EPL", "2019"), ("RFPL", "2015")])
+def test_team_stats_match_legacy_parsing(league, season):
+    html = SyntheticUnderstat().league_page(league, season)
+    data_teams = parse_teams_data(html)
+
+    assert team_stats_by_location(data_teams, league, season) == legacy_stats_by_location(html, league, season)
+    assert team_stats_by_match(data_teams, league, season) == legacy_stats_by_match(html, league, season)
+
+
+def test_scrape_matches_legacy_csvs(tmp_path):
+    generator = SyntheticUnderstat()
+    pages = {}
+    for league in LEAGUES:
+        for season in SEASONS:
+            pages[(league, season)] = generator.league_page(league, season)
+            with open(page_path(tmp_path, league, season), "w", encoding="utf-8") as f:
+                f.write(pages[(league, season)])
+    # Une page sans teamsData est ignorée par les deux méthodes
+    for league in LEAGUES:
+        with open(page_path(tmp_path, league, "2017"), "w", encoding="utf-8") as f:
+            f.write("<html><body>Not found</body></html>")
+
+    team_stats, match_stats = scrape(LEAGUES, ["2017"] + SEASONS, html_dir=str(tmp_path), rate=None)
+
+    keys = [(league, season) for league in LEAGUES for season in ["2017"] + SEASONS if (league, season) in pages]
+    legacy_team = pd.DataFrame([row for key in keys for row in legacy_stats_by_location(pages[key], *key)])
+    legacy_match = pd.DataFrame([row for key in keys for row in legacy_stats_by_match(pages[key], *key)])
+    pd.testing.assert_frame_equal(team_stats, legacy_team)
+    pd.testing.assert_frame_equal(match_stats, legacy_match)
+
+
+class FlakyStub(StubServer):
+    """Serveur local dont les `failures` premières requêtes de chaque page échouent."""
+
+    def __init__(self, failures, **options):
+        super().__init__(**options)
+        self.failures = failures
+        self.attempts = Counter()
+        self._attempts_lock = threading.Lock()
+
+    def respond(self, path, headers):
+        with self._attempts_lock:
+            self.attempts[path] += 1
+            failed = self.attempts[path] <= self.failures
+        if failed:
+            self._count(self.error_status)
+            return self.error_status, "text/plain", b"Synthetic error", {}
+        return super().respond(path, headers)
+
+
+class CountingLimiter(ThreadRateLimiter):
+    """Limiteur de débit qui compte les requêtes qu'il laisse partir."""
+
+    def __init__(self, rate):
+        super().__init__(rate)
+        self.waits = 0
+        self._waits_lock = threading.Lock()
+
+    def wait(self):
+        with self._waits_lock:
+            self.waits += 1
+        super().wait()
+
+
+@pytest.fixture
+def fetcher_for(monkeypatch):
+    def make(stub, **options):
+        monkeypatch.setattr(homeadv.scrape, "LEAGUE_URL", stub.url + "/league/{league}/{season}")
+        fetcher = PageFetcher(workers=2, backoff=0.0, **options)
+        fetcher.limiter = CountingLimiter(options.get("rate"))
+        return fetcher
+    return make
+
+
+KEYS = [("EPL", 2020), ("La_liga", 2020)]
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_every_attempt_waits_on_the_limiter(fetcher_for, status):
+    with FlakyStub(failures=2, error_status=status) as stub:
+        fetcher = fetcher_for(stub, rate=None, retries=3)
+        pages, report = fetcher.fetch_all(KEYS)
+
+    assert report["errors"] == 0
+    for (league, season), html in zip(KEYS, pages):
+        assert parse_teams_data(html) is not None
+    assert stub.stats[status] == 2 * len(KEYS)
+    assert fetcher.limiter.waits == stub.stats["requests"] == 3 * len(KEYS)
+
+
+def test_retries_respect_the_rate(fetcher_for):
+    with FlakyStub(failures=2) as stub:
+        fetcher = fetcher_for(stub, rate=20.0, retries=2)
+        start = time.monotonic()
+        fetcher.fetch("EPL", 2020)
+        elapsed = time.monotonic() - start
+
+    # Trois départs pour une seule page, espacés d'au moins 1/20 s
+    assert elapsed >= 2 / 20.0
+
+
+def test_persistent_errors_are_reported(fetcher_for):
+    with FlakyStub(failures=10, error_status=429) as stub:
+        fetcher = fetcher_for(stub, rate=None, retries=2)
+        pages, report = fetcher.fetch_all(KEYS)
+
+    assert pages == [None, None]
+    assert report["errors"] == len(KEYS)
+    assert stub.stats[429] == 3 * len(KEYS)
+
+
+def test_other_statuses_are_not_retried(fetcher_for):
+    with StubServer() as stub:
+        fetcher = fetcher_for(stub, rate=None, retries=3)
+        html, status = fetcher.fetch("EPL", 0)
+
+    assert status == "404"
+    assert stub.stats["requests"] == 1
+
+
+def test_last_retryable_status_raises(fetcher_for):
+    with FlakyStub(failures=10) as stub:
+        fetcher = fetcher_for(stub, rate=None, retries=1)
+        with pytest.raises(requests.HTTPError):
+            fetcher.fetch("EPL", 2020)
+    assert stub.stats[503] == 2
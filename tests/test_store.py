@@ -0,0 +1,260 @@
+"""
+Stockage en colonnes de `homeadv.store` : aller-retour CSV -> `.store` ->
+tableau (types, partitions League / Season / lieu, filtres, ordre des
+lignes), écritures concurrentes d'un même stockage, lectures pendant une
+réécriture et fusion partition par partition (`upsert_table`).
+"""
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from homeadv.store import MANIFEST, load_table, store_path, upsert_table, write_store, write_table
+
+
+LEAGUES = ["EPL", "Ligue_1"]
+SEASONS = [2019, 2020]
+
+
+def match_stats(leagues=LEAGUES, seasons=SEASONS, teams=4, seed=0):
+    """Tableau au format de `understat_match_stats.csv`, lignes mélangées entre partitions."""
+    rng = np.random.default_rng(seed)
+    rows = [(league, season, f"{league} {team}", location)
+            for league in leagues for season in seasons for team in range(teams) for location in "ha"]
+    n = len(rows)
+    goals, goals_against = rng.integers(0, 5, n), rng.integers(0, 5, n)
+    df = pd.DataFrame(rows, columns=["League", "Season", "Team", "Home_Away"])
+    df["Result"] = np.where(goals > goals_against, "w", np.where(goals < goals_against, "l", "d"))
+    df["Goals"] = goals
+    df["Goals_Against"] = goals_against
+    df["xG"] = np.round(rng.uniform(0, 4, n), 2)
+    df["xGA"] = np.round(rng.uniform(0, 4, n), 2)
+    df["xPTS"] = np.round(rng.uniform(0, 3, n), 2)
+    df["Points"] = np.select([goals > goals_against, goals == goals_against], [3, 1], 0)
+    # Valeurs à plus de deux décimales : stockées telles quelles
+    df["Ratio"] = rng.uniform(0, 1, n)
+    return df.iloc[rng.permutation(n)].reset_index(drop=True)
+
+
+def _manifest(csv_path):
+    with open(os.path.join(store_path(csv_path), MANIFEST)) as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = str(tmp_path / "understat_match_stats.csv")
+    write_table(match_stats(), path)
+    return path
+
+
+def test_round_trip(csv_path):
+    expected = pd.read_csv(csv_path)
+    pd.testing.assert_frame_equal(load_table(csv_path), expected, check_dtype=False, check_categorical=False,
+                                  check_exact=True)
+
+    kinds = {name: spec["kind"] for name, spec in _manifest(csv_path)["columns"].items()}
+    assert kinds == {"League": "category", "Season": "int", "Team": "category", "Home_Away": "category",
+                     "Result": "category", "Goals": "int", "Goals_Against": "int", "xG": "decimal",
+                     "xGA": "decimal", "xPTS": "decimal", "Points": "int", "Ratio": "float"}
+
+
+def test_partitions(csv_path):
+    manifest = _manifest(csv_path)
+    assert manifest["partition_by"] == ["League", "Season", "Home_Away"]
+    keys = [tuple(partition["key"].values()) for partition in manifest["partitions"]]
+    assert sorted(keys) == sorted((league, season, location)
+                                  for league in LEAGUES for season in SEASONS for location in "ha")
+    # Partitions contiguës couvrant toutes les lignes
+    bounds = sorted((partition["start"], partition["stop"]) for partition in manifest["partitions"])
+    assert bounds[0][0] == 0 and bounds[-1][1] == len(pd.read_csv(csv_path))
+    assert all(stop == start for (_, stop), (start, _) in zip(bounds, bounds[1:]))
+
+
+@pytest.mark.parametrize("filters", [
+    {"League": "EPL"},
+    {"Season": 2020},
+    {"League": "Ligue_1", "Season": [2019, 2020], "Home_Away": "h"},
+    {"Season": "2019", "Result": ["w", "d"]},
+    {"League": "Serie_A"},
+])
+def test_filters_and_columns(csv_path, filters):
+    expected = pd.read_csv(csv_path)
+    for name, value in filters.items():
+        accepted = value if isinstance(value, list) else [value]
+        expected = expected[expected[name].astype(str).isin([str(v) for v in accepted])]
+    columns = ["Team", "xPTS", "Points"]
+
+    loaded = load_table(csv_path, columns=columns, filters=filters)
+    pd.testing.assert_frame_equal(loaded, expected[columns].reset_index(drop=True), check_dtype=False,
+                                  check_categorical=False, check_exact=True)
+
+
+def test_location_partitions(tmp_path):
+    df = match_stats().rename(columns={"Home_Away": "Location"})
+    df["Location"] = df["Location"].map({"h": "home", "a": "away"})
+    path = str(tmp_path / "understat_team_stats_home_away.csv")
+    write_table(df, path)
+
+    assert _manifest(path)["partition_by"] == ["League", "Season", "Location"]
+    loaded = load_table(path, filters={"Location": "away"})
+    expected = pd.read_csv(path)
+    expected = expected[expected["Location"] == "away"].reset_index(drop=True)
+    pd.testing.assert_frame_equal(loaded, expected, check_dtype=False, check_categorical=False, check_exact=True)
+
+
+def test_rebuilt_when_csv_changes(csv_path):
+    changed = match_stats(seasons=[2021], seed=1)
+    changed.to_csv(csv_path, index=False)
+    os.utime(csv_path, ns=(0, 0))
+
+    pd.testing.assert_frame_equal(load_table(csv_path), pd.read_csv(csv_path), check_dtype=False,
+                                  check_categorical=False, check_exact=True)
+    assert _manifest(csv_path)["source"]["mtime"] == 0
+
+
+def test_concurrent_writes(csv_path):
+    df = pd.read_csv(csv_path)
+    path = store_path(csv_path)
+    errors = []
+    barrier = threading.Barrier(8)
+
+    def write():
+        try:
+            barrier.wait()
+            for _ in range(10):
+                write_store(df, path, source=csv_path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    # Un stockage complet, à jour (pas de reconstruction) et aucun dossier temporaire laissé
+    assert _manifest(csv_path)["source"]["size"] == os.stat(csv_path).st_size
+    pd.testing.assert_frame_equal(load_table(csv_path), df, check_dtype=False, check_categorical=False,
+                                  check_exact=True)
+    assert [name for name in os.listdir(os.path.dirname(path)) if name.endswith(".tmp")] == []
+
+
+def test_reads_during_writes(csv_path):
+    df = pd.read_csv(csv_path)
+    path = store_path(csv_path)
+    errors = []
+    writing = threading.Event()
+
+    def write():
+        try:
+            for _ in range(30):
+                write_store(df, path, source=csv_path)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            writing.set()
+
+    def read():
+        try:
+            while not writing.is_set():
+                pd.testing.assert_frame_equal(load_table(csv_path, filters={"League": "EPL"}),
+                                              df[df["League"] == "EPL"].reset_index(drop=True), check_dtype=False,
+                                              check_categorical=False, check_exact=True)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    # Seule la version du manifeste reste
+    version = _manifest(csv_path)["version"]
+    assert sorted(name for name in os.listdir(path) if not name.startswith(".")) == sorted([MANIFEST, version])
+
+
+def _partition(df, league, season):
+    rows = df[(df["League"] == league) & (df["Season"] == season)]
+    return rows.reset_index(drop=True)
+
+
+def test_upsert_is_idempotent(tmp_path):
+    path = str(tmp_path / "understat_match_stats.csv")
+    first = match_stats()
+    upsert_table(first, path)
+    written = pd.read_csv(path)
+    assert len(written) == len(first)
+    mtime = os.stat(path).st_mtime_ns
+
+    # Même fusion rejouée : contenu identique, CSV non réécrit
+    merged = upsert_table(first, path)
+    assert os.stat(path).st_mtime_ns == mtime
+    pd.testing.assert_frame_equal(merged, written)
+    pd.testing.assert_frame_equal(pd.read_csv(path), written)
+
+    # Rien à fusionner (aucune partition rescrapée) : CSV non réécrit non plus
+    merged = upsert_table(pd.DataFrame(columns=first.columns), path)
+    assert os.stat(path).st_mtime_ns == mtime
+    pd.testing.assert_frame_equal(merged, written)
+
+
+def test_upsert_replaces_only_touched_partitions(tmp_path):
+    path = str(tmp_path / "understat_match_stats.csv")
+    upsert_table(match_stats(), path)
+    before = pd.read_csv(path)
+
+    # EPL 2020 rescrapé (moins d'équipes, autres valeurs) et une nouvelle partition EPL 2021
+    update = match_stats(leagues=["EPL"], seasons=[2020, 2021], teams=3, seed=1)
+    merged = upsert_table(update, path)
+    after = pd.read_csv(path)
+    pd.testing.assert_frame_equal(merged, after)
+
+    assert len(after) == len(before) - 2 * 4 + 2 * 3 + 2 * 3
+    for league, season in [("EPL", 2019), ("Ligue_1", 2019), ("Ligue_1", 2020)]:
+        pd.testing.assert_frame_equal(_partition(after, league, season), _partition(before, league, season))
+    for season in (2020, 2021):
+        pd.testing.assert_frame_equal(_partition(after, "EPL", season),
+                                      _partition(update.astype({"Season": np.int64}), "EPL", season),
+                                      check_exact=False, rtol=1e-15)
+    assert set(zip(after["League"], after["Season"])) == set(zip(before["League"], before["Season"])) | {("EPL", 2021)}
+
+    # La même mise à jour rejouée ne change plus rien
+    mtime = os.stat(path).st_mtime_ns
+    upsert_table(update, path)
+    assert os.stat(path).st_mtime_ns == mtime
+    # Le stockage en colonnes suit le CSV
+    assert len(load_table(path, filters={"League": "EPL", "Season": 2020})) == 2 * 3
+
+
+def test_upsert_seeds_and_order(tmp_path):
+    seed_path = str(tmp_path / "seed.csv")
+    match_stats(seasons=[2018, 2019, 2020]).to_csv(seed_path, index=False)
+    path = str(tmp_path / "understat_match_stats.csv")
+
+    update = match_stats(leagues=["EPL"], seasons=[2020], seed=2)
+    order = [(league, season) for league in LEAGUES for season in (2019, 2020)]
+    merged = upsert_table(update, path, seeds=[seed_path], order=order)
+
+    # Partitions des seeds limitées à `order`, celle de `update` prioritaire, dans l'ordre de `order`
+    assert list(dict.fromkeys(zip(merged["League"], merged["Season"]))) == order
+    seed = pd.read_csv(seed_path)
+    pd.testing.assert_frame_equal(_partition(merged, "EPL", 2019), _partition(seed, "EPL", 2019))
+    pd.testing.assert_frame_equal(_partition(merged, "EPL", 2020), _partition(pd.read_csv(path), "EPL", 2020))
+    assert _partition(merged, "EPL", 2020)["Team"].tolist() == _partition(update, "EPL", 2020)["Team"].tolist()
+
+
+def test_upsert_replaces_csv_with_other_columns(tmp_path):
+    path = str(tmp_path / "understat_match_stats.csv")
+    pd.DataFrame({"League": ["EPL"], "Season": [2020], "Other": [1]}).to_csv(path, index=False)
+    update = match_stats(leagues=["EPL"], seasons=[2020])
+
+    merged = upsert_table(update, path)
+    assert list(merged.columns) == list(update.columns)
+    assert len(pd.read_csv(path)) == len(update)
@@ -0,0 +1,131 @@
+"""
+`homeadv.tables` avec le backend Agg : textes des cases (`format_cells`),
+couleurs des cases d'un tableau de p-values de Mann-Whitney (seuil 0.05,
+cases NaN), taille de police commune identique à celle que choisit
+`matplotlib.table.Table`, et rendu d'une figure dans `tmp_path`.
+"""
+import matplotlib
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib.colors import to_rgba
+from matplotlib.table import Table
+
+import homeadv.tables
+from homeadv.render import load_script
+from homeadv.tables import HEADER_COLOR, draw_table, format_cells
+
+
+SEASONS = [2014, 2015, 2016]
+
+
+def p_value_table():
+    # Triangle inférieur des comparaisons de saisons, comme `calculate_mann_whitney`
+    return pd.DataFrame([[np.nan, np.nan, np.nan], [0.01, np.nan, np.nan], [0.05, 0.2, np.nan]],
+                        index=SEASONS, columns=SEASONS)
+
+
+def test_format_cells():
+    df = pd.DataFrame({"League": ["EPL", "RFPL"], "Season": [2014, 2015], "p": [0.0123456789, np.nan]})
+
+    assert format_cells(df, ".4f").tolist() == [["EPL", "2014", "0.0123"], ["RFPL", "2015", "nan"]]
+    assert format_cells(df, ".6f", na_rep="").tolist() == [["EPL", "2014", "0.012346"], ["RFPL", "2015", ""]]
+
+
+def test_mann_whitney_cell_colors(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    script = load_script("reproduction/mannwhitneyu.py")
+    tables = []
+
+    def recording_draw_table(*args, **kwargs):
+        tables.append(draw_table(*args, **kwargs))
+        return tables[-1]
+
+    monkeypatch.setattr(script, "draw_table", recording_draw_table)
+    script.create_stylized_table({"EPL": p_value_table()}, "EPL")
+
+    assert (tmp_path / "reproduction/results/tableau_ligues/mann_whitney_EPL.png").stat().st_size > 0
+    assert plt.get_fignums() == []
+
+    table, = tables
+    facecolors = table._cells.get_facecolors()
+    cells = {(row, col): (table._text[row, col], tuple(color))
+             for row, col, color in zip(table._rows, table._cols, facecolors)}
+    # Pas de case de coin ; en-têtes de lignes et de colonnes en gris
+    assert (0, 0) not in cells
+    for k, season in enumerate(SEASONS, start=1):
+        assert cells[(0, k)] == (str(season), to_rgba(HEADER_COLOR))
+        assert cells[(k, 0)] == (str(season), to_rgba(HEADER_COLOR))
+    # p < 0.05 en rouge ; 0.05 (seuil exclu), 0.2 et les NaN (sans texte) en blanc
+    assert cells[(2, 1)] == ("0.010000", to_rgba("red"))
+    assert cells[(3, 1)] == ("0.050000", to_rgba("white"))
+    assert cells[(3, 2)] == ("0.200000", to_rgba("white"))
+    for row, col in [(1, 1), (1, 2), (1, 3), (2, 2), (2, 3), (3, 3)]:
+        assert cells[(row, col)] == ("", to_rgba("white"))
+
+
+def matplotlib_fontsize(figsize, text, fontsize):
+    """Taille de police choisie par `matplotlib.table.Table` pour la grille `text` couvrant les axes."""
+    fig, ax = plt.subplots(figsize=figsize)
+    ax.axis("off")
+    n_rows, n_cols = text.shape
+    table = Table(ax)
+    for row in range(n_rows):
+        for col in range(n_cols):
+            table.add_cell(row, col, width=1 / n_cols, height=1 / n_rows, text=text[row, col], loc="center")
+    table.set_fontsize(fontsize)
+    ax.add_table(table)
+    fig.canvas.draw()
+    sizes = {cell.get_fontsize() for cell in table.get_celld().values()}
+    plt.close(fig)
+    assert len(sizes) == 1
+    return sizes.pop()
+
+
+def color_table_fontsize(figsize, text, fontsize):
+    fig, ax = plt.subplots(figsize=figsize)
+    ax.axis("off")
+    table = homeadv.tables.ColorTable(ax, text, np.full(text.shape, "white", dtype=object), fontsize=fontsize)
+    ax.add_artist(table)
+    fig.canvas.draw()
+    size = table.fit_fontsize(fig.canvas.get_renderer())
+    plt.close(fig)
+    return size
+
+
+def wilcoxon_text(n_rows):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"League": np.resize(["Ligue_1", "La_liga", "Bundesliga", "RFPL"], n_rows),
+                       "Season": np.arange(n_rows) + 2014,
+                       "wilco-points": rng.uniform(1000, 60000, n_rows),
+                       "wilco-pvalue-points": rng.uniform(0, 1, n_rows),
+                       "cohend-points": rng.normal(0.2, 0.1, n_rows)})
+    return np.vstack([df.columns.to_numpy(dtype=object), format_cells(df, ".6f")])
+
+
+@pytest.mark.parametrize("figsize, fontsize", [((18, 6), 10), ((18, 12), 20), ((8, 4), 10), ((4, 3), 12)],
+                         ids=["wide", "large-font", "narrow", "tiny"])
+def test_fit_fontsize_matches_matplotlib_table(figsize, fontsize):
+    text = wilcoxon_text(12)
+    expected = matplotlib_fontsize(figsize, text, fontsize)
+
+    assert color_table_fontsize(figsize, text, fontsize) == expected
+    if figsize == (4, 3):
+        assert expected < fontsize
+
+
+def test_draw_table_renders_to_file(tmp_path):
+    text = wilcoxon_text(6)
+    fig, ax = plt.subplots(figsize=(12, 4))
+    ax.axis("off")
+    table = draw_table(ax, text[1:], np.full(text[1:].shape, "yellow", dtype=object), text[0])
+    output = tmp_path / "table.png"
+    fig.savefig(output, bbox_inches="tight", dpi=100)
+    plt.close(fig)
+
+    assert output.stat().st_size > 0
+    assert table._text.shape == text.shape
+    assert len(table._cells.get_paths()) == text.size
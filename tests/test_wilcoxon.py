@@ -0,0 +1,131 @@
+"""
+`homeadv.wilcoxon.paired_wilcoxon` face à `scipy.stats.wilcoxon` (options
+par défaut) : continu ou avec ex-aequo, avec ou sans différences nulles,
+branches exacte (au plus 50 différences) et approximation normale.
+
+La référence est la version de SciPy fixée par `requirements.txt` (1.14) :
+les versions suivantes traitent autrement les petits échantillons avec
+ex-aequo ou différences nulles, ces cas ne sont comparés qu'avec SciPy 1.14.
+"""
+import numpy as np
+import pytest
+import scipy
+from scipy.stats import wilcoxon
+
+from homeadv.wilcoxon import paired_wilcoxon, wilcoxon_batch
+
+
+def _continuous(n, shift=0.0):
+    def make(rng):
+        return rng.normal(shift, 1, n), rng.normal(0, 1, n)
+    return make
+
+
+def _integers(n, high, shift=0):
+    def make(rng):
+        # Ex-aequo et différences nulles fréquents
+        return rng.integers(0, high, n) + shift, rng.integers(0, high, n)
+    return make
+
+
+def _points(n):
+    def make(rng):
+        return rng.choice([0, 1, 3], n, p=[0.3, 0.25, 0.45]), rng.choice([0, 1, 3], n, p=[0.45, 0.25, 0.3])
+    return make
+
+
+def _rounded(n, decimals):
+    def make(rng):
+        # Ex-aequo sans différence nulle : les xPTS arrondis, décalés d'un demi-pas
+        x = np.round(rng.uniform(0, 3, n), decimals)
+        return x + 0.5 * 10.0 ** -decimals, np.round(rng.uniform(0, 3, n), decimals)
+    return make
+
+
+def _one_zero(n):
+    def make(rng):
+        x, y = rng.normal(0, 1, n), rng.normal(0, 1, n)
+        y[0] = x[0]
+        return x, y
+    return make
+
+
+CASES = {
+    # Loi exacte : au plus 50 différences, aucune nulle
+    "exact-n5": _continuous(5),
+    "exact-n10": _continuous(10),
+    "exact-n20-shift": _continuous(20, 0.8),
+    "exact-n35": _continuous(35),
+    "exact-n50": _continuous(50),
+    "exact-n50-shift": _continuous(50, 1.5),
+    "exact-ties-n12": _rounded(12, 0),
+    "exact-ties-n30": _rounded(30, 1),
+    "exact-ties-n50": _rounded(50, 1),
+    # Approximation normale : plus de 50 différences
+    "approx-n51": _continuous(51),
+    "approx-n100-shift": _continuous(100, 0.3),
+    "approx-n380": _continuous(380),
+    "approx-ties-n120": _rounded(120, 1),
+    "approx-ties-n190": _rounded(190, 2),
+    # Différences nulles : approximation normale quelle que soit la taille
+    "zeros-one-n10": _one_zero(10),
+    "zeros-one-n60": _one_zero(60),
+    "zeros-int-n8": _integers(8, 3),
+    "zeros-int-n25": _integers(25, 4),
+    "zeros-int-n50": _integers(50, 5),
+    "zeros-int-n200": _integers(200, 5),
+    "zeros-int-n120-shift": _integers(120, 4, shift=1),
+    "zeros-points-n15": _points(15),
+    "zeros-points-n190": _points(190),
+    "zeros-points-n380": _points(380),
+}
+
+
+# Petits échantillons (au plus 50 différences) avec ex-aequo ou différences nulles
+SCIPY_1_14_ONLY = {"exact-ties-n12", "exact-ties-n30", "exact-ties-n50", "zeros-one-n10", "zeros-int-n8",
+                   "zeros-int-n25", "zeros-int-n50", "zeros-points-n15"}
+PINNED_SCIPY = scipy.__version__.startswith("1.14.")
+
+
+@pytest.mark.parametrize("name", [
+    pytest.param(name, marks=pytest.mark.skipif(name in SCIPY_1_14_ONLY and not PINNED_SCIPY,
+                                                reason="comportement propre à SciPy 1.14"))
+    for name in CASES
+])
+def test_matches_scipy(name):
+    x, y = CASES[name](np.random.default_rng(list(CASES).index(name)))
+    expected_statistic, expected_pvalue = wilcoxon(x, y)
+
+    statistics, pvalues = paired_wilcoxon([(x, y)], method="auto")
+    assert statistics[0] == pytest.approx(expected_statistic, rel=1e-12)
+    assert pvalues[0] == pytest.approx(expected_pvalue, rel=1e-9, abs=1e-15)
+
+
+def test_batch_matches_single_calls():
+    pairs = [CASES[name](np.random.default_rng(k)) for k, name in enumerate(CASES)]
+    statistics, pvalues = paired_wilcoxon(pairs, method="auto")
+    for k, pair in enumerate(pairs):
+        single_statistics, single_pvalues = paired_wilcoxon([pair], method="auto")
+        assert statistics[k] == single_statistics[0]
+        assert pvalues[k] == single_pvalues[0]
+
+
+@pytest.mark.parametrize("method", ["auto", "exact"])
+@pytest.mark.parametrize("differences", [[[0.0, 0.0]], [[]], [[0.0], [], [0.0, 0.0, 0.0]]],
+                         ids=["zeros", "empty", "zeros-and-empty"])
+def test_batch_without_nonzero_difference_is_nan(differences, method):
+    statistics, pvalues = wilcoxon_batch(differences, method=method)
+    assert statistics.dtype == pvalues.dtype == np.float64
+    assert np.isnan(statistics).all() and np.isnan(pvalues).all()
+
+
+@pytest.mark.parametrize("method", ["auto", "exact"])
+def test_batch_with_some_all_zero_groups(method):
+    pairs = [CASES[name](np.random.default_rng(k)) for k, name in enumerate(["exact-n10", "zeros-int-n25"])]
+    differences = [np.subtract(x, y, dtype=np.float64) for x, y in pairs]
+    statistics, pvalues = wilcoxon_batch([[0.0, 0.0], differences[0], [], differences[1], [0.0]], method=method)
+
+    assert np.isnan(statistics[[0, 2, 4]]).all() and np.isnan(pvalues[[0, 2, 4]]).all()
+    expected_statistics, expected_pvalues = wilcoxon_batch(differences, method=method)
+    np.testing.assert_array_equal(statistics[[1, 3]], expected_statistics)
+    np.testing.assert_array_equal(pvalues[[1, 3]], expected_pvalues)
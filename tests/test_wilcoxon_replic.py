@@ -0,0 +1,78 @@
+"""
+Non-régression de `replicabilite/web_scraping/wilcoxon_replic.py` : le
+découpage domicile / extérieur par tableaux (`homeadv.matches`) donne les
+mêmes statistiques, p-values et Cohen's d que l'ancienne boucle `iterrows`
+sur le CSV scrapé versionné.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import wilcoxon
+
+from homeadv.cache import ROOT_DIR
+from homeadv.render import load_script
+
+
+MATCH_CSV = "./replicabilite/web_scraping/understat_match_stats.csv"
+POINTS = {"w": 3, "d": 1, "l": 0}
+
+
+def _cohen_d(home, away):
+    # Formule de l'ancien script
+    n_a, n_b = len(home), len(away)
+    s_p = np.sqrt(((n_a - 1) * np.std(home, ddof=1) ** 2 + (n_b - 1) * np.std(away, ddof=1) ** 2)
+                  / (n_a + n_b - 2))
+    return (np.mean(home) - np.mean(away)) / s_p
+
+
+def _per_row_results(understat):
+    """Ancien calcul : une ligne du CSV à la fois, puis un test par ligue, saison et mesure."""
+    rows = []
+    for league in understat["League"].unique():
+        for season in understat["Season"].unique():
+            group = understat[(understat["League"] == league) & (understat["Season"] == season)]
+            values = {"h": ([], [], []), "a": ([], [], [])}
+            for _, row in group.iterrows():
+                points, xpts, xg = values[row["Home_Away"]]
+                points.append(POINTS[row["Result"]])
+                xpts.append(row["xPTS"])
+                xg.append(row["xG"])
+            result = {"League": league, "Season": season}
+            for k, suffix in enumerate(["", "-xPTS", "-xG"]):
+                home, away = values["h"][k], values["a"][k]
+                stat, p = wilcoxon(home, away)
+                name = "result" if not suffix else suffix[1:]
+                result[f"wilco-{name}"] = stat
+                result[f"wilco-{name}-pvalue"] = p
+                result[f"result-cohend{suffix}"] = _cohen_d(home, away)
+            rows.append(result)
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture(scope="module")
+def results():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.chdir(ROOT_DIR)
+        expected = _per_row_results(pd.read_csv(MATCH_CSV))
+        actual = load_script("replicabilite/web_scraping/wilcoxon_replic.py").compute_results()
+    return expected, actual
+
+
+def test_same_leagues_and_seasons(results):
+    expected, actual = results
+    assert list(zip(actual["League"], actual["Season"])) == list(zip(expected["League"], expected["Season"]))
+
+
+@pytest.mark.parametrize("column", ["wilco-result", "wilco-result-pvalue", "wilco-xPTS", "wilco-xPTS-pvalue",
+                                    "wilco-xG", "wilco-xG-pvalue"])
+def test_same_wilcoxon_tests(results, column):
+    expected, actual = results
+    np.testing.assert_array_equal(actual[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float))
+
+
+@pytest.mark.parametrize("column", ["result-cohend", "result-cohend-xPTS", "result-cohend-xG"])
+def test_same_cohen_d(results, column):
+    expected, actual = results
+    # Sommes réduites par groupe au lieu de `np.mean` / `np.std` : égales à l'arrondi près
+    np.testing.assert_allclose(actual[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+                               rtol=1e-10, atol=0)